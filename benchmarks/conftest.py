@@ -0,0 +1,244 @@
+"""
+Fixtures for the pytest-benchmark suite in this directory.
+
+The suite runs against a real PostgreSQL database holding synthetic,
+WRDS-shaped schemas, built once per session:
+
+- bench_crsp: a CRSP daily stock file (dsf) and a name history
+  (stocknames), with indexes on permno and date
+- bench_comp: a wide Compustat fundamentals table (funda)
+- bench_crspa: views only, over bench_crsp, like WRDS "friendly name"
+  schemas
+- bench_taq: a table partitioned by month, which the catalog queries
+  must treat like WRDS's partitioned and foreign tables
+- bench_private: a schema the benchmark role has no access to
+- bench_lib_000 ...: many small schemas of empty tables, so catalog
+  queries such as load_library_list see a catalog of realistic size
+
+Each benchmark times a few rounds of a call, then records in the
+benchmark's extra_info the rows read, rows per second, the median time
+to the first row and the server, fetch and build times from the
+connection's instrumentation (see wrds.instrument), and the peak memory
+traced by tracemalloc in one more run. tracemalloc sees Python, NumPy
+and pandas allocations, but not pyarrow's own memory pool.
+
+The benchmarks connect as the role wrds_bench, which is granted USAGE
+and SELECT on every schema but bench_private, so permission checks run
+as they do for a WRDS subscriber.
+
+The database is taken from WRDS_BENCH_DSN, a SQLAlchemy URL such as
+postgresql://postgres@localhost:5432/postgres, whose user must be able
+to create schemas and roles. Without it, a throwaway server is started
+with pgserver. The size of the data is set with WRDS_BENCH_ROWS (rows of
+dsf, default 500,000) and WRDS_BENCH_SCHEMAS (filler schemas, default
+200).
+"""
+
+import os
+import statistics
+
+import pytest
+import sqlalchemy as sa
+
+import wrds
+
+BENCH_ROWS = int(os.environ.get("WRDS_BENCH_ROWS", "500000"))
+BENCH_SCHEMAS = int(os.environ.get("WRDS_BENCH_SCHEMAS", "200"))
+BENCH_ROLE = "wrds_bench"
+
+SCHEMA_DDL = """
+DROP SCHEMA IF EXISTS bench_crsp, bench_comp, bench_crspa, bench_taq,
+    bench_private CASCADE;
+CREATE SCHEMA bench_crsp;
+CREATE SCHEMA bench_comp;
+CREATE SCHEMA bench_crspa;
+CREATE SCHEMA bench_taq;
+CREATE SCHEMA bench_private;
+
+CREATE TABLE bench_crsp.dsf AS
+SELECT (10000 + i %% 30000)::double precision AS permno,
+       (7000 + i %% 25000)::double precision AS permco,
+       date '1990-01-01' + (i / 30000) AS date,
+       (array['1', '2', '3'])[1 + i %% 3]::varchar(1) AS hexcd,
+       (random() * 200)::numeric(11, 5) AS prc,
+       ((random() - 0.5) / 10)::numeric(10, 6) AS ret,
+       (random() * 1e6)::double precision AS vol,
+       (random() * 1e5)::double precision AS shrout,
+       (random() * 200)::numeric(11, 5) AS askhi,
+       (random() * 200)::numeric(11, 5) AS bidlo
+FROM generate_series(1, {rows}) AS i;
+CREATE INDEX ON bench_crsp.dsf (permno, date);
+CREATE INDEX ON bench_crsp.dsf (date);
+
+CREATE TABLE bench_crsp.stocknames AS
+SELECT (10000 + i)::double precision AS permno,
+       date '1990-01-01' + i %% 5000 AS namedt,
+       date '2024-12-31' AS nameenddt,
+       lpad(i::text, 8, '0') AS cusip,
+       'T' || i AS ticker,
+       'COMPANY ' || i AS comnam
+FROM generate_series(0, 29999) AS i;
+
+CREATE TABLE bench_comp.funda AS
+SELECT lpad((1000 + i %% 20000)::text, 6, '0') AS gvkey,
+       date '1970-12-31' + (i / 20000) * 365 AS datadate,
+       (1970 + i / 20000)::int AS fyear,
+       'INDL'::varchar(12) AS indfmt,
+       'C'::varchar(12) AS consol,
+       'STD'::varchar(12) AS datafmt,
+       'USD'::varchar(3) AS curcd,
+       {funda_items}
+FROM generate_series(1, {funda_rows}) AS i;
+
+CREATE VIEW bench_crspa.dsf AS SELECT * FROM bench_crsp.dsf;
+CREATE VIEW bench_crspa.stocknames AS SELECT * FROM bench_crsp.stocknames;
+
+CREATE TABLE bench_taq.ctm (
+    date date, time_m time, sym_root text, size int, price double precision
+) PARTITION BY RANGE (date);
+CREATE TABLE bench_taq.ctm_2020_01 PARTITION OF bench_taq.ctm
+    FOR VALUES FROM ('2020-01-01') TO ('2020-02-01');
+CREATE TABLE bench_taq.ctm_2020_02 PARTITION OF bench_taq.ctm
+    FOR VALUES FROM ('2020-02-01') TO ('2020-03-01');
+INSERT INTO bench_taq.ctm
+SELECT date '2020-01-01' + i %% 60, time '09:30' + i * interval '1 ms',
+       (array['A', 'AA', 'AAPL', 'IBM'])[1 + i %% 4], 100 * (1 + i %% 10),
+       random() * 200
+FROM generate_series(1, 100000) AS i;
+
+CREATE TABLE bench_private.secret AS SELECT 1 AS x;
+"""
+
+FILLER_DDL = """
+DO $$
+BEGIN
+    FOR s IN 0..{schemas} - 1 LOOP
+        EXECUTE format('DROP SCHEMA IF EXISTS bench_lib_%%s CASCADE', lpad(s::text, 3, '0'));
+        EXECUTE format('CREATE SCHEMA bench_lib_%%s', lpad(s::text, 3, '0'));
+        FOR t IN 0..9 LOOP
+            EXECUTE format(
+                'CREATE TABLE bench_lib_%%s.t%%s (id bigint, date date, '
+                'code varchar(8), value double precision, note text)',
+                lpad(s::text, 3, '0'), t
+            );
+        END LOOP;
+    END LOOP;
+END $$;
+"""
+
+GRANT_DDL = """
+DO $$
+BEGIN
+    CREATE ROLE {role};
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+DO $$
+DECLARE
+    s text;
+BEGIN
+    FOR s IN SELECT nspname FROM pg_namespace
+            WHERE nspname LIKE 'bench\\_%%' AND nspname <> 'bench_private' LOOP
+        EXECUTE format('GRANT USAGE ON SCHEMA %%I TO {role}', s);
+        EXECUTE format('GRANT SELECT ON ALL TABLES IN SCHEMA %%I TO {role}', s);
+    END LOOP;
+END $$;
+"""
+
+
+def _funda_items(n=150):
+    """Columns of financial items, like the hundreds in comp.funda."""
+    return ",\n       ".join(
+        f"(random() * 1e4)::double precision AS item{i:03d}" for i in range(n)
+    )
+
+
+@pytest.fixture(scope="session")
+def bench_dsn(tmp_path_factory):
+    dsn = os.environ.get("WRDS_BENCH_DSN")
+    if dsn:
+        yield dsn
+        return
+    pgserver = pytest.importorskip(
+        "pgserver", reason="set WRDS_BENCH_DSN or install pgserver"
+    )
+    server = pgserver.get_server(tmp_path_factory.mktemp("pgdata"), cleanup_mode="stop")
+    yield server.get_uri()
+    server.cleanup()
+
+
+@pytest.fixture(scope="session")
+def bench_schemas(bench_dsn):
+    """Build the synthetic schemas, once per session."""
+    engine = sa.create_engine(bench_dsn, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.exec_driver_sql(
+            SCHEMA_DDL.format(
+                rows=BENCH_ROWS,
+                funda_rows=max(BENCH_ROWS // 10, 1000),
+                funda_items=_funda_items(),
+            )
+        )
+        conn.exec_driver_sql(FILLER_DDL.format(schemas=BENCH_SCHEMAS))
+        conn.exec_driver_sql(GRANT_DDL.format(role=BENCH_ROLE))
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return bench_dsn
+
+
+def connect(dsn, **kwargs):
+    """A wrds.Connection to dsn, acting as the benchmark role."""
+    db = wrds.Connection(autoconnect=False, **kwargs)
+    db.engine = sa.create_engine(
+        dsn,
+        isolation_level="AUTOCOMMIT",
+        connect_args={"options": f"-c role={BENCH_ROLE}"},
+        **db._pool_args,
+    )
+    return db
+
+
+@pytest.fixture(scope="session")
+def db(bench_schemas):
+    db = connect(bench_schemas, instrument=True)
+    db.load_library_list()
+    yield db
+    db.close()
+
+
+@pytest.fixture(scope="session")
+def traced_db(bench_schemas):
+    db = connect(bench_schemas, instrument=True, trace_memory=True)
+    db.load_library_list()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def measure(benchmark, db, traced_db):
+    """
+    Benchmark func(db) and record its rows, phases and peak memory in
+    the benchmark's extra_info. Returns func's result.
+    """
+
+    def run(func, rounds=3):
+        db.query_log.clear()
+        result = benchmark.pedantic(
+            func, args=(db,), rounds=rounds, iterations=1, warmup_rounds=1
+        )
+        records = db.query_log.records()[1:]
+        info = benchmark.extra_info
+        if records:
+            info["rows"] = records[-1]["rows"]
+            for name in ("first_row_time", "server_time", "fetch_time", "build_time"):
+                values = [r[name] for r in records if r[name] is not None]
+                if values:
+                    info[name] = statistics.median(values)
+        if benchmark.stats is not None and info.get("rows"):
+            info["rows_per_second"] = info["rows"] / benchmark.stats.stats.median
+        traced_db.query_log.clear()
+        func(traced_db)
+        (record,) = traced_db.query_log.records()
+        info["peak_memory_mb"] = record["peak_memory"] / 2**20
+        return result
+
+    return run
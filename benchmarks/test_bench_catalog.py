@@ -0,0 +1,32 @@
+"""
+Benchmarks of the catalog queries of wrds.Connection, which run against
+a catalog of BENCH_SCHEMAS filler schemas besides the synthetic WRDS
+schemas. See conftest.py.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="catalog")
+def test_load_library_list(measure):
+    measure(lambda db: db.load_library_list(), rounds=10)
+
+
+@pytest.mark.benchmark(group="catalog")
+def test_list_tables(measure):
+    measure(lambda db: db.list_tables("bench_crsp"), rounds=10)
+
+
+@pytest.mark.benchmark(group="catalog")
+@pytest.mark.parametrize(
+    "library, table", [("bench_comp", "funda"), ("bench_crspa", "dsf")]
+)
+def test_describe_table(measure, library, table):
+    measure(lambda db: db.describe_table(library, table), rounds=10)
+
+
+@pytest.mark.benchmark(group="catalog")
+def test_get_row_counts(measure):
+    measure(lambda db: db.get_row_counts("bench_lib_000"), rounds=10)
@@ -0,0 +1,134 @@
+"""
+Benchmarks of the read paths of wrds.Connection: raw_sql with each engine
+and chunk size, streaming, compaction, get_table over tables, views and
+partitioned tables, and a small indexed query for round-trip latency.
+The frames group times the steps that follow reading, on chunks of dsf
+read once: assembling chunks into one frame, against growing it by
+concatenation, and compacting a frame to narrow dtypes.
+
+Usage::
+    python -m pytest benchmarks --no-cov --benchmark-autosave
+    python -m pytest benchmarks --no-cov --benchmark-compare
+
+See conftest.py for the database and the data.
+"""
+
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from wrds.sql import _assemble_chunks, compact_frame
+
+pytest.importorskip("pytest_benchmark")
+
+DSF = "SELECT * FROM bench_crsp.dsf"
+
+
+@pytest.mark.benchmark(group="raw_sql")
+@pytest.mark.parametrize("chunksize", [None, 50_000, 500_000])
+@pytest.mark.parametrize("engine", ["pandas", "copy"])
+def test_raw_sql(measure, engine, chunksize):
+    if engine == "copy":
+        pytest.importorskip("pyarrow")
+    measure(lambda db: db.raw_sql(DSF, engine=engine, chunksize=chunksize))
+
+
+@pytest.mark.benchmark(group="raw_sql")
+@pytest.mark.parametrize("prefetch", [0, 2])
+@pytest.mark.parametrize("chunksize", [50_000, 500_000])
+def test_raw_sql_stream(measure, chunksize, prefetch):
+    def consume(db):
+        chunks = db.raw_sql(
+            DSF, chunksize=chunksize, return_iter=True, prefetch=prefetch
+        )
+        return sum(len(chunk) for chunk in chunks)
+
+    measure(consume)
+
+
+@pytest.mark.benchmark(group="raw_sql")
+@pytest.mark.parametrize("engine", ["adbc", "copy"])
+def test_raw_sql_arrow(measure, engine):
+    pytest.importorskip("pyarrow")
+    if engine == "adbc":
+        pytest.importorskip("adbc_driver_postgresql")
+    measure(lambda db: db.raw_sql_arrow(DSF, engine=engine))
+
+
+@pytest.mark.benchmark(group="raw_sql")
+def test_raw_sql_compact(measure):
+    measure(lambda db: db.raw_sql(DSF, compact=True))
+
+
+@pytest.mark.benchmark(group="latency")
+def test_point_query(measure):
+    measure(
+        lambda db: db.raw_sql(
+            "SELECT * FROM bench_crsp.dsf WHERE permno = %(permno)s",
+            params={"permno": 14593},
+        ),
+        rounds=20,
+    )
+
+
+@pytest.mark.benchmark(group="get_table")
+@pytest.mark.parametrize(
+    "library, table, kwargs",
+    [
+        ("bench_crsp", "dsf", {"columns": ["permno", "date", "ret"]}),
+        ("bench_crsp", "dsf", {"filters": [("permno", "in", range(10000, 10100))]}),
+        ("bench_crspa", "dsf", {}),
+        ("bench_comp", "funda", {}),
+        ("bench_taq", "ctm", {}),
+    ],
+    ids=["dsf-columns", "dsf-filtered", "view", "funda-wide", "partitioned"],
+)
+def test_get_table(measure, library, table, kwargs):
+    measure(lambda db: db.get_table(library, table, **kwargs))
+
+
+@pytest.mark.benchmark(group="get_table")
+def test_get_table_parallel(measure):
+    measure(
+        lambda db: db.get_table("bench_crsp", "dsf", parallel=4, partition_by="permno")
+    )
+
+
+@pytest.fixture(scope="module")
+def dsf_chunks(db):
+    return list(db.raw_sql(DSF, chunksize=50_000, return_iter=True))
+
+
+def concat_in_loop(chunks):
+    """How raw_sql assembled chunks before _assemble_chunks."""
+    full_df = pd.DataFrame()
+    for chunk in chunks:
+        full_df = pd.concat([full_df, chunk])
+    return full_df
+
+
+@pytest.mark.benchmark(group="frames")
+@pytest.mark.parametrize("assemble", [concat_in_loop, _assemble_chunks])
+def test_assemble_chunks(benchmark, dsf_chunks, assemble):
+    df = benchmark(lambda: assemble(iter(dsf_chunks)))
+    tracemalloc.start()
+    try:
+        assemble(iter(dsf_chunks))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # Peak memory as a multiple of the final frame's size.
+    benchmark.extra_info["chunks"] = len(dsf_chunks)
+    benchmark.extra_info["peak_ratio"] = peak / df.memory_usage(index=True).sum()
+
+
+@pytest.mark.benchmark(group="frames")
+def test_compact_frame(benchmark, db, dsf_chunks):
+    df = _assemble_chunks(iter(dsf_chunks))
+    types = db._Connection__result_types(DSF)
+    compact = benchmark(compact_frame, df, types)
+    before = df.memory_usage(index=True, deep=True).sum()
+    after = compact.memory_usage(index=True, deep=True).sum()
+    benchmark.extra_info["memory_mb"] = before / 2**20
+    benchmark.extra_info["compact_memory_mb"] = after / 2**20
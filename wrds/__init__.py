@@ -30,4 +30,10 @@ __title__ = "wrds-py"
 __author__ = "Wharton Research Data Services"
 __copyright__ = f"2017 - {date.today().year} Wharton Research Data Services"
 
+from .async_sql import AsyncConnection as AsyncConnection
+from .cache import MetadataCache as MetadataCache
+from .cache import ResultCache as ResultCache
+from .cache import TableStore as TableStore
+from .instrument import Instrumentation as Instrumentation
+from .instrument import QueryLog as QueryLog
 from .sql import Connection as Connection
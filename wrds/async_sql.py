@@ -0,0 +1,305 @@
+import asyncio
+import os
+
+import pandas as pd
+import sqlalchemy as sa
+
+from wrds.sql import (
+    WRDS_CONNECT_ARGS,
+    WRDS_LIBRARY_QUERY,
+    WRDS_POOL_ARGS,
+    WRDS_POSTGRES_DB,
+    WRDS_POSTGRES_HOST,
+    WRDS_POSTGRES_PORT,
+    NotSubscribedError,
+    SchemaNotFoundError,
+    _build_frame,
+    _column_reader,
+)
+
+
+def _create_async_engine(*args, **kwargs):
+    """
+    Create an SQLAlchemy AsyncEngine. psycopg (version 3), which provides
+    the asyncio driver, is an optional dependency.
+    """
+    try:
+        import psycopg  # noqa: F401
+        from sqlalchemy.ext.asyncio import create_async_engine
+    except ImportError as err:
+        raise ImportError(
+            "AsyncConnection requires psycopg 3. Install it with: "
+            "pip install wrds[async]"
+        ) from err
+    return create_async_engine(*args, **kwargs)
+
+
+class AsyncConnection:
+    def __init__(self, verbose=False, **kwargs):
+        """
+        Set up an asyncio connection to the WRDS database.
+
+        Takes the same connection parameters as :class:`wrds.Connection`:
+            *wrds_hostname*: WRDS database hostname
+            *wrds_port*: database connection port number
+            *wrds_dbname*: WRDS database name
+            *wrds_username*: WRDS username
+            *wrds_password*: WRDS password
+            *wrds_pool_args*: dict of SQLAlchemy pool settings
+              overriding WRDS_POOL_ARGS
+
+        Queries run on an asyncio connection pool through psycopg 3, so
+        independent queries can be awaited concurrently, e.g. with
+        asyncio.gather, each on its own pooled connection. The results are
+        the same DataFrames :class:`wrds.Connection` returns. Rows are
+        fetched on the event loop, while the DataFrames are built in a
+        worker thread, so building a large result does not hold up other
+        tasks.
+
+        The connection is not made until :meth:`connect` is awaited, or the
+        instance is entered with ``async with``. It never prompts for a
+        password; store it in a .pgpass file, e.g. with
+        ``wrds.Connection().create_pgpass_file()``, or pass wrds_password.
+
+        psycopg 3 does not expand tuples, so ``IN %(values)s`` parameters
+        must be written as ``= ANY(%(values)s)`` with a list.
+
+        Usage::
+        >>> async with wrds.AsyncConnection() as db:
+        ...     names, ratings = await asyncio.gather(
+        ...         db.raw_sql('select * from crsp.stocknames where permno = 10107'),
+        ...         db.get_table('comp', 'adsprate', rows=10),
+        ...     )
+        """
+        self._verbose = verbose
+        self._username = kwargs.get("wrds_username", "")
+        self._password = kwargs.get("wrds_password", "")
+        self._hostname = kwargs.get(
+            "wrds_hostname", os.environ.get("PGHOST", WRDS_POSTGRES_HOST)
+        )
+        self._port = kwargs.get("wrds_port", WRDS_POSTGRES_PORT)
+        self._dbname = kwargs.get("wrds_dbname", WRDS_POSTGRES_DB)
+        self._connect_args = kwargs.get("wrds_connect_args", WRDS_CONNECT_ARGS)
+        self._pool_args = {**WRDS_POOL_ARGS, **kwargs.get("wrds_pool_args", {})}
+        self.engine = None
+        self.schema_perm = None
+        self._library_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self):
+        """Make a connection to the WRDS database."""
+        url = sa.engine.URL.create(
+            "postgresql+psycopg",
+            username=self._username or None,
+            password=self._password or None,
+            host=self._hostname,
+            port=self._port,
+            database=self._dbname,
+        )
+        if self._verbose:
+            print(url.render_as_string(hide_password=True))
+        self.engine = _create_async_engine(
+            url,
+            isolation_level="AUTOCOMMIT",
+            connect_args=self._connect_args,
+            **self._pool_args,
+        )
+        try:
+            # Connect once, so bad credentials fail here and not on a query.
+            async with self.engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+        except Exception:
+            await self.engine.dispose()
+            self.engine = None
+            raise
+
+    async def close(self):
+        """
+        Close the connection to the database.
+        """
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    async def __run_sync(self, func, *args, **kwargs):
+        """
+        Internal function running func(connection, *args, **kwargs) on a
+        pooled connection. func receives a synchronous SQLAlchemy connection
+        whose I/O is carried out by the event loop.
+        """
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(func, *args, **kwargs)
+
+    async def load_library_list(self):
+        """Load the list of Postgres schemata (c.f. SAS LIBNAMEs)
+        the user has permission to access."""
+        async with self.engine.connect() as conn:
+            result = await conn.exec_driver_sql(WRDS_LIBRARY_QUERY)
+            self.schema_perm = [row[0] for row in result.fetchall()]
+
+    async def __check_schema_perms(self, schema):
+        """
+        Check the permissions of the schema.
+        Raise permissions error if user does not have access.
+        Raise other error if the schema does not exist.
+
+        Else, return True
+        """
+        if self.schema_perm is None:
+            async with self._library_lock:
+                if self.schema_perm is None:
+                    await self.load_library_list()
+        if schema in self.schema_perm:
+            return True
+        schemas = await self.__run_sync(
+            lambda conn: sa.inspect(conn).get_schema_names()
+        )
+        if schema in schemas:
+            raise NotSubscribedError(
+                f"You do not have permission to access the {schema} library"
+            )
+        raise SchemaNotFoundError(f"The {schema} library is not found.")
+
+    async def list_libraries(self):
+        """
+        Return all the libraries (schemas) the user can access.
+
+        :rtype: list
+        """
+        if self.schema_perm is None:
+            async with self._library_lock:
+                if self.schema_perm is None:
+                    await self.load_library_list()
+        return self.schema_perm
+
+    async def list_tables(self, library):
+        """
+        Returns a list of all the views/tables/foreign tables within a schema.
+
+        :param library: Postgres schema name.
+
+        :rtype: list
+        """
+
+        def tables(conn):
+            insp = sa.inspect(conn)
+            return (
+                insp.get_view_names(schema=library)
+                + insp.get_table_names(schema=library)
+                + insp.get_foreign_table_names(schema=library)
+            )
+
+        if await self.__check_schema_perms(library):
+            return await self.__run_sync(tables)
+
+    async def get_row_count(self, library, table):
+        """
+        Uses the library and table to get the approximate row count for the table.
+
+        :param library: Postgres schema name.
+        :param table: Postgres table name.
+
+        :rtype: int
+        """
+        schema = sa.sql.quoted_name(library, True)
+        relation = sa.sql.quoted_name(table, True)
+        sqlstmt = f"EXPLAIN (FORMAT 'json') SELECT 1 FROM {schema}.{relation}"
+        async with self.engine.connect() as conn:
+            result = await conn.exec_driver_sql(sqlstmt)
+            return int(result.fetchone()[0][0]["Plan"]["Plan Rows"])
+
+    async def describe_table(self, library, table):
+        """
+        Takes the library and the table and describes all the columns
+          in that table.
+        Includes Column Name, Column Type, Nullable?, Comment
+
+        :param library: Postgres schema name.
+        :param table: Postgres table name.
+
+        :rtype: pandas.DataFrame
+        """
+        rows, columns = await asyncio.gather(
+            self.get_row_count(library, table),
+            self.__run_sync(
+                lambda conn: sa.inspect(conn).get_columns(table, schema=library)
+            ),
+        )
+        print(f"Approximately {rows} rows in {library}.{table}.")
+        table_info = pd.DataFrame.from_dict(columns)
+        return table_info[["name", "nullable", "type", "comment"]]
+
+    async def raw_sql(
+        self,
+        sql,
+        coerce_float=True,
+        date_cols=None,
+        index_col=None,
+        params=None,
+        dtype=None,
+        dtype_backend="numpy_nullable",
+    ):
+        """
+        Queries the database using a raw SQL string.
+
+        Takes the same arguments as :meth:`wrds.Connection.raw_sql`, except
+        that the whole result is always returned as one DataFrame.
+
+        :rtype: pandas.DataFrame
+        """
+
+        def fetch(conn):
+            result = conn.exec_driver_sql(sql, *([] if params is None else [params]))
+            if not result.returns_rows:
+                raise sa.exc.ResourceClosedError(
+                    "This result object does not return rows."
+                )
+            return result.cursor.description, result.fetchall()
+
+        description, rows = await self.__run_sync(fetch)
+        names = [col[0] for col in description]
+        readers = [
+            _column_reader(col[1], coerce_float, dtype_backend) for col in description
+        ]
+        return await asyncio.to_thread(
+            _build_frame, rows, names, readers, date_cols, index_col, dtype
+        )
+
+    async def get_table(
+        self,
+        library,
+        table,
+        rows=-1,
+        obs=None,
+        offset=0,
+        columns=None,
+        coerce_float=True,
+        index_col=None,
+        date_cols=None,
+    ):
+        """
+        Creates a data frame from an entire table in the database.
+
+        Takes the same arguments as :meth:`wrds.Connection.get_table`, except
+        that the whole result is always returned as one DataFrame.
+
+        :rtype: pandas.DataFrame
+        """
+        if obs is not None:
+            rows = obs
+        rowsstmt = "" if rows < 0 else f" LIMIT {rows}"
+        cols = "*" if columns is None else ",".join(columns)
+        if await self.__check_schema_perms(library):
+            sqlstmt = f"SELECT {cols} FROM {library}.{table} {rowsstmt} OFFSET {offset}"
+            return await self.raw_sql(
+                sqlstmt,
+                coerce_float=coerce_float,
+                index_col=index_col,
+                date_cols=date_cols,
+            )
@@ -0,0 +1,740 @@
+import abc
+import contextlib
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def default_cache_dir():
+    """
+    Return the directory where wrds keeps its local caches.
+
+    Uses $WRDS_CACHE_DIR if set, otherwise the platform's user cache
+    directory: %LOCALAPPDATA%\\wrds on Windows, $XDG_CACHE_HOME/wrds or
+    ~/.cache/wrds elsewhere.
+
+    :rtype: pathlib.Path
+    """
+    if os.environ.get("WRDS_CACHE_DIR"):
+        return Path(os.environ["WRDS_CACHE_DIR"])
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "wrds"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "wrds"
+
+
+class MetadataCache:
+    """
+    Local SQLite cache of WRDS catalog metadata: the libraries a user can
+    access, the tables in each library and the columns of each table.
+
+    Entries are keyed by (host, user, database), so several accounts or
+    servers can share one cache file, and expire after ttl seconds.
+    The file carries a format version; a cache written by an incompatible
+    version of this class is discarded rather than read.
+
+    Usage::
+    >>> db = wrds.Connection(metadata_cache=True)
+    >>> db = wrds.Connection(metadata_cache=wrds.MetadataCache(ttl=3600))
+    >>> db.invalidate_metadata_cache()
+    """
+
+    VERSION = 1
+
+    def __init__(self, path=None, ttl=86400):
+        """
+        :param path: (optional) path of the SQLite file, default:
+            metadata.sqlite3 in :func:`default_cache_dir`.
+        :param ttl: (optional) seconds an entry stays valid, default: 86400.
+            None keeps entries until they are invalidated.
+        """
+        self.path = Path(path) if path else default_cache_dir() / "metadata.sqlite3"
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as db:
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                db.execute("DROP TABLE IF EXISTS entries")
+                db.execute(f"PRAGMA user_version = {self.VERSION}")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    host TEXT, user TEXT, dbname TEXT,
+                    kind TEXT, name TEXT,
+                    value TEXT, stored_at REAL,
+                    PRIMARY KEY (host, user, dbname, kind, name)
+                )
+                """
+            )
+
+    def __connect(self):
+        # A connection per operation keeps the cache usable from any thread.
+        return contextlib.closing(
+            sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        )
+
+    def get(self, scope, kind, name=""):
+        """
+        Return a cached value, or None if it is missing or expired.
+
+        :param scope: tuple of (host, user, database)
+        :param kind: kind of metadata, e.g. "libraries", "tables", "columns"
+        :param name: (optional) library or table the value describes
+        """
+        with self.__connect() as db:
+            row = db.execute(
+                "SELECT value, stored_at FROM entries WHERE host = ? AND user = ? "
+                "AND dbname = ? AND kind = ? AND name = ?",
+                (*scope, kind, name),
+            ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            return None
+        return json.loads(value)
+
+    def set(self, scope, kind, name, value):
+        """
+        Store a JSON-serializable value.
+
+        :param scope: tuple of (host, user, database)
+        :param kind: kind of metadata, e.g. "libraries", "tables", "columns"
+        :param name: library or table the value describes
+        :param value: the metadata to cache
+        """
+        with self.__connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*scope, kind, name, json.dumps(value), time.time()),
+            )
+
+    def invalidate(self, scope=None, kind=None, name=None):
+        """
+        Remove cached entries. With no arguments, clear the whole cache.
+
+        :param scope: (optional) tuple of (host, user, database) to clear
+        :param kind: (optional) only clear this kind of metadata
+        :param name: (optional) only clear entries for this library or table
+        """
+        clauses, args = [], []
+        if scope is not None:
+            clauses.append("host = ? AND user = ? AND dbname = ?")
+            args.extend(scope)
+        if kind is not None:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if name is not None:
+            clauses.append("name = ?")
+            args.append(name)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self.__connect() as db:
+            db.execute("DELETE FROM entries" + where, args)
+
+
+# Tables a query reads from, as schema.table after FROM or JOIN.
+RELATION_RE = re.compile(
+    r"\b(?:from|join)\s+\"?([a-z_][\w$]*)\"?\s*\.\s*\"?([a-z_][\w$]*)\"?",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql):
+    """
+    Normalize a query for use in a cache key: collapse runs of whitespace
+    and drop a trailing semicolon. Case is kept, since it matters inside
+    string literals.
+    """
+    return " ".join(sql.split()).rstrip(";").rstrip()
+
+
+def _key_value(value):
+    """
+    Convert a query parameter or option into a JSON value for a cache key,
+    keeping apart values that psycopg2 or pandas treat differently, e.g. a
+    tuple, bound as a list of values, and a list, bound as an array.
+
+    NumPy scalars count as the Python values they hold, as the parameters
+    taken from DataFrames do once converted by ``wrds.sql._to_param``.
+    Values of other types raise TypeError, rather than risking two values
+    with the same repr() sharing a key.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic) and not isinstance(value, np.datetime64):
+        return _key_value(value.item())
+    if isinstance(value, list):
+        return [_key_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_key_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {
+            "dict": sorted(
+                ([_key_value(k), _key_value(v)] for k, v in value.items()),
+                key=json.dumps,
+            )
+        }
+    if isinstance(value, (np.dtype, pd.api.extensions.ExtensionDtype)):
+        return {"dtype": _dtype_name(value)}
+    if isinstance(value, type):
+        return {"type": f"{value.__module__}.{value.__qualname__}"}
+    if isinstance(
+        value,
+        (
+            datetime.date,
+            datetime.time,
+            datetime.timedelta,
+            decimal.Decimal,
+            uuid.UUID,
+            np.datetime64,
+            bytes,
+        ),
+    ):
+        return {type(value).__name__: str(value)}
+    raise TypeError(
+        f"Cannot cache a query with a parameter or option of type "
+        f"{type(value).__name__}: {value!r}"
+    )
+
+
+def _dtype_name(dtype):
+    """Name of a dtype that pandas.Series.astype turns back into it."""
+    if isinstance(dtype, pd.StringDtype):
+        # str() of either storage is just "string".
+        return f"string[{dtype.storage}]"
+    return str(dtype)
+
+
+class _FileCache(abc.ABC):
+    """
+    Base of the caches keeping each entry in a file of its own, indexed by
+    a SQLite database, index.sqlite3, in the same directory.
+
+    Subclasses name the index table holding each entry's key, bytes,
+    stored_at and used_at in TABLE, any further tables keyed by key in
+    TABLES, their CREATE statements in SCHEMA and the files' suffix in
+    SUFFIX. This class expires entries after ttl seconds, evicts the least
+    recently used ones past max_bytes, and removes entries with their
+    files.
+    """
+
+    VERSION = None
+    TABLE = None
+    TABLES = ()
+    SCHEMA = ()
+    SUFFIX = None
+
+    def __init__(self, path, max_bytes, ttl):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as err:
+            raise ImportError(
+                f"{type(self).__name__} requires pyarrow. "
+                "Install it with: pip install wrds[arrow]"
+            ) from err
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                for table in (self.TABLE, *self.TABLES):
+                    db.execute(f"DROP TABLE IF EXISTS {table}")
+                db.execute(f"PRAGMA user_version = {self.VERSION}")
+            for statement in self.SCHEMA:
+                db.execute(statement)
+
+    def _connect(self):
+        # A connection per operation keeps the cache usable from any thread.
+        return contextlib.closing(
+            sqlite3.connect(
+                self.path / "index.sqlite3", timeout=30, isolation_level=None
+            )
+        )
+
+    def _file(self, key):
+        return self.path / f"{key}{self.SUFFIX}"
+
+    def _lookup(self, db, key, columns=()):
+        """
+        Return the given index columns of an entry, or None if it is
+        missing or expired, removing it in the latter case.
+        """
+        row = db.execute(
+            f"SELECT {', '.join(('stored_at', *columns))} "
+            f"FROM {self.TABLE} WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[0] > self.ttl:
+            self._remove(db, [key])
+            return None
+        return row[1:]
+
+    def _read(self, db, key, read):
+        """
+        Return read(path) of an entry's file and mark the entry used, or
+        None if the file is gone.
+        """
+        try:
+            value = read(self._file(key))
+        except FileNotFoundError:
+            self._remove(db, [key])
+            return None
+        db.execute(
+            f"UPDATE {self.TABLE} SET used_at = ? WHERE key = ?", (time.time(), key)
+        )
+        return value
+
+    def _write(self, key, write):
+        """
+        Call write(path) with a temporary path and move the file written
+        into the entry's place, so concurrent readers never see a partial
+        file. Return the entry's path, or None if write failed because the
+        frame cannot be represented.
+        """
+        path = self._file(key)
+        tmp_path = path.with_name(
+            f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            write(tmp_path)
+        except (ValueError, TypeError, NotImplementedError):
+            # pyarrow's errors for unsupported frames derive from these.
+            tmp_path.unlink(missing_ok=True)
+            return None
+        os.replace(tmp_path, path)
+        return path
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """
+        Context manager yielding the index in a write transaction, which
+        evicts the least recently used entries past max_bytes on commit.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                self._evict(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _evict(self, db):
+        total = db.execute(
+            f"SELECT COALESCE(SUM(bytes), 0) FROM {self.TABLE}"
+        ).fetchone()[0]
+        if self.max_bytes is None or total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in db.execute(
+            f"SELECT key, bytes FROM {self.TABLE} ORDER BY used_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+        self._remove(db, evicted)
+
+    def _remove(self, db, keys):
+        for key in keys:
+            for table in (self.TABLE, *self.TABLES):
+                db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+            self._file(key).unlink(missing_ok=True)
+
+    @abc.abstractmethod
+    def _keys(self, db, library, table):
+        """The keys of the entries :meth:`invalidate` removes."""
+
+    def invalidate(self, library=None, table=None):
+        """
+        Remove entries. With no arguments, clear the whole cache.
+
+        :param library: (optional) only remove entries that read this library
+        :param table: (optional) with library, only remove entries that
+            read this table
+        """
+        with self._transaction() as db:
+            if library is None:
+                keys = [row[0] for row in db.execute(f"SELECT key FROM {self.TABLE}")]
+            else:
+                keys = self._keys(db, library.lower(), table and table.lower())
+            self._remove(db, keys)
+
+
+class ResultCache(_FileCache):
+    """
+    Local cache of query results, stored as Parquet files.
+
+    Each result is keyed by a SHA-256 of the normalized SQL, its parameters,
+    the options that shape the DataFrame (dtypes, date and index columns)
+    and the (host, user, database) it was read from, so different queries or
+    accounts never share an entry. The tables a query reads are recorded
+    from its FROM and JOIN clauses, so entries can be invalidated per
+    library or table when the underlying data changes.
+
+    Entries expire after ttl seconds. Once the files exceed max_bytes, the
+    least recently used entries are evicted. Requires pyarrow.
+
+    Usage::
+    >>> db = wrds.Connection(result_cache=True)
+    >>> db = wrds.Connection(result_cache=wrds.ResultCache(max_bytes=10 * 2**30))
+    >>> db.raw_sql('select * from crsp.msi')  # read from WRDS
+    >>> db.raw_sql('select * from crsp.msi')  # read from local disk
+    >>> db.invalidate_result_cache('crsp', 'msi')
+    """
+
+    VERSION = 2
+    TABLE = "results"
+    TABLES = ("relations",)
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            index_names TEXT, dtypes TEXT,
+            bytes INTEGER, stored_at REAL, used_at REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS relations (
+            key TEXT, schema TEXT, tbl TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS relations_key ON relations (key)",
+    )
+    SUFFIX = ".parquet"
+
+    def __init__(self, path=None, max_bytes=2 * 2**30, ttl=86400):
+        """
+        :param path: (optional) directory holding the cached results,
+            default: results in :func:`default_cache_dir`.
+        :param max_bytes: (optional) size the cached files are kept under,
+            default: 2 GiB.
+        :param ttl: (optional) seconds an entry stays valid, default: 86400.
+            None keeps entries until they are evicted or invalidated.
+        """
+        super().__init__(path or default_cache_dir() / "results", max_bytes, ttl)
+
+    @staticmethod
+    def key(scope, sql, params=None, options=None):
+        """
+        Return the cache key of a query.
+
+        :param scope: tuple of (host, user, database)
+        :param sql: SQL code in string object
+        :param params: (optional) parameters to the SQL query
+        :param options: (optional) dict of options that change the result,
+            e.g. dtype or index_col
+
+        Raises TypeError for parameters or options of types a key cannot
+        tell apart, such as arrays.
+        """
+        payload = json.dumps(
+            [list(scope), normalize_sql(sql), _key_value(params), _key_value(options)]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, dtype_backend=None):
+        """
+        Return a cached DataFrame, or None if it is missing or expired.
+
+        :param key: cache key from :meth:`key`
+        :param dtype_backend: (optional) "pyarrow" if the result was stored
+            with pyarrow-backed dtypes, which Parquet metadata alone does
+            not restore.
+        """
+        kwargs = {}
+        if dtype_backend == "pyarrow":
+            kwargs["dtype_backend"] = "pyarrow"
+        with self._connect() as db:
+            row = self._lookup(db, key, ("index_names", "dtypes"))
+            if row is None:
+                return None
+            df = self._read(db, key, lambda path: pd.read_parquet(path, **kwargs))
+        if df is None:
+            return None
+        index_names, dtypes = row
+        for i, dtype in enumerate(json.loads(dtypes)):
+            # Parquet has no second resolution timestamps, and pandas
+            # metadata does not say how strings were stored.
+            if _dtype_name(df.dtypes.iloc[i]) != dtype:
+                df.isetitem(i, df.iloc[:, i].astype(dtype))
+        if index_names is not None:
+            index_names = json.loads(index_names)
+            df = df.set_index(list(df.columns[: len(index_names)]))
+            df.index.names = index_names
+        return df
+
+    def set(self, key, df, sql=""):
+        """
+        Store a DataFrame, then evict the least recently used entries until
+        the cache is back under max_bytes. Frames Parquet cannot represent,
+        e.g. with duplicate column names, are not cached.
+
+        :param key: cache key from :meth:`key`
+        :param df: the query result
+        :param sql: (optional) the query, whose tables are recorded for
+            :meth:`invalidate`
+        """
+        index_names = None
+        if not isinstance(df.index, pd.RangeIndex):
+            # Parquet keeps the dtypes of columns but not of the index, so
+            # store the index as leading columns and restore it on read.
+            index_names = list(df.index.names)
+            df = df.reset_index(names=[f"__index_{i}" for i in range(df.index.nlevels)])
+        dtypes = [_dtype_name(dtype) for dtype in df.dtypes]
+        path = self._write(key, df.to_parquet)
+        if path is None:
+            return
+        now = time.time()
+        relations = {(s.lower(), t.lower()) for s, t in RELATION_RE.findall(sql)}
+        with self._transaction() as db:
+            db.execute("DELETE FROM relations WHERE key = ?", (key,))
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    None if index_names is None else json.dumps(index_names),
+                    json.dumps(dtypes),
+                    path.stat().st_size,
+                    now,
+                    now,
+                ),
+            )
+            db.executemany(
+                "INSERT INTO relations VALUES (?, ?, ?)",
+                [(key, schema, table) for schema, table in relations],
+            )
+
+    def _keys(self, db, library, table):
+        sql = "SELECT DISTINCT key FROM relations WHERE schema = ?"
+        args = [library]
+        if table is not None:
+            sql += " AND tbl = ?"
+            args.append(table)
+        return [row[0] for row in db.execute(sql, args)]
+
+
+class TableStore(_FileCache):
+    """
+    Local store of tables read with get_table, kept as uncompressed Arrow
+    IPC (Feather v2) files and reopened memory-mapped.
+
+    A memory-mapped file is paged in from the operating system's page
+    cache rather than copied into each process, so several processes on
+    one machine reading the same stored table share a single copy of it
+    in memory, as long as it is read with dtype_backend="pyarrow". Other
+    dtypes are converted into private memory, but still skip the network.
+
+    Entries are keyed by (host, user, database), library, table and the
+    query get_table compiles from the columns, filters, where, order_by,
+    rows and offset, with its parameters and the options that shape the
+    DataFrame. Expiry, eviction and invalidation work as in
+    :class:`ResultCache`; processes that have an evicted file mapped keep
+    their mapping. Requires pyarrow.
+
+    Usage::
+    >>> db = wrds.Connection(table_store=True)
+    >>> dsf = db.get_table('crsp', 'dsf', columns=['permno', 'date', 'ret'],
+    ...                    dtype_backend='pyarrow')  # read from WRDS
+    >>> dsf = db.get_table('crsp', 'dsf', columns=['permno', 'date', 'ret'],
+    ...                    dtype_backend='pyarrow')  # mapped from local disk
+    >>> db.table_store.entries()
+    >>> db.invalidate_table_store('crsp', 'dsf')
+    """
+
+    VERSION = 1
+    TABLE = "tables"
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS tables (
+            key TEXT PRIMARY KEY,
+            library TEXT, tbl TEXT, sql TEXT, dtypes TEXT,
+            rows INTEGER, bytes INTEGER, stored_at REAL, used_at REAL
+        )
+        """,
+    )
+    SUFFIX = ".arrow"
+
+    def __init__(self, path=None, max_bytes=20 * 2**30, ttl=None):
+        """
+        :param path: (optional) directory holding the stored tables,
+            default: tables in :func:`default_cache_dir`.
+        :param max_bytes: (optional) size the stored files are kept under,
+            default: 20 GiB.
+        :param ttl: (optional) seconds an entry stays valid, default: None,
+            which keeps entries until they are evicted or invalidated.
+        """
+        super().__init__(path or default_cache_dir() / "tables", max_bytes, ttl)
+
+    @staticmethod
+    def key(scope, library, table, sql, params=None, options=None):
+        """
+        Return the store key of a get_table call.
+
+        :param scope: tuple of (host, user, database)
+        :param library: Postgres schema name
+        :param table: Postgres table name
+        :param sql: the query get_table compiled, which holds its columns
+            and filters
+        :param params: (optional) parameters to the query
+        :param options: (optional) dict of options that change the result,
+            e.g. index_col or date_cols
+        """
+        return ResultCache.key(
+            scope, sql, params, [library.lower(), table.lower(), options]
+        )
+
+    def open(self, key):
+        """
+        Return a stored table as a memory-mapped pyarrow.Table, or None if
+        it is missing or expired.
+
+        :param key: store key from :meth:`key`
+        """
+        import pyarrow as pa
+
+        def read(path):
+            with pa.memory_map(str(path)) as source:
+                return pa.ipc.open_file(source).read_all()
+
+        with self._connect() as db:
+            if self._lookup(db, key) is None:
+                return None
+            return self._read(db, key, read)
+
+    def get(self, key, dtype_backend=None):
+        """
+        Return a stored table as a DataFrame, or None if it is missing or
+        expired.
+
+        :param key: store key from :meth:`key`
+        :param dtype_backend: (optional) "pyarrow" to return a frame of
+            pd.ArrowDtype columns backed by the memory-mapped file itself.
+            Otherwise the columns get the dtypes they were stored with.
+        """
+        table = self.open(key)
+        if table is None:
+            return None
+        metadata = table.schema.metadata or {}
+        if dtype_backend == "pyarrow":
+            df = table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            df = table.to_pandas()
+            dtypes = json.loads(metadata.get(b"wrds_dtypes", b"[]"))
+            for i, dtype in enumerate(dtypes):
+                # Arrow metadata does not say how strings were stored.
+                if _dtype_name(df.dtypes.iloc[i]) != dtype:
+                    df.isetitem(i, df.iloc[:, i].astype(dtype))
+        index_names = json.loads(metadata.get(b"wrds_index", b"null"))
+        if index_names is not None:
+            df = df.set_index(list(df.columns[: len(index_names)]))
+            df.index.names = index_names
+        return df
+
+    def set(self, key, df, library, table, sql=""):
+        """
+        Store a DataFrame, then evict the least recently used entries until
+        the store is back under max_bytes. Frames Arrow cannot represent,
+        e.g. with duplicate column names, are not stored.
+
+        :param key: store key from :meth:`key`
+        :param df: the get_table result
+        :param library: Postgres schema name, for :meth:`invalidate`
+        :param table: Postgres table name, for :meth:`invalidate`
+        :param sql: (optional) the query, listed by :meth:`entries`
+        """
+        import pyarrow as pa
+
+        index_names = None
+        if not isinstance(df.index, pd.RangeIndex):
+            # Arrow loses the nullable dtypes of an index, so store it as
+            # leading columns and restore it on read, as ResultCache does.
+            index_names = list(df.index.names)
+            df = df.reset_index(names=[f"__index_{i}" for i in range(df.index.nlevels)])
+        dtypes = [_dtype_name(dtype) for dtype in df.dtypes]
+
+        def write(path):
+            arrow = pa.Table.from_pandas(df, preserve_index=False)
+            arrow = arrow.replace_schema_metadata(
+                {
+                    **arrow.schema.metadata,
+                    b"wrds_dtypes": json.dumps(dtypes),
+                    b"wrds_index": json.dumps(index_names),
+                }
+            )
+            sink = pa.OSFile(str(path), "wb")
+            with sink, pa.ipc.new_file(sink, arrow.schema) as writer:
+                writer.write_table(arrow)
+
+        path = self._write(key, write)
+        if path is None:
+            return
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    library.lower(),
+                    table.lower(),
+                    sql,
+                    json.dumps(dtypes),
+                    len(df),
+                    path.stat().st_size,
+                    now,
+                    now,
+                ),
+            )
+
+    def entries(self):
+        """
+        List the stored tables, most recently used first.
+
+        :rtype: pandas.DataFrame with columns library, table, sql, rows,
+            bytes, stored_at and used_at
+        """
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT library, tbl, sql, rows, bytes, stored_at, used_at "
+                "FROM tables ORDER BY used_at DESC"
+            ).fetchall()
+        df = pd.DataFrame(
+            rows,
+            columns=[
+                "library",
+                "table",
+                "sql",
+                "rows",
+                "bytes",
+                "stored_at",
+                "used_at",
+            ],
+        )
+        for col in ("stored_at", "used_at"):
+            df[col] = pd.to_datetime(df[col], unit="s")
+        return df
+
+    def _keys(self, db, library, table):
+        sql = "SELECT key FROM tables WHERE library = ?"
+        args = [library]
+        if table is not None:
+            sql += " AND tbl = ?"
+            args.append(table)
+        return [row[0] for row in db.execute(sql, args)]
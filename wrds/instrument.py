@@ -0,0 +1,338 @@
+import collections
+import contextlib
+import functools
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("wrds")
+
+_local = threading.local()
+
+
+def current_stats():
+    """
+    The QueryStats of the instrumented call running in this thread, or
+    None, for the readers below a Connection method to add their timings
+    to.
+    """
+    return getattr(_local, "stats", None)
+
+
+@contextlib.contextmanager
+def timed(stats, name):
+    """
+    Context manager adding the seconds its block takes to the name field
+    of stats, e.g. "fetch_time". Does nothing if stats is None.
+    """
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(name, time.perf_counter() - start)
+
+
+class QueryStats:
+    """
+    Measurements of one :class:`wrds.Connection` call, filled in while it
+    runs and passed to the instrumentation sinks as a dict once it ends.
+
+    *method*: the Connection method called, e.g. "raw_sql" or "get_table"
+    *sql*: the (first) query it ran, if any
+    *started_at*: Unix time the call started
+    *total_time*: seconds until the call returned, or, for generators
+      such as raw_sql's return_iter, until the generator was exhausted
+      or closed. Arrow record batch readers are recorded when returned
+    *server_time*: seconds spent executing queries. Without a server-side
+      cursor this includes transferring the whole result, which libpq
+      reads before returning; with one, the server's work continues
+      during fetch_time
+    *first_row_time*: seconds from the start of the call until the first
+      rows arrived
+    *fetch_time*: seconds spent fetching and decoding rows, in psycopg2
+      or the COPY engine's CSV reader
+    *build_time*: seconds spent building DataFrames from the fetched rows
+    *rows*: rows returned, or the length of the returned list
+    *bytes*: approximate in-memory size of the returned DataFrames or
+      Arrow tables
+    *chunks*: DataFrames built
+    *cached*: whether the result came from the result cache
+    *peak_memory*: peak bytes allocated by Python during the call, when
+      traced; see :class:`Instrumentation`
+    *max_rss*: the process's peak resident set size in bytes at the end
+      of the call, where the platform reports it
+    *error*: repr of the exception the call raised, if any
+
+    The worker threads of a parallel read add to the same record, so
+    counters and timings are updated under a lock.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        self.sql = None
+        self.started_at = time.time()
+        self.total_time = None
+        self.server_time = 0.0
+        self.first_row_time = None
+        self.fetch_time = 0.0
+        self.build_time = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.chunks = 0
+        self.cached = False
+        self.peak_memory = None
+        self.max_rss = None
+        self.error = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        """Seconds since the call started."""
+        return time.perf_counter() - self._start
+
+    def add(self, name, value):
+        """Add value to the counter or timing called name, e.g. "chunks"."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def first_row(self):
+        """Record that the first rows arrived, if they had not before."""
+        with self._lock:
+            if self.first_row_time is None:
+                self.first_row_time = self.elapsed()
+
+    def add_result(self, result):
+        """Count the rows and bytes of a returned value or chunk."""
+        rows = size = 0
+        if isinstance(result, pd.DataFrame):
+            rows = len(result)
+            size = int(result.memory_usage(index=True).sum())
+        elif isinstance(result, pd.Series):
+            rows = len(result)
+            size = int(result.memory_usage(index=True))
+        elif isinstance(result, (list, dict)):
+            rows = len(result)
+        elif hasattr(result, "num_rows") and hasattr(result, "nbytes"):
+            # pyarrow Tables and RecordBatches
+            rows = result.num_rows
+            size = result.nbytes
+        with self._lock:
+            self.rows += rows
+            self.bytes += size
+
+    def to_dict(self):
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if not name.startswith("_")
+        }
+
+
+class QueryLog:
+    """
+    In-memory ring buffer keeping the records of the last maxlen calls.
+
+    Usage::
+    >>> db = wrds.Connection(instrument=True)
+    >>> db.raw_sql('select * from crsp.msi')
+    >>> db.query_log.to_frame()[['method', 'rows', 'total_time']]
+    """
+
+    def __init__(self, maxlen=1000):
+        self._records = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        """
+        The kept records, oldest first.
+
+        :rtype: list of dict
+        """
+        with self._lock:
+            return list(self._records)
+
+    def to_frame(self):
+        """
+        The kept records as a DataFrame, one row per call.
+
+        :rtype: pandas.DataFrame
+        """
+        return pd.DataFrame(self.records())
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+def _log_record(log, level, record):
+    log.log(
+        level,
+        "%s: %s rows, %s bytes in %.3fs (server %.3fs, fetch %.3fs, build %.3fs)",
+        record["method"],
+        record["rows"],
+        record["bytes"],
+        record["total_time"],
+        record["server_time"],
+        record["fetch_time"],
+        record["build_time"],
+        extra={"wrds_query": record},
+    )
+
+
+class Instrumentation:
+    """
+    Records a :class:`QueryStats` for each call of an instrumented
+    Connection method and hands it, as a dict, to each sink.
+
+    A sink is a callable taking the record, a :class:`logging.Logger`,
+    which logs a one-line summary with the record as the ``wrds_query``
+    attribute of the log record, or a :class:`QueryLog`. Exceptions raised
+    by a sink are logged and do not fail the call.
+
+    A call made by another instrumented method, e.g. the raw_sql behind
+    get_table, adds to the record of the outer call.
+
+    :param sinks: (optional) callable, Logger or list of them
+    :param trace_memory: (optional) boolean, default: False
+        Measure each call's peak Python allocations with tracemalloc,
+        which slows Python down considerably while enabled. Tracing is
+        started for the call, and stopped again after it unless it was
+        already on. Calls running concurrently in other threads count
+        towards the peak.
+    :param log_level: (optional) integer, default: logging.INFO
+        Level of the records logged to Logger sinks.
+    """
+
+    def __init__(self, sinks=(), trace_memory=False, log_level=logging.INFO):
+        if callable(sinks) or isinstance(sinks, logging.Logger):
+            sinks = [sinks]
+        self.sinks = []
+        for sink in sinks:
+            if isinstance(sink, logging.Logger):
+                sink = functools.partial(_log_record, sink, log_level)
+            self.sinks.append(sink)
+        self.trace_memory = trace_memory
+        self._traced_calls = 0
+        self._stop_tracing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current():
+        """The QueryStats of the call running in this thread, or None."""
+        return current_stats()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def activate(stats):
+        """
+        Make stats the current record of this thread for a while, e.g. in
+        the worker threads of a parallel read.
+        """
+        outer = current_stats()
+        _local.stats = stats
+        try:
+            yield stats
+        finally:
+            _local.stats = outer
+
+    def start(self, method):
+        stats = QueryStats(method)
+        if self.trace_memory:
+            with self._lock:
+                if not self._traced_calls and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._stop_tracing = True
+                self._traced_calls += 1
+                tracemalloc.reset_peak()
+        return stats
+
+    def finish(self, stats, error=None):
+        stats.total_time = stats.elapsed()
+        if error is not None:
+            stats.error = repr(error)
+        if self.trace_memory:
+            with self._lock:
+                if tracemalloc.is_tracing():
+                    stats.peak_memory = tracemalloc.get_traced_memory()[1]
+                self._traced_calls -= 1
+                if not self._traced_calls and self._stop_tracing:
+                    tracemalloc.stop()
+                    self._stop_tracing = False
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux reports kilobytes, macOS bytes.
+            stats.max_rss = max_rss if sys.platform == "darwin" else max_rss * 1024
+        record = stats.to_dict()
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception:
+                logger.exception("wrds instrumentation sink %r failed", sink)
+
+    def iterate(self, iterator, stats):
+        """
+        Generator passing on the chunks of iterator, recording each, and
+        finishing stats once it is exhausted or closed.
+        """
+        error = None
+        try:
+            while True:
+                with self.activate(stats):
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                stats.add_result(chunk)
+                yield chunk
+        except BaseException as err:
+            error = None if isinstance(err, GeneratorExit) else err
+            raise
+        finally:
+            self.finish(stats, error)
+
+
+def instrumented(method):
+    """
+    Decorator recording the calls of a Connection method with the
+    connection's instrumentation, if it has any.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self._instrumentation
+        if instrumentation is None or instrumentation.current() is not None:
+            return method(self, *args, **kwargs)
+        stats = instrumentation.start(method.__name__)
+        try:
+            with instrumentation.activate(stats):
+                result = method(self, *args, **kwargs)
+        except BaseException as err:
+            instrumentation.finish(stats, err)
+            raise
+        if isinstance(result, types.GeneratorType):
+            return instrumentation.iterate(result, stats)
+        stats.add_result(result)
+        instrumentation.finish(stats)
+        return result
+
+    return wrapper
@@ -1,14 +1,42 @@
+import contextlib
+import csv
+import datetime
+import decimal
 import getpass
+import io
+import json
+import logging
 import os
+import queue
+import random
+import re
+import shutil
 import stat
 import sys
+import threading
+import time
 import urllib.parse
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import psycopg2
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
 from wrds._version import __version_tuple__ as wrds_version
+from wrds.cache import MetadataCache, ResultCache, TableStore
+from wrds.instrument import (
+    Instrumentation,
+    QueryLog,
+    current_stats,
+    instrumented,
+    timed,
+)
+
+logger = logging.getLogger("wrds")
 
 appname = "{0} python {1}.{2}.{3}/wrds".format(
     sys.platform, wrds_version[0], wrds_version[1], wrds_version[2]
@@ -19,12 +47,997 @@ WRDS_POSTGRES_HOST = "wrds-pgdata.wharton.upenn.edu"
 WRDS_POSTGRES_PORT = 9737
 WRDS_POSTGRES_DB = "wrds"
 WRDS_CONNECT_ARGS = {"sslmode": "require", "application_name": appname}
+WRDS_POOL_ARGS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
+# Times a connection attempt that fails, or a read query that loses its
+# connection, is retried. The first retry waits about WRDS_RETRY_DELAY
+# seconds, and each further one twice as long, up to WRDS_RETRY_MAX_DELAY.
+WRDS_RETRIES = 3
+WRDS_RETRY_DELAY = 1.0
+WRDS_RETRY_MAX_DELAY = 30.0
+
+# SQLSTATE classes and codes of the server going away: connection
+# exceptions, admin and crash shutdown, and "cannot connect now" while
+# it starts up.
+RETRY_SQLSTATES = ("08", "57P01", "57P02", "57P03")
+
+# Connection failures retrying cannot fix.
+PERMANENT_CONNECT_ERRORS = (
+    "password authentication failed",
+    "no password supplied",
+    "no pg_hba.conf entry",
+    "does not exist",
+    "could not translate host name",
+)
+
+# Sequential scans of relations with at least this many rows are reported
+# by Connection.explain.
+EXPLAIN_LARGE_RELATION_ROWS = 1_000_000
+
+# Schemas (libraries) the user can read: those holding tables the user has
+# USAGE on, plus schemas of views over such tables.
+WRDS_LIBRARY_QUERY = """
+WITH pgobjs AS (
+    -- objects we care about - tables, views, foreign tables, partitioned tables
+    SELECT oid, relnamespace, relkind
+    FROM pg_class
+    WHERE relkind = ANY (ARRAY['r'::"char", 'v'::"char", 'f'::"char", 'p'::"char"])
+),
+schemas AS (
+    -- schemas we have usage on that represent products
+    SELECT nspname AS schemaname,
+        pg_namespace.oid,
+        array_agg(DISTINCT relkind) AS relkind_a
+    FROM pg_namespace
+    JOIN pgobjs ON pg_namespace.oid = relnamespace
+    WHERE nspname !~ '(^pg_)|(_old$)|(_new$)|(information_schema)'
+        AND has_schema_privilege(nspname, 'USAGE') = TRUE
+    GROUP BY nspname, pg_namespace.oid
+)
+SELECT schemaname
+FROM schemas
+WHERE relkind_a != ARRAY['v'::"char"] -- any schema except only views
+UNION
+-- schemas w/ views (aka "friendly names") that reference accessable product tables
+SELECT nv.schemaname
+FROM schemas nv
+JOIN pgobjs v ON nv.oid = v.relnamespace AND v.relkind = 'v'::"char"
+JOIN pg_depend dv ON v.oid = dv.refobjid AND dv.refclassid = 'pg_class'::regclass::oid
+    AND dv.classid = 'pg_rewrite'::regclass::oid AND dv.deptype = 'i'::"char"
+JOIN pg_depend dt ON dv.objid = dt.objid AND dv.refobjid <> dt.refobjid
+    AND dt.classid = 'pg_rewrite'::regclass::oid
+    AND dt.refclassid = 'pg_class'::regclass::oid
+JOIN pgobjs t ON dt.refobjid = t.oid
+    AND (t.relkind = ANY (ARRAY['r'::"char", 'v'::"char", 'f'::"char", 'p'::"char"]))
+JOIN schemas nt ON t.relnamespace = nt.oid
+GROUP BY nv.schemaname
+ORDER BY 1;
+"""
+
+# Result column types by PostgreSQL type OID, as Arrow type names. Both
+# engines read a column of these types the same way whatever values each
+# chunk holds. Other types are read as text by the COPY engine and left
+# to pandas' inference by the pandas engine.
+RESULT_TYPES = {
+    16: "bool",  # boolean
+    20: "int64",  # bigint
+    21: "int16",  # smallint
+    23: "int32",  # integer
+    700: "float32",  # real
+    701: "float64",  # double precision
+    1700: "float64",  # numeric
+    18: "string",  # "char"
+    19: "string",  # name
+    25: "string",  # text
+    1042: "string",  # character
+    1043: "string",  # character varying
+    1082: "date32",  # date
+    1114: "timestamp",  # timestamp without time zone
+    1184: "timestamptz",  # timestamp with time zone
+}
+# The numpy_nullable dtypes of RESULT_TYPES; strings use _string_dtype().
+NULLABLE_DTYPES = {
+    "bool": "boolean",
+    "int64": "Int64",
+    "int16": "Int16",
+    "int32": "Int32",
+    "float32": "Float32",
+    "float64": "Float64",
+    "date32": "datetime64[s]",
+    "timestamp": "datetime64[us]",
+    "timestamptz": "datetime64[us, UTC]",
+}
+# Comparison operators accepted in get_table filters, by column method.
+FILTER_OPERATORS = {
+    "=": "__eq__",
+    "==": "__eq__",
+    "!=": "__ne__",
+    "<>": "__ne__",
+    "<": "__lt__",
+    "<=": "__le__",
+    ">": "__gt__",
+    ">=": "__ge__",
+    "like": "like",
+    "not like": "not_like",
+    "ilike": "ilike",
+    "not ilike": "not_ilike",
+}
+EXPORT_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".csv": "csv",
+}
+# How compact_frame narrows a column, by PostgreSQL type OID.
+COMPACT_TYPES = {
+    20: "int",  # bigint
+    21: "int",  # smallint
+    23: "int",  # integer
+    700: "float32",  # real
+    701: "float",  # double precision
+    1700: "float",  # numeric
+    18: "text",  # "char"
+    19: "text",  # name
+    25: "text",  # text
+    1042: "text",  # character
+    1043: "text",  # character varying
+    1082: "date",  # date
+}
+
+
+def _assemble_chunks(chunks):
+    """
+    Combine an iterable of DataFrame chunks into a single DataFrame.
+
+    The chunks are collected first and concatenated once, so each row is
+    copied a single time no matter how many chunks the result was split into.
+    Concatenating inside the loop instead recopies everything read so far
+    on every chunk, which is quadratic in the number of chunks.
+
+    :param chunks: iterable of pandas.DataFrame
+    :rtype: pandas.DataFrame
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(_unify_categories(chunks), copy=False)
+
+
+def _unify_categories(chunks):
+    """
+    Give categorical columns the same categories in every chunk.
+
+    pd.concat turns a categorical column into object when the chunks'
+    categories differ, as they do when each chunk is compacted on its own,
+    so each such column is recoded to the union of the chunks' categories.
+    """
+    names = {
+        name
+        for chunk in chunks
+        for name, dtype in chunk.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    }
+    for name in names:
+        columns = [chunk[name].astype("category") for chunk in chunks]
+        # Skip empty chunks, whose categories have no meaningful dtype.
+        categories = [c.cat.categories for c in columns if len(c.cat.categories)]
+        if not categories:
+            continue
+        dtype = pd.CategoricalDtype(categories[0].append(categories[1:]).unique())
+        if all(column.dtype == dtype for column in columns):
+            continue
+        chunks = [chunk.assign(**{name: chunk[name].astype(dtype)}) for chunk in chunks]
+    return chunks
+
+
+def _import_pyarrow():
+    """
+    Import pyarrow and its CSV reader, which are optional dependencies.
+
+    :rtype: tuple of (pyarrow, pyarrow.csv)
+    """
+    try:
+        import pyarrow
+        import pyarrow.csv
+    except ImportError as err:
+        raise ImportError(
+            "This feature requires pyarrow. Install it with: pip install wrds[arrow]"
+        ) from err
+    return pyarrow, pyarrow.csv
+
+
+def _arrow_type(pa, name):
+    """Arrow type of a RESULT_TYPES name."""
+    if name == "timestamp":
+        return pa.timestamp("us")
+    if name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    return pa.type_for_alias(name)
+
+
+def _copy_arrow_type(pa, type_code, coerce_float=True):
+    """
+    Arrow type used to parse a COPY column of the given PostgreSQL type OID.
+    """
+    if type_code == 1700 and not coerce_float:
+        # Keep numeric values exact, as text, rather than rounding to float.
+        return pa.string()
+    return _arrow_type(pa, RESULT_TYPES.get(type_code, "string"))
+
+
+def _string_dtype():
+    """
+    Nullable string dtype for text columns: stored by pyarrow, which takes
+    a fraction of the memory of Python strings, when it is installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pd.StringDtype()
+    return pd.StringDtype("pyarrow")
+
+
+def _object_array(values):
+    """One-dimensional object array of values, even if they are sequences."""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _column_reader(type_code, coerce_float=True, dtype_backend="numpy_nullable"):
+    """
+    Function converting a column of Python values, as fetched by the
+    driver, to an array of the dtype planned for the PostgreSQL type OID.
+
+    The dtype follows from the type alone, so every chunk of a result gets
+    the same dtypes, and no values are inspected to infer them.
+    """
+    name = RESULT_TYPES.get(type_code)
+    if type_code == 1700 and not coerce_float:
+        # Exact decimal.Decimal values.
+        return _object_array
+    if name is None:
+        return lambda values: (
+            pd.Series(_object_array(values))
+            .convert_dtypes(dtype_backend=dtype_backend)
+            .array
+        )
+    if dtype_backend == "pyarrow":
+        pa, _ = _import_pyarrow()
+        arrow_type = _arrow_type(pa, name)
+        if name.startswith("float"):
+            # NULL is read as NaN, since pyarrow cannot convert Decimal to float.
+            return lambda values: pd.arrays.ArrowExtensionArray(
+                pa.array(np.array(values, dtype=name), from_pandas=True)
+            )
+        return lambda values: pd.arrays.ArrowExtensionArray(
+            pa.array(values, type=arrow_type)
+        )
+    if name == "string":
+        dtype = _string_dtype()
+        return lambda values: pd.array(list(values), dtype=dtype)
+    if name.startswith("float"):
+
+        def read_float(values):
+            data = np.array(values, dtype=name)
+            return pd.arrays.FloatingArray(data, np.isnan(data))
+
+        return read_float
+    if name.startswith("int") or name == "bool":
+        array_type = (
+            pd.arrays.BooleanArray if name == "bool" else pd.arrays.IntegerArray
+        )
+
+        def read_masked(values):
+            data = _object_array(values)
+            mask = pd.isna(data)
+            data[mask] = 0
+            return array_type(data.astype(name), mask)
+
+        return read_masked
+    if name == "timestamptz":
+        return lambda values: pd.to_datetime(list(values), utc=True).as_unit("us").array
+    dtype = NULLABLE_DTYPES[name]
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return lambda values: np.array(values, dtype=dtype)
+    # pyarrow converts date and datetime objects several times faster.
+    arrow_type = _arrow_type(pa, name)
+    return lambda values: (
+        pa.array(values, type=arrow_type).to_numpy(zero_copy_only=False).astype(dtype)
+    )
+
+
+def _import_adbc():
+    """
+    Import the ADBC PostgreSQL driver's DB-API module, or return None if
+    it is not installed.
+    """
+    try:
+        import adbc_driver_postgresql.dbapi
+    except ImportError:
+        return None
+    return adbc_driver_postgresql.dbapi
+
+
+def _adbc_converter(pa, schema, coerce_float=True):
+    """
+    Return the schema, and a function converting each record batch to it,
+    for a result read with ADBC.
+
+    ADBC returns numeric, json and other types without an Arrow
+    equivalent as extension types stored as strings. Numeric becomes
+    float64, as with the other engines, when coerce_float is true, and
+    the rest becomes plain strings.
+    """
+    fields = []
+    casts = {}
+    for i, field in enumerate(schema):
+        if isinstance(field.type, pa.BaseExtensionType):
+            typname = (field.metadata or {}).get(b"ADBC:postgresql:typname")
+            if typname == b"numeric" and coerce_float:
+                casts[i] = pa.float64()
+            else:
+                casts[i] = field.type.storage_type
+            field = pa.field(field.name, casts[i])
+        fields.append(field)
+    target = pa.schema(fields)
+
+    def convert(batch):
+        if not casts:
+            return batch
+        columns = list(batch.columns)
+        for i, type_ in casts.items():
+            columns[i] = columns[i].storage.cast(type_)
+        return pa.RecordBatch.from_arrays(columns, schema=target)
+
+    return target, convert
+
+
+def _rebatch(batches, chunksize):
+    """
+    Regroup a stream of Arrow record batches into tables of chunksize rows.
+
+    The last table may be shorter. With chunksize None, every batch is
+    combined into a single table. The stream must hold at least one batch,
+    possibly empty, so an empty result still carries its columns.
+    """
+    import pyarrow as pa
+
+    pending = []
+    pending_rows = 0
+    emitted = False
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while chunksize is not None and pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            emitted = True
+            rest = table.slice(chunksize)
+            pending = rest.to_batches() or [batch.slice(0, 0)]
+            pending_rows = rest.num_rows
+    if pending_rows or not emitted:
+        yield pa.Table.from_batches(pending)
+
+
+def _arrow_to_pandas(table, dtype_backend="numpy_nullable"):
+    """
+    Convert an Arrow table of RESULT_TYPES to a DataFrame with the dtypes
+    the pandas engine plans for the same dtype_backend.
+    """
+    import pyarrow as pa
+
+    if dtype_backend == "pyarrow":
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    nullable = {
+        _arrow_type(pa, name): pd.api.types.pandas_dtype(dtype)
+        for name, dtype in NULLABLE_DTYPES.items()
+        if not name.startswith(("date", "time"))
+    }
+    nullable[pa.string()] = _string_dtype()
+    df = table.to_pandas(types_mapper=nullable.get, date_as_object=False)
+    for i, field in enumerate(table.schema):
+        if field.type == pa.date32():
+            df.isetitem(i, df.iloc[:, i].astype(NULLABLE_DTYPES["date32"]))
+    return df
+
+
+def _prefetch(iterator, depth):
+    """
+    Generator yielding the items of iterator, which a background thread
+    reads up to depth items ahead of the consumer, so producing the next
+    items overlaps with whatever the consumer does with the last one.
+
+    Exceptions raised by iterator are raised in the consumer. When the
+    generator is closed early, the thread stops after the item it is
+    producing, and the generator waits for it, so the iterator's
+    resources are free again once close returns.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=_produce, args=(iterator, items, stop), name="wrds-prefetch", daemon=True
+    )
+    thread.start()
+    try:
+        yield from _consume(items)
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _fetch_rows(result, chunksize=None, stats=None):
+    """
+    Generator yielding the rows of a result in lists of chunksize rows, or
+    in one list if chunksize is None. An empty result yields one empty
+    list.
+    """
+    first = True
+    while True:
+        with timed(stats, "fetch_time"):
+            if chunksize is None:
+                rows = result.fetchall()
+            else:
+                rows = result.fetchmany(chunksize)
+        if not rows and not first:
+            return
+        if stats is not None and rows:
+            stats.first_row()
+        yield rows
+        if chunksize is None or not rows:
+            return
+        first = False
+
+
+def _read_frames(
+    conn,
+    sql,
+    params=None,
+    chunksize=None,
+    coerce_float=True,
+    date_cols=None,
+    index_col=None,
+    dtype=None,
+    dtype_backend="numpy_nullable",
+    prefetch=0,
+):
+    """
+    Generator running a query on a SQLAlchemy connection and yielding its
+    result as DataFrames of chunksize rows, or as one DataFrame if
+    chunksize is None. An empty result yields one empty DataFrame.
+
+    The dtype of each column is planned once, from the PostgreSQL type in
+    the cursor description, and the fetched values are converted straight
+    to it. pd.read_sql_query instead infers dtypes from the values of each
+    chunk, so a column that is all NULL in one chunk comes back as object
+    there and as Int64 in another, which breaks their concatenation.
+
+    With prefetch, a background thread fetches up to prefetch chunks of
+    rows ahead while the DataFrames are built, so waiting on the server
+    overlaps with decoding.
+    """
+    stats = current_stats()
+    if stats is not None and stats.sql is None:
+        stats.sql = sql
+    with timed(stats, "server_time"):
+        result = conn.exec_driver_sql(sql, *([] if params is None else [params]))
+    if not result.returns_rows:
+        raise sa.exc.ResourceClosedError("This result object does not return rows.")
+    description = result.cursor.description
+    names = [col[0] for col in description]
+    readers = [
+        _column_reader(col[1], coerce_float, dtype_backend) for col in description
+    ]
+    batches = _fetch_rows(result, chunksize, stats)
+    if prefetch and chunksize is not None:
+        batches = _prefetch(batches, prefetch)
+    with contextlib.closing(batches):
+        for rows in batches:
+            with timed(stats, "build_time"):
+                df = _build_frame(rows, names, readers, date_cols, index_col, dtype)
+            if stats is not None:
+                stats.add("chunks", 1)
+            yield df
+
+
+def _build_frame(rows, names, readers, date_cols=None, index_col=None, dtype=None):
+    """
+    Build a DataFrame from fetched rows, converting the values of each
+    column with its reader from _column_reader.
+    """
+    columns = list(zip(*rows)) or [()] * len(names)
+    df = pd.DataFrame(
+        {i: read(values) for i, (read, values) in enumerate(zip(readers, columns))}
+    )
+    df.columns = names
+    return _finish_frame(df, date_cols, index_col, dtype)
+
+
+def _finish_frame(df, date_cols=None, index_col=None, dtype=None):
+    """
+    Apply raw_sql's dtype, date_cols and index_col to a chunk, in the
+    order pd.read_sql_query applies them.
+    """
+    if dtype:
+        df = df.astype(dtype)
+    df = _parse_date_cols(df, date_cols)
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+
+_DONE = object()
+
+
+def _produce(iterator, items, stop):
+    """
+    Put the items of iterator on the queue items, followed by an entry
+    marking its end or the exception it raised, until stop is set.
+    """
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        for item in iterator:
+            if not put((item, None)):
+                return
+    except BaseException as err:  # noqa: BLE001 - re-raised by _consume
+        put((_DONE, err))
+    else:
+        put((_DONE, None))
+
+
+def _consume(items):
+    """
+    Generator yielding the items _produce puts on the queue items, and
+    raising the exception their iterator raised, if any.
+    """
+    while True:
+        item, error = items.get()
+        if item is _DONE:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+
+def _parse_date_cols(df, date_cols):
+    """
+    Parse date columns the way pd.read_sql_query's parse_dates does.
+
+    :param date_cols: list of column names, or dict of
+        ``{column_name: format string or unit or to_datetime kwargs}``
+    """
+    if not date_cols:
+        return df
+    if not isinstance(date_cols, dict):
+        date_cols = {col: None for col in date_cols}
+    for col, fmt in date_cols.items():
+        if col not in df.columns:
+            continue
+        if isinstance(fmt, dict):
+            df[col] = pd.to_datetime(df[col], **fmt)
+        elif fmt in ("D", "d", "h", "m", "s", "ms", "us", "ns"):
+            df[col] = pd.to_datetime(df[col], errors="coerce", unit=fmt, utc=True)
+        else:
+            df[col] = pd.to_datetime(df[col], errors="coerce", format=fmt)
+    return df
+
+
+def _json_text(value):
+    """A value of a json column, or a dict or list, as JSON text."""
+    if value is None or value is pd.NA:
+        return None
+    return json.dumps(value, default=str)
+
+
+def _export_table(pa, df, types):
+    """
+    Convert a chunk read by the pandas engine into an Arrow table with the
+    column types the COPY engine writes: json columns, and other columns
+    of dicts or lists such as arrays, as JSON text, which every format can
+    hold, and date columns as date32 rather than timestamps.
+
+    :param types: ``{column name: PostgreSQL type OID}`` of the result
+    """
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            continue
+        if (
+            types.get(column) in (114, 3802)
+            or values.map(lambda value: isinstance(value, (dict, list, tuple))).any()
+        ):
+            df[column] = values.map(_json_text)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if types.get(field.name) == 1082 and pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+    return table
+
+
+def _export_format(path, format=None):
+    """
+    Return the export format for a path: format if given, otherwise the one
+    implied by its suffix, looking past compression suffixes such as .gz.
+    """
+    if format is None:
+        for suffix in reversed(Path(path).suffixes):
+            if suffix.lower() in EXPORT_FORMATS:
+                format = EXPORT_FORMATS[suffix.lower()]
+                break
+        else:
+            raise ValueError(
+                f"Cannot infer the export format of {path}, pass format="
+                "'parquet', 'feather' or 'csv'."
+            )
+    if format not in ("parquet", "feather", "csv"):
+        raise ValueError(
+            f"Unknown format {format!r}, use 'parquet', 'feather' or 'csv'."
+        )
+    return format
+
+
+def _compile_filters(filters):
+    """
+    Compile (column, operator, value) filters into an SQL condition joined
+    with AND, using SQLAlchemy Core so column names are quoted as needed
+    and values are bound as psycopg2 pyformat parameters.
+
+    :rtype: tuple of (condition string, dict of parameters)
+    """
+    conditions = []
+    for i, (column, op, value) in enumerate(filters):
+        col = sa.column(column)
+        name = f"wrds_filter_{i}"
+        op = op.strip().lower()
+        if op in ("in", "not in"):
+            bind = sa.bindparam(name, [_to_param(v) for v in value], expanding=True)
+            conditions.append(col.in_(bind) if op == "in" else col.not_in(bind))
+        elif op == "between":
+            low, high = value
+            conditions.append(
+                col.between(
+                    sa.bindparam(f"{name}_low", _to_param(low)),
+                    sa.bindparam(f"{name}_high", _to_param(high)),
+                )
+            )
+        elif op in ("is", "is not"):
+            if value is not None:
+                raise ValueError(f"Filter {column!r} {op} only accepts None.")
+            conditions.append(col.is_(None) if op == "is" else col.is_not(None))
+        elif op in FILTER_OPERATORS:
+            bind = sa.bindparam(name, _to_param(value))
+            conditions.append(getattr(col, FILTER_OPERATORS[op])(bind))
+        else:
+            raise ValueError(f"Unknown filter operator {op!r} for {column!r}.")
+    compiled = sa.and_(*conditions).compile(
+        dialect=postgresql.psycopg2.dialect(),
+        compile_kwargs={"render_postcompile": True},
+    )
+    return str(compiled), compiled.params
+
+
+def _compile_order_by(order_by):
+    """
+    Compile an order_by argument, a column name or a list of column names
+    or (column name, "asc" or "desc") tuples, into an ORDER BY list.
+    """
+    if isinstance(order_by, (str, tuple)):
+        order_by = [order_by]
+    clauses = []
+    for item in order_by:
+        column, direction = (item, "asc") if isinstance(item, str) else item
+        if direction.lower() not in ("asc", "desc"):
+            raise ValueError(f"Unknown sort direction {direction!r} for {column!r}.")
+        clauses.append(getattr(sa.column(column), direction.lower())())
+    return ", ".join(
+        str(clause.compile(dialect=postgresql.psycopg2.dialect())) for clause in clauses
+    )
+
+
+def _temp_column_type(series):
+    """PostgreSQL type of a temporary table column holding a pandas Series."""
+    types = pd.api.types
+    if types.is_bool_dtype(series.dtype):
+        return "boolean"
+    if types.is_integer_dtype(series.dtype):
+        return "bigint"
+    if types.is_float_dtype(series.dtype):
+        return "double precision"
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return "timestamptz"
+    if types.is_datetime64_dtype(series.dtype):
+        return "timestamp"
+    inferred = types.infer_dtype(series, skipna=True)
+    return {
+        "boolean": "boolean",
+        "integer": "bigint",
+        "floating": "double precision",
+        "mixed-integer-float": "double precision",
+        "decimal": "numeric",
+        "date": "date",
+        "datetime": "timestamp",
+    }.get(inferred, "text")
+
+
+def compact_frame(df, types=None, max_category_ratio=0.5):
+    """
+    Return a copy of a DataFrame with each column in the narrowest dtype
+    that holds its values.
+
+    - Integer columns, and float columns holding only whole numbers such
+      as CRSP's double precision permno, become the smallest integer type
+      that fits their range. Whole floats only narrow up to 32 bits, since
+      a 64-bit integer saves nothing over a float.
+    - real columns become float32.
+    - Text columns with at most max_category_ratio distinct values per row,
+      e.g. exchange codes or tickers, become category.
+    - date columns become datetime64[s], which also holds dates such as
+      9999-12-31 that do not fit in datetime64[ns].
+
+    Columns are nullable if the input's are, and pyarrow-backed columns
+    stay pyarrow-backed. Columns of any other type are left as they are.
+
+    :param df: pandas.DataFrame
+    :param types: (optional) dict, default: None
+        ``{column name: PostgreSQL type OID}`` of the columns to compact,
+        e.g. from a cursor description. Columns missing from it are left
+        as they are. When None, every column is compacted by its dtype.
+    :param max_category_ratio: (optional) float, default: 0.5
+        Largest ratio of distinct values to rows at which a text column
+        is converted to category.
+
+    :rtype: pandas.DataFrame
+
+    Usage::
+    >>> compact_frame(db.raw_sql('select permno, date, exchcd from crsp.dsf'))
+    """
+    compact = df.copy(deep=False)
+    for i, name in enumerate(df.columns):
+        column = df.iloc[:, i]
+        if types is None:
+            kind = _compact_kind(column)
+        else:
+            kind = COMPACT_TYPES.get(types.get(name))
+        if kind is not None and len(column):
+            compact.isetitem(i, _compact_column(column, kind, max_category_ratio))
+    return compact
+
+
+def _compact_kind(column):
+    """Kind of COMPACT_TYPES a column without a known server type has."""
+    if pd.api.types.is_bool_dtype(column.dtype):
+        return None
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return "int"
+    if pd.api.types.is_float_dtype(column.dtype):
+        return "float"
+    if pd.api.types.is_string_dtype(column):
+        return "text"
+    return None
+
+
+def _compact_column(column, kind, max_category_ratio):
+    """Narrow one column as compact_frame does for the given kind."""
+    arrow = isinstance(column.dtype, pd.ArrowDtype)
+    if kind == "text":
+        if not pd.api.types.is_string_dtype(column):
+            return column
+        if column.nunique() > max_category_ratio * len(column):
+            return column
+        return column.astype("category")
+    if kind == "date":
+        if arrow:
+            # pyarrow already stores dates as 4-byte date32.
+            return column
+        if pd.api.types.is_datetime64_dtype(column.dtype):
+            return column.astype("datetime64[s]")
+        values = column.astype(object).where(column.notna(), None)
+        return pd.Series(
+            np.array(values, dtype="datetime64[s]"),
+            index=column.index,
+            name=column.name,
+        )
+    if pd.api.types.is_bool_dtype(column.dtype) or not (
+        pd.api.types.is_numeric_dtype(column.dtype)
+    ):
+        # e.g. numeric read with coerce_float=False, as Decimal objects.
+        return column
+    if kind == "float32":
+        if arrow:
+            pa, _ = _import_pyarrow()
+            return column.astype(pd.ArrowDtype(pa.float32()))
+        return column.astype("Float32" if column.dtype == "Float64" else "float32")
+    values = column.dropna().to_numpy()
+    if not len(values):
+        return column
+    bits = (8, 16, 32, 64)
+    if kind == "float":
+        values = values.astype("float64")
+        if not np.isfinite(values).all() or not (values == np.floor(values)).all():
+            return column
+        bits = (8, 16, 32)
+    low, high = values.min(), values.max()
+    for width in bits:
+        info = np.iinfo(f"int{width}")
+        if info.min <= low and high <= info.max:
+            break
+    else:
+        return column
+    if arrow:
+        pa, _ = _import_pyarrow()
+        return column.astype(pd.ArrowDtype(pa.type_for_alias(f"int{width}")))
+    nullable = isinstance(column.dtype, pd.api.extensions.ExtensionDtype)
+    if nullable or len(values) < len(column):
+        return column.astype(f"Int{width}")
+    return column.astype(f"int{width}")
+
+
+def _quote_ident(name):
+    """Quote a PostgreSQL identifier, e.g. a schema or table name."""
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _json_value(value):
+    """Convert a value read by psycopg2 into one JSON can hold."""
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _to_param(value):
+    """Convert a value read from a DataFrame into one psycopg2 can bind."""
+    if isinstance(value, np.generic) and not isinstance(value, np.datetime64):
+        return value.item()
+    return value
+
+
+def _backoff_delays(retries, delay, max_delay=WRDS_RETRY_MAX_DELAY):
+    """
+    Generator yielding the seconds to wait before each of retries retries:
+    exponential backoff from delay, with half of each wait random so that
+    clients dropped at the same moment do not all retry at once.
+    """
+    for attempt in range(retries):
+        wait = min(max_delay, delay * 2**attempt)
+        yield wait / 2 + random.uniform(0, wait / 2)
+
+
+def _is_transient(err):
+    """
+    Whether a database error is the connection being lost or refused, so
+    that the same request may succeed on a new connection. Errors raised
+    by the server while running a query, e.g. a statement timeout, are not.
+    """
+    if isinstance(err, sa.exc.DBAPIError):
+        if err.connection_invalidated:
+            return True
+        err = err.orig
+    if not isinstance(err, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return False
+    # Errors raised by libpq rather than the server have no SQLSTATE.
+    return err.pgcode is None or err.pgcode.startswith(RETRY_SQLSTATES)
+
+
+def _is_read_query(sql):
+    """
+    Whether sql only reads, so running it again is harmless: a SELECT,
+    TABLE or VALUES query, or a WITH query over them, that mentions no
+    INSERT, UPDATE, DELETE or MERGE, e.g. in a data-modifying CTE, and
+    neither creates a table with SELECT ... INTO nor locks rows. Words in
+    string literals and comments count too, which only errs towards not
+    retrying.
+    """
+    if not re.match(r"\s*(select|with|table|values)\b", sql, re.IGNORECASE):
+        return False
+    writes = (
+        r"\b(insert|update|delete|merge)\b"
+        r"|\bselect\b.*\binto\b"
+        r"|\bfor\s+(no\s+key\s+update|update|key\s+share|share)\b"
+    )
+    return re.search(writes, sql, re.IGNORECASE | re.DOTALL) is None
+
+
+def _resume_query(sql, params, columns, after=None):
+    """
+    Wrap a query to return its rows ordered by columns, and, given the
+    values of columns in a row already read, only the rows after it.
+    NULLs sort last, as in the ORDER BY, so a NULL value in after is only
+    followed by rows equal to it up to that column.
+
+    :rtype: tuple of the query and its parameters
+    """
+    sql = sql.strip().rstrip(";")
+    keys = ", ".join(columns)
+    where = ""
+    if after is not None:
+        named = params is None or isinstance(params, dict)
+        values = {} if named else []
+
+        def bind(i, value):
+            if named:
+                values[f"wrds_resume_{i}"] = value
+                return f"%(wrds_resume_{i})s"
+            values.append(value)
+            return "%s"
+
+        terms = []
+        equal = []
+        for i, (column, value) in enumerate(zip(columns, after)):
+            if value is None:
+                equal.append(f"{column} IS NULL")
+                continue
+            later = f"({column} > {bind(i, value)} OR {column} IS NULL)"
+            terms.append(" AND ".join([*equal, later]))
+            if i < len(columns) - 1:
+                equal.append(f"{column} = {bind(i, value)}")
+        if len(terms) > 1:
+            terms = [f"({term})" if " AND " in term else term for term in terms]
+        params = {**(params or {}), **values} if named else [*params, *values]
+        where = f" WHERE {' OR '.join(terms) or 'false'}"
+    # The newline ends any trailing -- comment before the paren.
+    return f"SELECT * FROM ({sql}\n) AS wrds_resume{where} ORDER BY {keys}", params
+
+
+def _last_key(chunk, columns):
+    """
+    The values of columns in the last row of a chunk, looking in its index
+    for columns set as index_col, with None for missing values.
+    """
+    values = []
+    for column in columns:
+        if column in chunk.columns:
+            value = chunk[column].iloc[-1]
+        else:
+            value = chunk.index.get_level_values(column)[-1]
+        values.append(None if pd.isna(value) else _to_param(value))
+    return values
+
+
+def _plan_nodes(plan):
+    """Generator yielding an EXPLAIN plan node and every node below it."""
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def _format_bytes(size):
+    for unit in ("bytes", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            break
+        size /= 1024
+    return f"{size:,.0f} {unit}" if unit == "bytes" else f"{size:,.1f} {unit}"
 
 
 class NotSubscribedError(PermissionError):
     pass
 
 
+class QueryTooLargeError(ValueError):
+    pass
+
+
 class SchemaNotFoundError(FileNotFoundError):
     pass
 
@@ -40,6 +1053,33 @@ class Connection(object):
             *wrds_port*: database connection port number
             *wrds_dbname*: WRDS database name
             *wrds_username*: WRDS username
+            *wrds_pool_args*: dict of SQLAlchemy QueuePool settings
+              (pool_size, max_overflow, pool_timeout, pool_pre_ping,
+              pool_recycle) overriding WRDS_POOL_ARGS
+            *wrds_retries*: times to retry connecting, and reading a query,
+              when the connection to the server fails or is lost,
+              default: WRDS_RETRIES. 0 disables retries
+            *wrds_retry_delay*: seconds before the first retry, doubled for
+              each further one, default: WRDS_RETRY_DELAY
+            *metadata_cache*: True or a :class:`wrds.MetadataCache` to keep the
+              library list, table lists and column descriptions in a local
+              cache instead of querying the catalog every time
+            *result_cache*: True or a :class:`wrds.ResultCache` to keep query
+              results on local disk and serve repeated raw_sql and get_table
+              calls from there. Requires pyarrow
+            *table_store*: True or a :class:`wrds.TableStore` to keep tables
+              read with get_table as memory-mapped Arrow files on local disk,
+              shared by the processes using the same store. Requires pyarrow
+            *instrument*: True, or a callable, :class:`logging.Logger`,
+              :class:`wrds.QueryLog` or list of them, to receive a record
+              of each raw_sql, get_table, export and catalog call: server,
+              fetch and DataFrame build times, time to first row, rows and
+              bytes. True keeps the last 1000 records in ``query_log``.
+              See :class:`wrds.instrument.QueryStats`
+            *trace_memory*: If true, also record each instrumented call's
+              peak Python allocations, at a considerable cost in speed
+            *prefetch_libraries*: If true, load the library list in a
+              background thread as soon as the connection is established
             *autoconnect*: If false will not immediately establish the connection
 
         The constructor will use the .pgpass file if it exists and may make use of
@@ -48,15 +1088,23 @@ class Connection(object):
         If not, it will ask the user for a username and password.
         It will also direct the user to information on setting up .pgpass.
 
-        Additionally, creating the instance will load a list of schemas
-        the user has permission to access.
+        The list of schemas the user has permission to access is loaded
+        the first time it is needed, e.g. by list_libraries() or get_table(),
+        so scripts that only run raw_sql never pay for the catalog query.
+
+        Queries are run on connections checked out of a connection pool, so
+        one instance can be shared by several threads. The ``connection``
+        attribute remains available as a dedicated session connection,
+        opened the first time it is used.
 
         :return: None
 
         Usage::
         >>> db = wrds.Connection()
+        >>> db.list_libraries()
         Loading library list...
         Done
+        ['aha', 'audit', 'block', 'boardex', ...]
         """
         self._verbose = verbose
         # If user or password is passed in any of these parameters, override defaults.
@@ -69,10 +1117,104 @@ class Connection(object):
         self._port = kwargs.get("wrds_port", WRDS_POSTGRES_PORT)
         self._dbname = kwargs.get("wrds_dbname", WRDS_POSTGRES_DB)
         self._connect_args = kwargs.get("wrds_connect_args", WRDS_CONNECT_ARGS)
+        self._pool_args = {**WRDS_POOL_ARGS, **kwargs.get("wrds_pool_args", {})}
+        self._retries = kwargs.get("wrds_retries", WRDS_RETRIES)
+        self._retry_delay = kwargs.get("wrds_retry_delay", WRDS_RETRY_DELAY)
+        self._pool_lock = threading.Lock()
+        self._pool_checkouts = 0
+        self._pool_wait_time = 0.0
+        self._pool_max_wait_time = 0.0
+        metadata_cache = kwargs.get("metadata_cache")
+        if metadata_cache is True:
+            metadata_cache = MetadataCache()
+        self._metadata_cache = metadata_cache or None
+        result_cache = kwargs.get("result_cache")
+        if result_cache is True:
+            result_cache = ResultCache()
+        self._result_cache = result_cache or None
+        table_store = kwargs.get("table_store")
+        if table_store is True:
+            table_store = TableStore()
+        self._table_store = table_store or None
+        instrument = kwargs.get("instrument")
+        self._instrumentation = None
+        if instrument is not None and instrument is not False:
+            if instrument is True:
+                instrument = QueryLog()
+            self._instrumentation = Instrumentation(
+                instrument, trace_memory=kwargs.get("trace_memory", False)
+            )
+        self._schema_perm = None
+        self._insp = None
+        self._connection = None
+        self._library_lock = threading.Lock()
+        # Connection each thread is pinned to while inside upload_temp.
+        self._pinned = threading.local()
 
         if autoconnect:
             self.connect()
-            self.load_library_list()
+            if kwargs.get("prefetch_libraries", False):
+                threading.Thread(
+                    target=self.__prefetch_library_list,
+                    name="wrds-prefetch-libraries",
+                    daemon=True,
+                ).start()
+
+    @property
+    def connection(self):
+        """
+        A SQLAlchemy connection of this session's own, opened from the pool
+        on first use, for running statements directly. The methods of this
+        class do not use it, so it only holds a pooled connection once it
+        is used.
+        """
+        if self._connection is None and getattr(self, "engine", None) is not None:
+            self._connection = self.engine.connect()
+        return self._connection
+
+    @connection.setter
+    def connection(self, value):
+        self._connection = value
+
+    @property
+    def schema_perm(self):
+        """Libraries the user has permission to access, loaded on first use."""
+        if self._schema_perm is None:
+            self.__ensure_library_list()
+        return self._schema_perm
+
+    @schema_perm.setter
+    def schema_perm(self, value):
+        self._schema_perm = value
+
+    @property
+    def insp(self):
+        """SQLAlchemy inspector bound to the engine, created on first use."""
+        if self._insp is None:
+            self._insp = sa.inspect(self.engine)
+        return self._insp
+
+    @insp.setter
+    def insp(self, value):
+        self._insp = value
+
+    def __ensure_library_list(self):
+        """
+        Internal function loading the library list unless it is already
+        loaded. Concurrent callers, including the prefetch thread, wait
+        for a single load.
+        """
+        with self._library_lock:
+            if self._schema_perm is None:
+                self.load_library_list()
+
+    def __prefetch_library_list(self):
+        try:
+            self.__ensure_library_list()
+        except (sa.exc.SQLAlchemyError, psycopg2.Error):
+            # Left unloaded, the list is loaded again, raising any error
+            # that persists, on first use.
+            logger.debug("Prefetching the library list failed", exc_info=True)
 
     def __make_sa_engine_conn(self, raise_err=False):
         username = self._username
@@ -88,8 +1230,12 @@ class Connection(object):
                 pguri,
                 isolation_level="AUTOCOMMIT",
                 connect_args=self._connect_args,
+                poolclass=sa.pool.QueuePool,
+                **self._pool_args,
             )
-            self.connection = self.engine.connect()
+            # Check the credentials work, then return the connection to the
+            # pool rather than holding one for the life of the session.
+            self.__connect_engine().close()
         except Exception as err:
             if self._verbose:
                 print(f"{err=}")
@@ -97,6 +1243,30 @@ class Connection(object):
             if raise_err:
                 raise err
 
+    def __connect_engine(self):
+        """
+        Internal function opening a connection from the engine, retrying
+        with backoff while the server is unreachable or refuses connections,
+        e.g. while it restarts. Authentication failures are not retried.
+        """
+        delays = _backoff_delays(self._retries, self._retry_delay)
+        while True:
+            try:
+                return self.engine.connect()
+            except sa.exc.OperationalError as err:
+                delay = next(delays, None)
+                message = str(err.orig)
+                if (
+                    delay is None
+                    or not _is_transient(err)
+                    or any(text in message for text in PERMANENT_CONNECT_ERRORS)
+                ):
+                    raise
+                print(
+                    f"Could not connect to {self._hostname}, retrying in {delay:.1f}s..."
+                )
+                time.sleep(delay)
+
     def connect(self):
         """Make a connection to the WRDS database."""
         # first try connection using system defaults and params set in constructor
@@ -138,10 +1308,87 @@ class Connection(object):
         """
         Close the connection to the database.
         """
-        self.connection.close()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
         self.engine.dispose()
         self.engine = None
 
+    @contextlib.contextmanager
+    def __checkout(self):
+        """
+        Internal context manager checking a connection out of the pool
+        for the duration of one query, recording how long the checkout waited.
+
+        Inside upload_temp, the thread's pinned connection is used instead,
+        so queries can see the temporary tables created on it.
+        """
+        pinned = getattr(self._pinned, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+        start = time.perf_counter()
+        conn = self.engine.connect()
+        waited = time.perf_counter() - start
+        with self._pool_lock:
+            self._pool_checkouts += 1
+            self._pool_wait_time += waited
+            self._pool_max_wait_time = max(self._pool_max_wait_time, waited)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def pool_status(self):
+        """
+        Return statistics about the connection pool.
+
+        *size*: number of connections the pool keeps open
+        *checked_out*: connections currently in use, including ``connection``
+          once it has been opened
+        *checked_in*: idle connections in the pool
+        *overflow*: connections open beyond size
+        *checkouts*: connections checked out for queries so far
+        *wait_time*: total seconds spent waiting for those checkouts
+        *max_wait_time*: longest single wait, in seconds
+
+        :rtype: dict
+
+        Usage::
+        >>> db.pool_status()
+        {'size': 5, 'checked_out': 0, 'checked_in': 3, 'overflow': -2,
+         'checkouts': 14, 'wait_time': 0.0021, 'max_wait_time': 0.0008}
+        """
+        pool = self.engine.pool
+        with self._pool_lock:
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self._pool_checkouts,
+                "wait_time": self._pool_wait_time,
+                "max_wait_time": self._pool_max_wait_time,
+            }
+
+    @property
+    def query_log(self):
+        """
+        The :class:`wrds.QueryLog` receiving this connection's
+        instrumentation records, or None.
+        """
+        if self._instrumentation is None:
+            return None
+        for sink in self._instrumentation.sinks:
+            if isinstance(sink, QueryLog):
+                return sink
+        return None
+
+    @property
+    def table_store(self):
+        """The :class:`wrds.TableStore` get_table reads from, or None."""
+        return self._table_store
+
     def __enter__(self):
         self.connect()
         return self
@@ -149,52 +1396,84 @@ class Connection(object):
     def __exit__(self, *args):
         self.close()
 
+    @instrumented
     def load_library_list(self):
         """Load the list of Postgres schemata (c.f. SAS LIBNAMEs)
         the user has permission to access."""
-        self.insp = sa.inspect(self.connection)
+        self.insp = sa.inspect(self.engine)
+        cached = self.__cached_metadata("libraries")
+        if cached is not None:
+            self.schema_perm = cached
+            return
         print("Loading library list...")
-        query = """
-WITH pgobjs AS (
-    -- objects we care about - tables, views, foreign tables, partitioned tables
-    SELECT oid, relnamespace, relkind
-    FROM pg_class
-    WHERE relkind = ANY (ARRAY['r'::"char", 'v'::"char", 'f'::"char", 'p'::"char"])
-),
-schemas AS (
-    -- schemas we have usage on that represent products
-    SELECT nspname AS schemaname,
-        pg_namespace.oid,
-        array_agg(DISTINCT relkind) AS relkind_a
-    FROM pg_namespace
-    JOIN pgobjs ON pg_namespace.oid = relnamespace
-    WHERE nspname !~ '(^pg_)|(_old$)|(_new$)|(information_schema)'
-        AND has_schema_privilege(nspname, 'USAGE') = TRUE
-    GROUP BY nspname, pg_namespace.oid
-)
-SELECT schemaname
-FROM schemas
-WHERE relkind_a != ARRAY['v'::"char"] -- any schema except only views
-UNION
--- schemas w/ views (aka "friendly names") that reference accessable product tables
-SELECT nv.schemaname
-FROM schemas nv
-JOIN pgobjs v ON nv.oid = v.relnamespace AND v.relkind = 'v'::"char"
-JOIN pg_depend dv ON v.oid = dv.refobjid AND dv.refclassid = 'pg_class'::regclass::oid
-    AND dv.classid = 'pg_rewrite'::regclass::oid AND dv.deptype = 'i'::"char"
-JOIN pg_depend dt ON dv.objid = dt.objid AND dv.refobjid <> dt.refobjid
-    AND dt.classid = 'pg_rewrite'::regclass::oid
-    AND dt.refclassid = 'pg_class'::regclass::oid
-JOIN pgobjs t ON dt.refobjid = t.oid
-    AND (t.relkind = ANY (ARRAY['r'::"char", 'v'::"char", 'f'::"char", 'p'::"char"]))
-JOIN schemas nt ON t.relnamespace = nt.oid
-GROUP BY nv.schemaname
-ORDER BY 1;
-        """
-        cursor = self.connection.exec_driver_sql(query)
-        self.schema_perm = [x[0] for x in cursor.fetchall()]
+        with self.__checkout() as conn:
+            cursor = conn.exec_driver_sql(WRDS_LIBRARY_QUERY)
+            self.schema_perm = [x[0] for x in cursor.fetchall()]
+        self.__store_metadata("libraries", "", self.schema_perm)
         print("Done")
 
+    def __metadata_scope(self):
+        """
+        Internal function returning the (host, user, database) key of this
+        connection's entries in the metadata cache.
+        """
+        # Without an explicit username libpq falls back to PGUSER, then the OS user.
+        user = self._username or os.environ.get("PGUSER") or getpass.getuser()
+        return (self._hostname, user, self._dbname)
+
+    def __cached_metadata(self, kind, name=""):
+        """Internal function reading from the metadata cache, if enabled."""
+        if self._metadata_cache is None:
+            return None
+        return self._metadata_cache.get(self.__metadata_scope(), kind, name)
+
+    def __store_metadata(self, kind, name, value):
+        """Internal function writing to the metadata cache, if enabled."""
+        if self._metadata_cache is not None:
+            self._metadata_cache.set(self.__metadata_scope(), kind, name, value)
+
+    def invalidate_metadata_cache(self):
+        """
+        Discard this connection's entries in the metadata cache, so the
+        library list, table lists and column descriptions are read from the
+        database again, e.g. after gaining access to a new library.
+
+        Usage::
+        >>> db.invalidate_metadata_cache()
+        >>> db.load_library_list()
+        """
+        if self._metadata_cache is not None:
+            self._metadata_cache.invalidate(self.__metadata_scope())
+
+    def invalidate_result_cache(self, library=None, table=None):
+        """
+        Discard cached query results, so they are read from the database
+        again, e.g. after WRDS updates a table.
+
+        :param library: (optional) only discard results that read this library
+        :param table: (optional) with library, only discard results that
+            read this table
+
+        Usage::
+        >>> db.invalidate_result_cache('crsp', 'dsf')
+        """
+        if self._result_cache is not None:
+            self._result_cache.invalidate(library, table)
+
+    def invalidate_table_store(self, library=None, table=None):
+        """
+        Discard stored tables, so get_table reads them from the database
+        again, e.g. after WRDS updates a table.
+
+        :param library: (optional) only discard tables of this library
+        :param table: (optional) with library, only discard this table
+
+        Usage::
+        >>> db.invalidate_table_store('crsp', 'dsf')
+        """
+        if self._table_store is not None:
+            self._table_store.invalidate(library, table)
+
     def __get_user_credentials(self):
         """Prompt the user for their WRDS credentials.
 
@@ -385,6 +1664,7 @@ ORDER BY 1;
             else:
                 raise SchemaNotFoundError("The {} library is not found.".format(schema))
 
+    @instrumented
     def list_libraries(self):
         """
         Return all the libraries (schemas) the user can access.
@@ -397,6 +1677,7 @@ ORDER BY 1;
         """
         return self.schema_perm
 
+    @instrumented
     def list_tables(self, library):
         """
         Returns a list of all the views/tables/foreign tables within a schema.
@@ -410,11 +1691,14 @@ ORDER BY 1;
         ['wciklink_gvkey', 'dforms', 'wciklink_cusip', 'wrds_forms', ...]
         """
         if self.__check_schema_perms(library):
-            output = (
-                self.insp.get_view_names(schema=library)
-                + self.insp.get_table_names(schema=library)
-                + self.insp.get_foreign_table_names(schema=library)
-            )
+            output = self.__cached_metadata("tables", library)
+            if output is None:
+                output = (
+                    self.insp.get_view_names(schema=library)
+                    + self.insp.get_table_names(schema=library)
+                    + self.insp.get_foreign_table_names(schema=library)
+                )
+                self.__store_metadata("tables", library, output)
             return output
 
     def __get_schema_for_view(self, schema, table):
@@ -440,9 +1724,11 @@ ORDER BY 1;
                         AND dependent_view.relname = '{view}';
                     """.format(schema=schema, view=table)
         if self.__check_schema_perms(schema):
-            result = self.connection.exec_driver_sql(sql_code)
-            return result.fetchone()[0]
+            with self.__checkout() as conn:
+                result = conn.exec_driver_sql(sql_code)
+                return result.fetchone()[0]
 
+    @instrumented
     def describe_table(self, library, table):
         """
         Takes the library and the table and describes all the columns
@@ -464,19 +1750,138 @@ ORDER BY 1;
               4   coname     True  VARCHAR
               5    fname     True  VARCHAR
         """
-        rows = self.get_row_count(library, table)
-        print("Approximately {} rows in {}.{}.".format(rows, library, table))
-        table_info = pd.DataFrame.from_dict(
-            self.insp.get_columns(table, schema=library)
+        name = f"{library}.{table}"
+        described = self.__cached_metadata("columns", name)
+        if described is None:
+            # The type's name, e.g. "VARCHAR", so cached descriptions match.
+            columns = [
+                {
+                    "name": col["name"],
+                    "nullable": col["nullable"],
+                    "type": str(col["type"]),
+                    "comment": col.get("comment"),
+                }
+                for col in self.insp.get_columns(table, schema=library)
+            ]
+            rows = self.get_row_count(library, table)
+            described = {"rows": rows, "columns": columns}
+            self.__store_metadata("columns", name, described)
+        print(
+            "Approximately {} rows in {}.{}.".format(described["rows"], library, table)
         )
+        table_info = pd.DataFrame.from_dict(described["columns"])
         return table_info[["name", "nullable", "type", "comment"]]
 
-    def get_row_count(self, library, table):
+    @instrumented
+    def describe_tables(self, library, tables=None):
+        """
+        Describes the columns of many tables in a library with a single
+        catalog query, rather than the two queries per table that
+        describe_table makes.
+
+        Returns one row per column, in column order within each table.
+        Types are PostgreSQL's names for them, e.g. "character varying(8)",
+        and rows is the planner's estimate of the table's row count from
+        pg_class.reltuples, or missing when it is unknown, e.g. for views
+        and tables that have never been analyzed.
+
+        :param library: Postgres schema name.
+        :param tables: (optional) list of table names, default: None
+            Tables to describe. None describes every table and view in
+            the library.
+
+        :rtype: pandas.DataFrame
+
+        Usage::
+        >>> db.describe_tables('crsp', ['dsf', 'msf'])
+              table    name  nullable              type                    comment      rows
+            0   dsf   cusip      True      character(8)                      CUSIP  98123456
+            1   dsf  permno      True  double precision         PERMNO identifier  98123456
+            ...
+        """
+        sqlstmt = """
+            SELECT c.relname AS table,
+                a.attname AS name,
+                NOT a.attnotnull AS nullable,
+                format_type(a.atttypid, a.atttypmod) AS type,
+                col_description(c.oid, a.attnum) AS comment,
+                CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint END AS rows
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = c.oid
+            WHERE n.nspname = %(library)s
+              AND c.relkind IN ('r', 'v', 'f', 'p', 'm')
+              AND a.attnum > 0
+              AND NOT a.attisdropped
+        """
+        params = {"library": library}
+        if tables is not None:
+            sqlstmt += " AND c.relname = ANY(%(tables)s)"
+            params["tables"] = list(tables)
+        sqlstmt += " ORDER BY c.relname, a.attnum"
+        if self.__check_schema_perms(library):
+            return self.raw_sql(sqlstmt, params=params, chunksize=None, cache=False)
+
+    @instrumented
+    def list_all_tables(self):
+        """
+        Lists the tables, views and foreign tables of every library the user
+        can access with a single catalog query, rather than three queries
+        per library as list_tables makes.
+
+        Returns one row per relation with its kind, the planner's estimate
+        of its row count from pg_class.reltuples (missing when unknown) and
+        its description.
+
+        :rtype: pandas.DataFrame
+
+        Usage::
+        >>> db.list_all_tables()
+              library        table   kind      rows                        comment
+            0     aha   aha_sample   table      6318                           <NA>
+            1   audit  auditnonrel    view      <NA>  Audit Opinions - Non-Reliance
+            ...
+        """
+        sqlstmt = """
+            SELECT n.nspname AS library,
+                c.relname AS table,
+                CASE c.relkind
+                    WHEN 'r' THEN 'table'
+                    WHEN 'p' THEN 'table'
+                    WHEN 'v' THEN 'view'
+                    WHEN 'm' THEN 'materialized view'
+                    WHEN 'f' THEN 'foreign table'
+                END AS kind,
+                CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint END AS rows,
+                obj_description(c.oid, 'pg_class') AS comment
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = ANY(%(libraries)s)
+              AND c.relkind IN ('r', 'v', 'f', 'p', 'm')
+            ORDER BY 1, 2
+        """
+        return self.raw_sql(
+            sqlstmt,
+            params={"libraries": list(self.schema_perm)},
+            chunksize=None,
+            cache=False,
+        )
+
+    @instrumented
+    def get_row_count(self, library, table, exact=False, timeout=None):
         """
         Uses the library and table to get the approximate row count for the table.
 
+        The count is the planner's estimate, read from the catalog without
+        touching the table. See :meth:`get_row_counts`.
+
         :param library: Postgres schema name.
         :param table: Postgres table name.
+        :param exact: (optional) boolean, default: False
+            Count the rows with count(*) instead of estimating them.
+        :param timeout: (optional) seconds, default: None
+            With exact, give up on count(*) after this long and return the
+            estimate instead.
 
         :rtype: int
 
@@ -484,18 +1889,311 @@ ORDER BY 1;
         >>> db.get_row_count('wrdssec', 'dforms')
         16378400
         """
+        try:
+            counts = self.get_row_counts(library, [table], exact, timeout)
+            if table not in counts.index:
+                raise ValueError(f"{library}.{table} does not exist.")
+            return int(counts[table])
+        except Exception as e:
+            print(f"There was a problem with retrieving the row count: {e}")
+            return 0
+
+    @instrumented
+    def get_row_counts(self, library, tables=None, exact=False, timeout=None):
+        """
+        Estimates the number of rows of many tables in a library at once.
 
+        Estimates come from pg_class.reltuples, which ANALYZE maintains, so
+        they cost one catalog query for any number of tables rather than a
+        planner run per table. Partitioned and inherited tables add up
+        their children's estimates, and views take the estimate of the
+        largest relation they read, following views of views down to base
+        tables. Tables that have never been analyzed fall back to the
+        planner's estimate from EXPLAIN.
+
+        :param library: Postgres schema name.
+        :param tables: (optional) list of table names, default: None
+            Tables to count. None counts every table and view in the library.
+        :param exact: (optional) boolean, default: False
+            Count the rows of each table with count(*) instead. This reads
+            every table in full.
+        :param timeout: (optional) seconds, default: None
+            With exact, give up on count(*) for a table after this long and
+            use its estimate instead.
+
+        :rtype: pandas.Series of row counts indexed by table name
+
+        Usage::
+        >>> db.get_row_counts('crsp', ['dsf', 'msf', 'stocknames'])
+        table
+        dsf           105259392
+        msf             5023381
+        stocknames        37946
+        Name: rows, dtype: Int64
+        """
+        if self.__check_schema_perms(library):
+            counts = self.__estimate_row_counts(library, tables)
+            for table, rows in counts.items():
+                if rows is None:
+                    counts[table] = self.__explain_row_count(library, table)
+                if exact:
+                    counts[table] = self.__exact_row_count(
+                        library, table, timeout, counts[table]
+                    )
+            counts = pd.Series(counts, name="rows", dtype="Int64")
+            counts.index.name = "table"
+            return counts.sort_index()
+
+    def __estimate_row_counts(self, library, tables=None):
+        """
+        Internal function returning {table: estimated rows or None} from
+        pg_class.reltuples.
+
+        A single recursive query collects each relation together with the
+        relations its estimate depends on: the children of inherited and
+        partitioned tables, from pg_inherits, and the relations a view reads,
+        from its rewrite rule's dependencies as in __get_schema_for_view.
+        The estimates are then combined here.
+        """
         sqlstmt = """
-            EXPLAIN (FORMAT 'json')  SELECT 1 FROM {}.{} ;
-        """.format(sa.sql.quoted_name(library, True), sa.sql.quoted_name(table, True))
+            WITH RECURSIVE targets AS (
+                SELECT c.oid
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = %(library)s
+                  AND c.relkind IN ('r', 'v', 'f', 'p', 'm')
+                  {tables}
+            ),
+            edges(parent, child, via) AS (
+                SELECT NULL::oid, oid, NULL::text FROM targets
+                UNION
+                SELECT e.child, s.child, s.via
+                FROM edges e
+                JOIN pg_class p ON p.oid = e.child
+                CROSS JOIN LATERAL (
+                    SELECT i.inhrelid AS child, 'inherits' AS via
+                    FROM pg_inherits i
+                    WHERE i.inhparent = p.oid
+                    UNION
+                    SELECT d.refobjid, 'view'
+                    FROM pg_rewrite r
+                    JOIN pg_depend d
+                      ON d.objid = r.oid
+                        AND d.classid = 'pg_rewrite'::regclass
+                        AND d.refclassid = 'pg_class'::regclass
+                    WHERE p.relkind = 'v'
+                      AND r.ev_class = p.oid
+                      AND d.refobjid <> p.oid
+                ) s
+            )
+            SELECT e.parent, e.child, e.via, c.relname, c.relkind, c.reltuples
+            FROM edges e
+            JOIN pg_class c ON c.oid = e.child
+        """
+        params = {"library": library}
+        if tables is not None:
+            params["tables"] = list(tables)
+        sqlstmt = sqlstmt.format(
+            tables="AND c.relname = ANY(%(tables)s)" if tables is not None else ""
+        )
+        with self.__checkout() as conn:
+            rows = conn.exec_driver_sql(sqlstmt, params).fetchall()
+
+        relations = {}
+        children = {}
+        targets = {}
+        for parent, child, via, relname, relkind, reltuples in rows:
+            relations[child] = (relkind, reltuples)
+            if parent is None:
+                targets[relname] = child
+            else:
+                children.setdefault(parent, []).append((child, via))
+
+        def estimate(oid):
+            relkind, reltuples = relations[oid]
+            parts = {"inherits": [], "view": []}
+            for child, via in children.get(oid, []):
+                rows = estimate(child)
+                if rows is not None:
+                    parts[via].append(rows)
+            if relkind == "v":
+                return max(parts["view"], default=None)
+            # reltuples is -1 until the first ANALYZE, and always for
+            # partitioned parents, which hold no rows themselves.
+            own = reltuples if reltuples >= 0 and relkind != "p" else None
+            if own is None and not parts["inherits"]:
+                return None
+            return int((own or 0) + sum(parts["inherits"]))
+
+        return {table: estimate(oid) for table, oid in targets.items()}
+
+    def __explain_row_count(self, library, table):
+        """
+        Internal function returning the planner's row estimate for a table.
+        """
+        relation = f"{_quote_ident(library)}.{_quote_ident(table)}"
+        sqlstmt = f"EXPLAIN (FORMAT 'json') SELECT 1 FROM {relation}"
+        with self.__checkout() as conn:
+            result = conn.exec_driver_sql(sqlstmt)
+            return int(result.fetchone()[0][0]["Plan"]["Plan Rows"])
 
+    def __exact_row_count(self, library, table, timeout, estimate):
+        """
+        Internal function counting a table's rows with count(*), or
+        returning the estimate if the count takes longer than timeout.
+        """
+        relation = f"{_quote_ident(library)}.{_quote_ident(table)}"
+        sqlstmt = f"SELECT count(*) FROM {relation}"
         try:
-            result = self.connection.exec_driver_sql(sqlstmt)
-            return int(result.fetchone()[0][0]["Plan"]["Plan Rows"])
-        except Exception as e:
-            print("There was a problem with retrieving the row count: {}".format(e))
-            return 0
+            with self.__checkout() as conn:
+                # statement_timeout is set for this transaction only.
+                conn = conn.execution_options(isolation_level="READ COMMITTED")
+                with conn.begin():
+                    if timeout is not None:
+                        conn.exec_driver_sql(
+                            "SELECT set_config('statement_timeout', %(ms)s, true)",
+                            {"ms": str(int(timeout * 1000))},
+                        )
+                    return conn.exec_driver_sql(sqlstmt).scalar()
+        except sa.exc.OperationalError as err:
+            if getattr(err.orig, "pgcode", None) != "57014":  # query_canceled
+                raise
+            print(
+                f"Counting {library}.{table} took longer than {timeout}s, "
+                "using the estimate."
+            )
+            return estimate
+
+    @instrumented
+    def explain(self, sql, params=None, analyze=False):
+        """
+        Shows how the server plans to run a query, without running it.
 
+        The estimates are the planner's, from the statistics ANALYZE keeps,
+        so they can be far off for complex joins and filters, but they are
+        a cheap way to spot a query that would return far more data than
+        intended or read a whole large table.
+
+        :param sql: SQL code in string object.
+        :param params: parameters to SQL query, if parameterized.
+        :param analyze: (optional) boolean, default: False
+            Run the query with EXPLAIN ANALYZE and also report the actual
+            rows and times. The query runs in full on the server, but its
+            result is not transferred.
+
+        :rtype: dict
+
+        *rows*: estimated number of rows returned
+        *width*: estimated average size of a row on the server, in bytes
+        *estimated_bytes*: rows * width, a rough size of the result
+        *startup_cost*, *total_cost*: the planner's costs, in its
+          arbitrary units, before the first row and for all rows
+        *seq_scans*: list of ``{'relation', 'rows', 'bytes'}`` for the
+          relations of at least EXPLAIN_LARGE_RELATION_ROWS rows that the
+          plan reads in full
+        *actual_rows*, *planning_time*, *execution_time*: with analyze,
+          the rows returned and the times in milliseconds, else None
+        *plan*: the full plan, as returned by ``EXPLAIN (FORMAT JSON)``
+
+        Usage::
+        >>> db.explain("select * from crsp.dsf where ret > 0.5")
+        {'rows': 21473, 'width': 84, 'estimated_bytes': 1803732,
+         'startup_cost': 0.0, 'total_cost': 3571042.4,
+         'seq_scans': [{'relation': 'crsp.dsf', 'rows': 105259392,
+                        'bytes': 14285045760}], ...}
+        """
+        options = "ANALYZE, BUFFERS, " if analyze else ""
+        sql = sql.strip().rstrip(";")
+        sqlstmt = f"EXPLAIN ({options}VERBOSE, FORMAT JSON) {sql}"
+        with self.__checkout() as conn:
+            result = conn.exec_driver_sql(
+                sqlstmt, *([] if params is None else [params])
+            )
+            explained = result.fetchone()[0][0]
+            plan = explained["Plan"]
+            scans = {}
+            for node in _plan_nodes(plan):
+                if node["Node Type"] == "Seq Scan":
+                    relation = (node["Schema"], node["Relation Name"])
+                    scans[relation] = max(scans.get(relation, 0), node["Plan Rows"])
+            sizes = {}
+            if scans:
+                # Filtered scans estimate the rows they return, not read.
+                sizes = {
+                    (schema, name): (rows, size)
+                    for schema, name, rows, size in conn.exec_driver_sql(
+                        """
+                        SELECT n.nspname, c.relname, c.reltuples::bigint,
+                            pg_total_relation_size(c.oid)
+                        FROM pg_class c
+                        JOIN pg_namespace n ON n.oid = c.relnamespace
+                        JOIN unnest(%(schemas)s::text[], %(names)s::text[])
+                            AS t(nspname, relname)
+                          ON t.nspname = n.nspname AND t.relname = c.relname
+                        """,
+                        {
+                            "schemas": [schema for schema, _ in scans],
+                            "names": [name for _, name in scans],
+                        },
+                    )
+                }
+        seq_scans = []
+        for (schema, name), plan_rows in scans.items():
+            rows, size = sizes.get((schema, name), (-1, None))
+            # reltuples is -1 until the relation is first analyzed.
+            rows = max(rows, plan_rows)
+            if rows >= EXPLAIN_LARGE_RELATION_ROWS:
+                seq_scans.append(
+                    {"relation": f"{schema}.{name}", "rows": rows, "bytes": size}
+                )
+        return {
+            "rows": plan["Plan Rows"],
+            "width": plan["Plan Width"],
+            "estimated_bytes": plan["Plan Rows"] * plan["Plan Width"],
+            "startup_cost": plan["Startup Cost"],
+            "total_cost": plan["Total Cost"],
+            "seq_scans": seq_scans,
+            "actual_rows": plan.get("Actual Rows"),
+            "planning_time": explained.get("Planning Time"),
+            "execution_time": explained.get("Execution Time"),
+            "plan": explained,
+        }
+
+    def __check_estimate(self, sql, params, max_estimated_bytes, estimate_action):
+        """
+        Internal function refusing, or warning about, a query whose result
+        the planner estimates at more than max_estimated_bytes.
+        """
+        if estimate_action not in ("raise", "warn"):
+            raise ValueError(
+                f"Unknown estimate_action {estimate_action!r}, use 'raise' or 'warn'."
+            )
+        if max_estimated_bytes is None:
+            return
+        summary = self.explain(sql, params)
+        if summary["estimated_bytes"] <= max_estimated_bytes:
+            return
+        message = (
+            "The query is estimated to return {:,} rows of {} bytes, about {}, "
+            "more than max_estimated_bytes ({}).".format(
+                summary["rows"],
+                summary["width"],
+                _format_bytes(summary["estimated_bytes"]),
+                _format_bytes(max_estimated_bytes),
+            )
+        )
+        for scan in summary["seq_scans"]:
+            message += " It reads all {:,} rows of {}.".format(
+                scan["rows"], scan["relation"]
+            )
+        if estimate_action == "warn":
+            warnings.warn(message, stacklevel=4)
+        else:
+            raise QueryTooLargeError(
+                message + " Add filters or columns, or raise the limit."
+            )
+
+    @instrumented
     def raw_sql(
         self,
         sql,
@@ -507,6 +2205,15 @@ ORDER BY 1;
         return_iter=False,
         dtype=None,
         dtype_backend="numpy_nullable",
+        stream=None,
+        engine="pandas",
+        cache=True,
+        join_values=None,
+        compact=False,
+        max_estimated_bytes=None,
+        estimate_action="raise",
+        prefetch=0,
+        resume_key=None,
     ):
         """
         Queries the database using a raw SQL string.
@@ -543,6 +2250,71 @@ ORDER BY 1;
         :param dtype_backend: (optional) string
           default: "numpy_nullable"
             Allow backend storage type to be changed. e.g. "pyarrow"
+            Each column's dtype follows from its PostgreSQL type, so it is
+            the same in every chunk: e.g. integer is Int32, bigint Int64,
+            double precision and numeric Float64, text and varchar string
+            (stored by pyarrow, if installed), date datetime64[s] and
+            timestamp datetime64[us]. Columns of other types are inferred
+            from their values.
+        :param stream: (optional) boolean or None, default: None
+            Read the result through a server-side (named) cursor, so only
+            one chunk is held in memory at a time. Each chunk is fetched
+            from the server as a batch of chunksize rows, so chunksize is
+            also the fetch size. Defaults to True when return_iter is True.
+            Ignored when chunksize is None.
+        :param engine: (optional) string, default: "pandas"
+            How the result is read:
+            - "pandas" fetches rows through psycopg2 and converts them to
+              each column's dtype.
+            - "copy" exports the result with ``COPY (sql) TO STDOUT`` and parses
+              it with pyarrow's vectorized CSV reader, which is much faster for
+              large results. Requires pyarrow. The result is always streamed,
+              and has the same dtypes as with "pandas", except that numeric
+              columns are returned as text when coerce_float is False, and
+              columns of other types always as text.
+        :param cache: (optional) boolean, default: True
+            Serve the result from, and store it in, the connection's result
+            cache, if it has one. Iterators are never cached. Set to False
+            to always read from the database.
+        :param join_values: (optional) dict, default: None
+            ``{table name: values}`` to upload into temporary tables the
+            query can join against, e.g. 50,000 identifiers that would make
+            an unwieldy ``IN`` list. See :meth:`upload_temp`. Results using
+            join_values are not cached.
+        :param compact: (optional) boolean, default: False
+            Shrink the result with :func:`compact_frame`, choosing each
+            column's dtype from the server's type for it, e.g. smallint
+            as int16, whole-number doubles such as permno as Int32, codes
+            as category and dates as datetime64[s]. This can cut memory
+            use several times over. Columns named in dtype are left as
+            given. Chunks are compacted as they arrive, so with return_iter
+            the dtypes of a column may differ between chunks.
+        :param max_estimated_bytes: (optional) integer, default: None
+            Before running the query, check its size as estimated by
+            :meth:`explain` (rows times average row width on the server)
+            and, if it is larger, do not run it.
+        :param estimate_action: (optional) string, default: "raise"
+            What to do when a query exceeds max_estimated_bytes: "raise"
+            a :class:`QueryTooLargeError`, or "warn" and run it anyway.
+        :param prefetch: (optional) integer, default: 0
+            With chunksize, fetch up to this many chunks of rows ahead in a
+            background thread while the DataFrames are built, so waiting on
+            the network overlaps with decoding. This helps most when
+            streaming from a distant server, and holds up to prefetch + 2
+            chunks of rows in memory. The COPY engine already reads ahead.
+        :param resume_key: (optional) string or list, default: None
+            Column(s) identifying each row of the result, e.g.
+            ["permno", "date"]. The rows are returned ordered by them, and
+            if the connection is lost part way through, the query is
+            resumed after the last row read instead of starting over.
+
+        When the connection to the server is lost, or cannot be opened,
+        queries that only read, such as SELECT queries, are read again on a
+        new connection, retrying with backoff. Queries that mention INSERT,
+        UPDATE, DELETE or MERGE, or use SELECT ... INTO or FOR UPDATE, are
+        not. An iterator that has
+        returned chunks can only continue if resume_key is set; otherwise
+        the error is raised.
 
         :rtype: pandas.DataFrame or or Iterator[pandas.DataFrame]
 
@@ -559,6 +2331,10 @@ ORDER BY 1;
             0000000003 1998-03-10  DEFINED ASSET FUNDS MUNICIPAL INVT TR FD NEW Y..
             ...
 
+        # Join against a large list of identifiers
+        >>> data = db.raw_sql('select d.* from crsp.dsf d join ids using (permno)',
+        ...                   join_values={'ids': portfolio['permno']})
+
         # Parameterized SQL query
         >>> parm = {'syms': ('A', 'AA', 'AAPL'), 'num_shares': 50000}
         >>> data = db.raw_sql('select * from taqmsec.ctm_20030910 where sym_root in %(syms)s and size > %(num_shares)s', params=parm)
@@ -571,28 +2347,591 @@ ORDER BY 1;
             2003-09-10  09:35:20.709000  N       AA       None     None  108100.0  28.200          N      00  1.929947e+15         C  None
         """  # noqa
 
-        try:
-            df = pd.read_sql_query(
+        if engine not in ("pandas", "copy"):
+            raise ValueError(f"Unknown engine {engine!r}, use 'pandas' or 'copy'.")
+        if stream is None:
+            stream = return_iter
+        if join_values:
+            kwargs = {
+                "coerce_float": coerce_float,
+                "date_cols": date_cols,
+                "index_col": index_col,
+                "params": params,
+                "chunksize": chunksize,
+                "return_iter": return_iter,
+                "dtype": dtype,
+                "dtype_backend": dtype_backend,
+                "stream": stream,
+                "engine": engine,
+                "cache": False,
+                "compact": compact,
+                "max_estimated_bytes": max_estimated_bytes,
+                "estimate_action": estimate_action,
+                "prefetch": prefetch,
+                "resume_key": resume_key,
+            }
+            if return_iter:
+                return self.__iter_with_temp_tables(join_values, sql, kwargs)
+            with self.__temp_tables(join_values):
+                return self.raw_sql(sql, **kwargs)
+        key = None
+        if cache and self._result_cache is not None and not return_iter:
+            options = {
+                "coerce_float": coerce_float,
+                "date_cols": date_cols,
+                "index_col": index_col,
+                "dtype": dtype,
+                "dtype_backend": dtype_backend,
+                "engine": engine,
+                "compact": compact,
+            }
+            if resume_key is not None:
+                options["resume_key"] = resume_key
+            try:
+                key = self._result_cache.key(
+                    self.__metadata_scope(), sql, params, options
+                )
+            except TypeError as err:
+                warnings.warn(f"Reading without the result cache: {err}", stacklevel=3)
+        if key is not None:
+            df = self._result_cache.get(key, dtype_backend)
+            stats = current_stats()
+            if stats is not None:
+                stats.cached = df is not None
+                if stats.sql is None:
+                    stats.sql = sql
+            if df is None:
+                df = self.raw_sql(
+                    sql,
+                    params=params,
+                    chunksize=chunksize,
+                    stream=stream,
+                    cache=False,
+                    max_estimated_bytes=max_estimated_bytes,
+                    estimate_action=estimate_action,
+                    prefetch=prefetch,
+                    **options,
+                )
+                self._result_cache.set(key, df, sql)
+            return df
+        if compact:
+            types = self.__result_types(sql, params)
+            if isinstance(dtype, dict):
+                types = {name: oid for name, oid in types.items() if name not in dtype}
+            elif dtype is not None:
+                types = {}
+            df = self.raw_sql(
                 sql,
-                self.connection,
                 coerce_float=coerce_float,
-                parse_dates=date_cols,
+                date_cols=date_cols,
                 index_col=index_col,
+                params=params,
                 chunksize=chunksize,
+                return_iter=True,
+                dtype=dtype,
+                dtype_backend=dtype_backend,
+                stream=stream,
+                engine=engine,
+                cache=False,
+                max_estimated_bytes=max_estimated_bytes,
+                estimate_action=estimate_action,
+                prefetch=prefetch,
+                resume_key=resume_key,
+            )
+            if isinstance(df, pd.DataFrame):
+                return compact_frame(df, types)
+            chunks = (compact_frame(chunk, types) for chunk in df)
+            return chunks if return_iter else _assemble_chunks(chunks)
+        self.__check_estimate(sql, params, max_estimated_bytes, estimate_action)
+
+        def read(sql, params):
+            if engine == "copy":
+                return self.__copy_query(
+                    sql,
+                    params,
+                    chunksize,
+                    coerce_float,
+                    date_cols,
+                    index_col,
+                    dtype,
+                    dtype_backend,
+                )
+            if chunksize is None:
+                return self.__read_all(
+                    sql,
+                    params,
+                    coerce_float=coerce_float,
+                    date_cols=date_cols,
+                    index_col=index_col,
+                    dtype=dtype,
+                    dtype_backend=dtype_backend,
+                )
+            return self.__read_chunks(
+                sql,
+                chunksize,
+                stream,
+                coerce_float=coerce_float,
+                date_cols=date_cols,
+                index_col=index_col,
                 params=params,
                 dtype=dtype,
                 dtype_backend=dtype_backend,
+                prefetch=prefetch,
             )
-            if return_iter or chunksize is None:
-                return df
-            else:
-                full_df = pd.DataFrame()
-                for chunk in df:
-                    full_df = pd.concat([full_df, chunk])
-                return full_df
-        except sa.exc.ProgrammingError as e:
-            raise e
 
+        if isinstance(resume_key, str):
+            resume_key = [resume_key]
+        df = self.__retry_chunks(
+            read, sql, params, resume_key, hold=not return_iter or chunksize is None
+        )
+        if return_iter and chunksize is not None:
+            return df
+        else:
+            return _assemble_chunks(df)
+
+    def __read_all(self, sql, params, **kwargs):
+        """
+        Internal generator yielding a whole query result, read with
+        _read_frames on a pooled connection, as one DataFrame.
+        """
+        with self.__checkout() as conn:
+            yield _assemble_chunks(_read_frames(conn, sql, params, **kwargs))
+
+    def __retry_chunks(self, read, sql, params, resume_key=None, hold=False):
+        """
+        Internal generator yielding the chunks of read(sql, params), and
+        reading them again on a new connection, after a backoff, when the
+        connection to the server is lost.
+
+        With resume_key, the query is ordered by its columns and resumed
+        after the last row read. Without it, the query is run again from
+        the start, which is only possible until the first chunk has been
+        yielded, or with hold, which keeps the chunks back until the whole
+        result has been read. Queries that may write, and queries on a
+        connection pinned by upload_temp, whose temporary tables a new
+        connection would not see, are not retried.
+        """
+        retry = (
+            self._retries > 0
+            and _is_read_query(sql)
+            and getattr(self._pinned, "conn", None) is None
+        )
+        delays = _backoff_delays(self._retries, self._retry_delay)
+        held = []
+        after = None
+        yielded = False
+        while True:
+            query, query_params = sql, params
+            if resume_key is not None:
+                query, query_params = _resume_query(sql, params, resume_key, after)
+            chunks = read(query, query_params)
+            try:
+                for chunk in chunks:
+                    if resume_key is not None and len(chunk):
+                        after = _last_key(chunk, resume_key)
+                    # Retries count from the last progress made.
+                    delays = _backoff_delays(self._retries, self._retry_delay)
+                    if hold and resume_key is None:
+                        held.append(chunk)
+                    else:
+                        yielded = True
+                        yield chunk
+                break
+            except (sa.exc.DBAPIError, psycopg2.Error) as err:
+                delay = next(delays, None) if retry else None
+                if (
+                    delay is None
+                    or not _is_transient(err)
+                    or (yielded and resume_key is None)
+                ):
+                    raise
+                held.clear()
+                print(f"Lost the connection to the server, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+            finally:
+                chunks.close()
+        yield from held
+
+    def __read_chunks(self, sql, chunksize, stream, **kwargs):
+        """
+        Internal generator yielding chunks of a query result read with
+        _read_frames on a pooled connection, which is returned to the pool once the
+        generator finishes or is discarded.
+
+        With stream, the result is read through a server-side cursor.
+        libpq otherwise buffers a whole result set client-side before
+        psycopg2 returns the first row, so chunking alone does not bound
+        memory. A named cursor instead fetches chunksize rows per round trip.
+        Named cursors need a transaction, so the connection is switched from
+        AUTOCOMMIT to READ COMMITTED; the pool resets it on return.
+        """
+        with self.__checkout() as conn:
+            if not stream:
+                yield from _read_frames(conn, sql, chunksize=chunksize, **kwargs)
+                return
+            if conn.in_transaction():
+                # A pinned connection may have autobegun a transaction, which
+                # does nothing under AUTOCOMMIT but blocks isolation changes.
+                conn.commit()
+            conn = conn.execution_options(
+                isolation_level="READ COMMITTED",
+                stream_results=True,
+                max_row_buffer=chunksize,
+            )
+            try:
+                yield from _read_frames(conn, sql, chunksize=chunksize, **kwargs)
+            finally:
+                # Leave the connection as it was found, which matters when it
+                # is pinned by upload_temp and used for further queries.
+                if not conn.invalidated:
+                    conn.rollback()
+                    conn.execution_options(
+                        isolation_level="AUTOCOMMIT", stream_results=False
+                    )
+
+    def __result_types(self, sql, params=None):
+        """
+        Internal function returning ``{column name: PostgreSQL type OID}``
+        of a query's result, from the description of the query run with
+        LIMIT 0, so no rows are read.
+        """
+        with self.__checkout() as conn:
+            cursor = conn.connection.cursor()
+            try:
+                if params is not None:
+                    sql = cursor.mogrify(sql, params).decode()
+                sql = sql.strip().rstrip(";")
+                # The newline ends any trailing -- comment before the paren.
+                cursor.execute(f"SELECT * FROM ({sql}\n) AS wrds_types LIMIT 0")
+                return {col.name: col.type_code for col in cursor.description}
+            finally:
+                cursor.close()
+
+    def __copy_batches(self, sql, params=None, coerce_float=True):
+        """
+        Internal generator yielding Arrow record batches of a query result
+        exported with COPY (query) TO STDOUT.
+
+        The server writes CSV into a pipe from a background thread while
+        pyarrow's multi-threaded CSV reader parses it into columnar batches,
+        so no Python object is built per value. Column types come from the
+        query's result description, so they do not depend on the first
+        block of data. The COPY runs on its own pooled connection.
+        """
+        pa, pacsv = _import_pyarrow()
+        with self.__checkout() as conn:
+            clean = False
+            try:
+                cursor = conn.connection.cursor()
+                if params is not None:
+                    sql = cursor.mogrify(sql, params).decode()
+                sql = sql.strip().rstrip(";")
+                with timed(current_stats(), "server_time"):
+                    # The newline ends any trailing -- comment before the paren.
+                    cursor.execute(f"SELECT * FROM ({sql}\n) AS wrds_copy LIMIT 0")
+                names = [col.name for col in cursor.description]
+                schema = pa.schema(
+                    [
+                        (
+                            col.name,
+                            _copy_arrow_type(pa, col.type_code, coerce_float),
+                        )
+                        for col in cursor.description
+                    ]
+                )
+                read_fd, write_fd = os.pipe()
+                errors = []
+
+                def copy_out():
+                    try:
+                        with open(write_fd, "wb") as fd:
+                            cursor.copy_expert(
+                                f"COPY ({sql}\n) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                                fd,
+                            )
+                    except Exception as err:  # noqa: BLE001 - raised by the reader
+                        # Includes BrokenPipeError when the reader is abandoned.
+                        errors.append(err)
+
+                writer = threading.Thread(target=copy_out, daemon=True)
+                writer.start()
+                try:
+                    with open(read_fd, "rb") as fd:
+                        reader = pacsv.open_csv(
+                            fd,
+                            read_options=pacsv.ReadOptions(
+                                column_names=names, skip_rows=1
+                            ),
+                            convert_options=pacsv.ConvertOptions(
+                                column_types=schema,
+                                null_values=[""],
+                                strings_can_be_null=True,
+                                quoted_strings_can_be_null=False,
+                                true_values=["t"],
+                                false_values=["f"],
+                            ),
+                        )
+                        yield pa.RecordBatch.from_pylist([], schema=schema)
+                        yield from reader
+                except pa.ArrowInvalid:
+                    # A failed COPY leaves a truncated stream; report its error.
+                    writer.join()
+                    if errors:
+                        raise errors[0]
+                    raise
+                finally:
+                    writer.join()
+                if errors:
+                    raise errors[0]
+                clean = True
+            finally:
+                if not clean:
+                    # An interrupted COPY leaves the connection unusable.
+                    conn.invalidate()
+
+    def __copy_query(
+        self,
+        sql,
+        params,
+        chunksize,
+        coerce_float,
+        date_cols,
+        index_col,
+        dtype,
+        dtype_backend,
+    ):
+        """
+        Internal generator yielding DataFrame chunks read with the COPY engine.
+        """
+        stats = current_stats()
+        if stats is not None and stats.sql is None:
+            stats.sql = sql
+        tables = _rebatch(self.__copy_batches(sql, params, coerce_float), chunksize)
+        while True:
+            with timed(stats, "fetch_time"):
+                table = next(tables, None)
+            if table is None:
+                return
+            if stats is not None and table.num_rows:
+                stats.first_row()
+            with timed(stats, "build_time"):
+                df = _arrow_to_pandas(table, dtype_backend)
+                df = _finish_frame(df, date_cols, index_col, dtype)
+            if stats is not None:
+                stats.add("chunks", 1)
+            yield df
+
+    @instrumented
+    def raw_sql_arrow(
+        self, sql, params=None, coerce_float=True, return_reader=False, engine="copy"
+    ):
+        """
+        Queries the database and returns the result as Arrow data, without
+        building Python objects for its values or going through pandas.
+
+        The result can be handed to Polars (``polars.from_arrow``), DuckDB
+        or written to Parquet as it is. ``table.to_pandas(
+        types_mapper=pd.ArrowDtype)`` turns it into a DataFrame backed by
+        the same Arrow buffers, as raw_sql(dtype_backend="pyarrow") returns.
+
+        :param sql: SQL code in string object.
+        :param params: parameters to SQL query, if parameterized.
+        :param coerce_float: (optional) boolean, default: True
+            Return numeric columns as float64. Otherwise they are returned
+            as strings, which keep their exact decimal values.
+        :param return_reader: (optional) boolean, default: False
+            Return a pyarrow.RecordBatchReader streaming the result, rather
+            than reading all of it into a Table. The query's connection is
+            held until the reader is exhausted.
+        :param engine: (optional) string, default: "copy"
+            - "copy" reads the result with ``COPY ... TO STDOUT`` and
+              pyarrow's multi-threaded CSV reader on a pooled connection.
+              Columns have the same types as with raw_sql's engines, and
+              other types are returned as strings.
+            - "adbc" reads it in PostgreSQL's binary format with the ADBC
+              driver (pip install wrds[adbc]), which decodes it straight
+              into Arrow arrays, on a connection of its own. Types without
+              an Arrow equivalent, e.g. json, are returned as strings,
+              while arrays and intervals keep Arrow types of their own.
+              Temporary tables from :meth:`upload_temp` are not visible.
+
+        :rtype: pyarrow.Table or pyarrow.RecordBatchReader
+
+        Usage::
+        >>> table = db.raw_sql_arrow('select permno, date, ret from crsp.dsf')
+        >>> df = polars.from_arrow(table)
+        """
+        pa, _ = _import_pyarrow()
+        if engine == "adbc":
+            batches = self.__adbc_batches(sql, params, coerce_float)
+        elif engine == "copy":
+            batches = self.__copy_batches(sql, params, coerce_float)
+        else:
+            raise ValueError(f"Unknown engine {engine!r}, use 'adbc' or 'copy'.")
+        stats = current_stats()
+        if stats is not None and stats.sql is None:
+            stats.sql = sql
+        # Both generators start with an empty batch carrying the schema.
+        with timed(stats, "server_time"):
+            schema = next(batches).schema
+        if return_reader:
+            return pa.RecordBatchReader.from_batches(schema, batches)
+        with timed(stats, "fetch_time"):
+            return pa.Table.from_batches(list(batches), schema=schema)
+
+    def __adbc_uri(self):
+        """
+        Internal function returning the libpq connection URI of the
+        engine, with its connect_args, for the ADBC driver.
+        """
+        url = self.engine.url.set(drivername="postgresql")
+        url = url.update_query_dict(
+            {key: str(value) for key, value in self._connect_args.items()}
+        )
+        return url.render_as_string(hide_password=False)
+
+    def __adbc_batches(self, sql, params=None, coerce_float=True):
+        """
+        Internal generator yielding Arrow record batches of a query result
+        read with the ADBC PostgreSQL driver on a connection of its own,
+        starting with an empty batch that carries the schema.
+        """
+        pa, _ = _import_pyarrow()
+        dbapi = _import_adbc()
+        if dbapi is None:
+            raise ImportError(
+                "The adbc engine requires the ADBC PostgreSQL driver. "
+                "Install it with: pip install wrds[adbc]"
+            )
+        if params is not None:
+            # ADBC binds $n parameters; render pyformat ones as psycopg2 would.
+            with self.__checkout() as conn:
+                sql = conn.connection.cursor().mogrify(sql, params).decode()
+        with dbapi.connect(self.__adbc_uri()) as conn, conn.cursor() as cursor:
+            cursor.execute(sql)
+            reader = cursor.fetch_record_batch()
+            schema, convert = _adbc_converter(pa, reader.schema, coerce_float)
+            yield pa.RecordBatch.from_pylist([], schema=schema)
+            for batch in reader:
+                yield convert(batch)
+
+    @contextlib.contextmanager
+    def upload_temp(self, data, name):
+        """
+        Uploads values into a temporary table for the duration of a with
+        block, so large lists of identifiers can be joined against instead
+        of being spelled out in the query.
+
+        The values are streamed to the server with COPY and the table is
+        analyzed, so the planner sees its real size. Queries run from the
+        same thread inside the block use the connection holding the table;
+        parallel reads, which use other connections, cannot see it. The
+        table is dropped when the block exits.
+
+        For a few thousand values, a single array parameter is often
+        enough: ``WHERE permno = ANY(%(ids)s)`` with ``params={'ids': list}``.
+
+        :param data: pandas.DataFrame, pandas.Series or list of values.
+            A DataFrame's columns, or a Series' name, become the table's
+            column names; a list or unnamed Series becomes a column named
+            "value". Column types follow the dtypes, e.g. bigint, double
+            precision, date, timestamp or text.
+        :param name: name of the temporary table.
+
+        :rtype: str, the name of the table
+
+        Usage::
+        >>> with db.upload_temp(permnos, 'ids'):
+        ...     data = db.raw_sql('select d.* from crsp.dsf d join ids using (permno)')
+        """
+        if isinstance(data, pd.Series):
+            data = data.to_frame(name=data.name if data.name is not None else "value")
+        elif not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame({"value": list(data)})
+        table = _quote_ident(name)
+        columns = ", ".join(_quote_ident(str(col)) for col in data.columns)
+        definition = ", ".join(
+            f"{_quote_ident(str(col))} {_temp_column_type(data[col])}"
+            for col in data.columns
+        )
+        # COPY reads unquoted empty fields as NULL and quoted ones as empty
+        # strings, so every value is quoted and NULLs are written as NUL
+        # characters, which text values cannot hold, then unquoted.
+        text = data.to_csv(
+            index=False, header=False, quoting=csv.QUOTE_ALL, na_rep="\0"
+        )
+        buffer = io.StringIO(text.replace('"\0"', ""))
+
+        with self.__checkout() as conn:
+            try:
+                with self.__pin(conn):
+                    conn.exec_driver_sql(f"DROP TABLE IF EXISTS pg_temp.{table}")
+                    conn.exec_driver_sql(
+                        f"CREATE TEMPORARY TABLE {table} ({definition})"
+                    )
+                    cursor = conn.connection.cursor()
+                    cursor.copy_expert(
+                        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                        buffer,
+                    )
+                    conn.exec_driver_sql(f"ANALYZE {table}")
+                    yield name
+            finally:
+                if not conn.invalidated:
+                    conn.exec_driver_sql(f"DROP TABLE IF EXISTS pg_temp.{table}")
+
+    @contextlib.contextmanager
+    def __pin(self, conn):
+        """
+        Internal context manager making queries from this thread run on
+        conn, or on pooled connections again if conn is None.
+        """
+        outer = getattr(self._pinned, "conn", None)
+        self._pinned.conn = conn
+        try:
+            yield
+        finally:
+            self._pinned.conn = outer
+
+    @contextlib.contextmanager
+    def __temp_tables(self, join_values):
+        """
+        Internal context manager uploading each of {name: values} into a
+        temporary table with upload_temp.
+        """
+        with contextlib.ExitStack() as stack:
+            for name, values in join_values.items():
+                stack.enter_context(self.upload_temp(values, name))
+            yield
+
+    def __iter_with_temp_tables(self, join_values, sql, kwargs):
+        """
+        Internal generator yielding raw_sql chunks read while the temporary
+        tables of join_values exist.
+
+        The thread is pinned to the connection holding the tables only
+        while the query runs and each chunk is read, not while the
+        generator is suspended, so that other queries the caller runs
+        between chunks use pooled connections, and not the one holding
+        this query's cursor.
+        """
+        outer = getattr(self._pinned, "conn", None)
+        with self.__temp_tables(join_values):
+            conn = self._pinned.conn
+            chunks = self.raw_sql(sql, **kwargs)
+            try:
+                while True:
+                    with self.__pin(conn):
+                        chunk = next(chunks, None)
+                    if chunk is None:
+                        return
+                    with self.__pin(outer):
+                        yield chunk
+            finally:
+                with self.__pin(conn):
+                    chunks.close()
+
+    @instrumented
     def get_table(
         self,
         library,
@@ -604,6 +2943,23 @@ ORDER BY 1;
         coerce_float=True,
         index_col=None,
         date_cols=None,
+        chunksize=500000,
+        return_iter=False,
+        stream=None,
+        engine="pandas",
+        parallel=None,
+        partition_by=None,
+        cache=True,
+        where=None,
+        filters=None,
+        order_by=None,
+        params=None,
+        compact=False,
+        max_estimated_bytes=None,
+        estimate_action="raise",
+        prefetch=0,
+        dtype_backend="numpy_nullable",
+        resume_key=None,
     ):
         """
         Creates a data frame from an entire table in the database.
@@ -638,8 +2994,72 @@ ORDER BY 1;
         :param index_col: (optional) string or list of strings,
           default: None
             Column(s) to set as index(MultiIndex)
-
-        :rtype: pandas.DataFrame
+        :param chunksize: (optional) integer or None default: 500000
+            Process query in chunks of this size. See :meth:`raw_sql`.
+        :param return_iter: (optional) boolean, default:False
+            When chunksize is not None, return an iterator where chunksize
+            number of rows is included in each chunk.
+        :param stream: (optional) boolean or None, default: None
+            Read the table through a server-side cursor. See :meth:`raw_sql`.
+        :param engine: (optional) string, default: "pandas"
+            "pandas" or "copy". See :meth:`raw_sql`.
+        :param parallel: (optional) int, default: None
+            Split the table into this many ranges of partition_by and read
+            them concurrently, each on its own pooled connection. Range
+            bounds come from the column's pg_stats histogram when available,
+            otherwise from its min and max. Rows are returned grouped by
+            range, in range order, followed by rows where partition_by is
+            NULL. With return_iter, each range is read in chunks of
+            chunksize rows, at most two of which per range are held while
+            the caller catches up. Cannot be combined with rows or offset.
+        :param partition_by: (optional) string, default: None
+            Column used to split the table when parallel is set, ideally
+            an indexed one such as permno, gvkey or date.
+        :param cache: (optional) boolean, default: True
+            Use the connection's table store or, without one, its result
+            cache, if it has either. See :meth:`raw_sql` and
+            :class:`wrds.TableStore`.
+        :param where: (optional) string, default: None
+            SQL condition rows must meet, e.g. "date >= %(start)s", with
+            its parameters in params. Use %% for a literal percent sign.
+        :param filters: (optional) list of tuples, default: None
+            Conditions as (column, operator, value) tuples, all of which rows
+            must meet. Operators are =, !=, <, <=, >, >=, like, ilike,
+            not like, not ilike, in and not in (with a list, array or Series
+            of values), between (with a (low, high) tuple), and is and
+            is not (with None). Values are passed as query parameters.
+        :param order_by: (optional) string or list, default: None
+            Column(s) to sort by. Each is a column name, sorted ascending,
+            or a (column, "asc" or "desc") tuple. Cannot be combined with
+            parallel.
+        :param params: (optional) dict, default: None
+            Parameters to the where condition.
+        :param compact: (optional) boolean, default: False
+            Shrink the result to the narrowest dtypes for its columns'
+            server types. See :meth:`raw_sql`.
+        :param max_estimated_bytes: (optional) integer, default: None
+            Refuse to read the table, or warn, if the planner estimates the
+            result at more bytes than this. See :meth:`raw_sql`.
+        :param estimate_action: (optional) string, default: "raise"
+            "raise" a :class:`QueryTooLargeError` or "warn" when the
+            estimate exceeds max_estimated_bytes.
+        :param prefetch: (optional) integer, default: 0
+            Chunks of rows to fetch ahead in a background thread while
+            DataFrames are built. See :meth:`raw_sql`.
+        :param dtype_backend: (optional) string, default: "numpy_nullable"
+            Backend of the DataFrame's dtypes. See :meth:`raw_sql`. Tables
+            served from a table store with "pyarrow" share the stored file's
+            memory instead of copying it.
+        :param resume_key: (optional) string or list, default: None
+            Column(s) identifying each row, e.g. ["permno", "date"], so a
+            read that loses its connection part way through resumes after
+            the last row read. Rows are returned ordered by them. See
+            :meth:`raw_sql`.
+
+        where and filters are applied by the server, so only the matching
+        rows are transferred, and can use the table's indexes.
+
+        :rtype: pandas.DataFrame or Iterator[pandas.DataFrame]
 
         Usage ::
         >>> data = db.get_table('wrdssec_all', 'dforms', rows=1000, columns=['cik', 'fdate', 'coname'])
@@ -652,6 +3072,12 @@ ORDER BY 1;
             0000000003 1998-03-10  DEFINED ASSET FUNDS MUNICIPAL INVT TR FD NEW Y..
             ...
 
+        # Filter on the server
+        >>> data = db.get_table('crsp', 'dsf', columns=['permno', 'date', 'ret'],
+        ...                     filters=[('date', '>=', '2020-01-01'),
+        ...                              ('permno', 'in', [10107, 14593])],
+        ...                     order_by=['permno', 'date'])
+
         """  # noqa
 
         # Provide backward compatibility for `obs` instead of rows.
@@ -666,19 +3092,681 @@ ORDER BY 1;
             cols = "*"
         else:
             cols = ",".join(columns)
+        if parallel is not None and parallel > 1:
+            if partition_by is None:
+                raise ValueError("partition_by is required when parallel is set.")
+            if rows >= 0 or offset:
+                raise ValueError("parallel cannot be combined with rows or offset.")
+            if order_by is not None:
+                raise ValueError("parallel cannot be combined with order_by.")
+        conditions = []
+        params = dict(params or {})
+        if where:
+            conditions.append(f"({where})")
+        if filters:
+            condition, filter_params = _compile_filters(filters)
+            conditions.append(condition)
+            params.update(filter_params)
+        wherestmt = " WHERE " + " AND ".join(conditions) if conditions else ""
+        orderstmt = ""
+        if order_by is not None:
+            orderstmt = " ORDER BY " + _compile_order_by(order_by)
         if self.__check_schema_perms(library):
-            sqlstmt = (
-                "SELECT {cols} FROM {schema}.{table} {rowsstmt} OFFSET {offset}".format(
-                    cols=cols,
-                    schema=library,
-                    table=table,
-                    rowsstmt=rowsstmt,
-                    offset=offset,
+            is_parallel = parallel is not None and parallel > 1
+            if is_parallel:
+                sqlstmt = f"SELECT {cols} FROM {library}.{table}{wherestmt}"
+            else:
+                sqlstmt = (
+                    f"SELECT {cols} FROM {library}.{table}{wherestmt}{orderstmt} "
+                    f"{rowsstmt} OFFSET {offset}"
                 )
+            store = self._table_store if cache and not return_iter else None
+            if store is not None:
+                options = {
+                    "coerce_float": coerce_float,
+                    "date_cols": date_cols,
+                    "index_col": index_col,
+                    "dtype_backend": dtype_backend,
+                    "engine": engine,
+                    "compact": compact,
+                    # Parallel reads return rows grouped by range.
+                    "partition_by": partition_by if is_parallel else None,
+                }
+                if resume_key is not None:
+                    options["resume_key"] = resume_key
+                try:
+                    key = store.key(
+                        self.__metadata_scope(),
+                        library,
+                        table,
+                        sqlstmt,
+                        params or None,
+                        options,
+                    )
+                except TypeError as err:
+                    warnings.warn(
+                        f"Reading without the table store: {err}", stacklevel=3
+                    )
+                    store = None
+                    cache = False
+            if store is not None:
+                df = store.get(key, dtype_backend)
+                stats = current_stats()
+                if stats is not None:
+                    stats.cached = df is not None
+                    if stats.sql is None:
+                        stats.sql = sqlstmt
+                if df is not None:
+                    return df
+                # Keep the table in the store only, not in the result cache too.
+                cache = False
+            if is_parallel:
+                # Check the whole table once rather than each range.
+                self.__check_estimate(
+                    sqlstmt,
+                    params or None,
+                    max_estimated_bytes,
+                    estimate_action,
+                )
+                df = self.__get_table_parallel(
+                    library,
+                    table,
+                    cols,
+                    parallel,
+                    partition_by,
+                    " AND ".join(conditions),
+                    params,
+                    coerce_float=coerce_float,
+                    index_col=index_col,
+                    date_cols=date_cols,
+                    chunksize=chunksize,
+                    return_iter=return_iter,
+                    engine=engine,
+                    cache=cache,
+                    compact=compact,
+                    prefetch=prefetch,
+                    dtype_backend=dtype_backend,
+                    resume_key=resume_key,
+                )
+            else:
+                df = self.raw_sql(
+                    sqlstmt,
+                    params=params or None,
+                    coerce_float=coerce_float,
+                    index_col=index_col,
+                    date_cols=date_cols,
+                    chunksize=chunksize,
+                    return_iter=return_iter,
+                    stream=stream,
+                    engine=engine,
+                    cache=cache,
+                    compact=compact,
+                    max_estimated_bytes=max_estimated_bytes,
+                    estimate_action=estimate_action,
+                    prefetch=prefetch,
+                    dtype_backend=dtype_backend,
+                    resume_key=resume_key,
+                )
+            if store is not None:
+                store.set(key, df, library, table, sqlstmt)
+            return df
+
+    def __partition_bounds(self, library, table, column, parts):
+        """
+        Internal function returning up to parts - 1 increasing cut points that
+        split a column into ranges of roughly equal row counts.
+
+        The column's pg_stats histogram is equi-depth, so evenly spaced
+        histogram bounds are used when the table has been analyzed. Columns
+        with few distinct values have no histogram and are cut at their most
+        common values instead. Without statistics, the range between the
+        column's min and max is split evenly.
+        """
+        stats = """
+            SELECT format_type(a.atttypid, a.atttypmod),
+                COALESCE(s.histogram_bounds, s.most_common_vals)::text
+            FROM pg_attribute a
+            LEFT JOIN pg_stats s
+              ON s.schemaname = %(schema)s
+                AND s.tablename = %(table)s
+                AND s.attname = a.attname
+            WHERE a.attrelid = to_regclass(%(relation)s)
+              AND a.attname = %(column)s
+        """
+        params = {
+            "schema": library,
+            "table": table,
+            "column": column,
+            "relation": f"{library}.{table}",
+        }
+        with self.__checkout() as conn:
+            result = conn.exec_driver_sql(stats, params).fetchone()
+            if result is None:
+                raise ValueError(f"Column {column} not found in {library}.{table}.")
+            coltype, histogram = result
+
+            if histogram is not None:
+                # Let the server parse the bounds back into the column's type.
+                bounds = [
+                    row[0]
+                    for row in conn.exec_driver_sql(
+                        f"SELECT b FROM unnest(%(bounds)s::{coltype}[]) AS b ORDER BY b",
+                        {"bounds": histogram},
+                    )
+                ]
+                last = len(bounds) - 1
+                cuts = [bounds[round(i * last / parts)] for i in range(1, parts)]
+            else:
+                low, high = conn.exec_driver_sql(
+                    f"SELECT min({column}), max({column}) FROM {library}.{table}"
+                ).fetchone()
+                if low is None:
+                    return []
+                try:
+                    cuts = [low + (high - low) * i / parts for i in range(1, parts)]
+                except TypeError:
+                    raise ValueError(
+                        f"Cannot split {column} ({coltype}) into ranges without "
+                        f"statistics. Run ANALYZE on {library}.{table} or choose a "
+                        "numeric or date column."
+                    ) from None
+                if isinstance(low, int):
+                    cuts = [int(cut) for cut in cuts]
+        return sorted(set(cuts))
+
+    def __get_table_parallel(
+        self,
+        library,
+        table,
+        cols,
+        parallel,
+        partition_by,
+        where,
+        where_params,
+        return_iter,
+        **kwargs,
+    ):
+        """
+        Internal function reading ranges of a table concurrently.
+
+        Each range is read by raw_sql, which checks out its own connection
+        from the pool, so the threads never share a connection.
+        """
+        if kwargs.get("chunksize") is None:
+            kwargs["chunksize"] = 500000
+        cuts = self.__partition_bounds(library, table, partition_by, parallel)
+        column = _quote_ident(partition_by)
+        conditions = []
+        for i in range(len(cuts) + 1):
+            # Prefixed like filter parameters, so a where condition's own
+            # parameters are never replaced by the bounds.
+            params = {}
+            bounds = []
+            if i > 0:
+                params["wrds_range_lower"] = cuts[i - 1]
+                bounds.append(f"{column} >= %(wrds_range_lower)s")
+            if i < len(cuts):
+                params["wrds_range_upper"] = cuts[i]
+                bounds.append(f"{column} < %(wrds_range_upper)s")
+            condition = " AND ".join(bounds) or "TRUE"
+            conditions.append((f"{column} IS NOT NULL AND {condition}", params))
+        conditions.append((f"{column} IS NULL", {}))
+
+        stats = current_stats()
+
+        def read_range(condition, params):
+            if where:
+                condition = f"{condition} AND {where}"
+            sqlstmt = f"SELECT {cols} FROM {library}.{table} WHERE {condition}"
+            params = {**where_params, **params}
+            # Time the range towards the get_table call that started it.
+            with Instrumentation.activate(stats):
+                return self.raw_sql(sqlstmt, params=params, stream=True, **kwargs)
+
+        executor = ThreadPoolExecutor(
+            max_workers=parallel, thread_name_prefix="wrds-get-table"
+        )
+        if not return_iter:
+            futures = [executor.submit(read_range, *cond) for cond in conditions]
+            executor.shutdown(wait=False)
+            try:
+                return _assemble_chunks(future.result() for future in futures)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        def range_chunks(condition, params):
+            with Instrumentation.activate(stats):
+                yield from read_range(condition, params)
+
+        # Each worker reads its range's chunks one ahead of the caller, so
+        # at most two chunks per worker are held however large the table.
+        kwargs["return_iter"] = True
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=1) for _ in conditions]
+        futures = [
+            executor.submit(_produce, range_chunks(*cond), items, stop)
+            for cond, items in zip(conditions, queues)
+        ]
+        executor.shutdown(wait=False)
+
+        def results():
+            try:
+                for items in queues:
+                    yield from _consume(items)
+            finally:
+                # Stop the ranges if one failed or the caller gave up.
+                stop.set()
+                for future in futures:
+                    future.cancel()
+
+        return results()
+
+    @instrumented
+    def iter_table(
+        self,
+        library,
+        table,
+        key,
+        page_size=500000,
+        columns=None,
+        start_after=None,
+        coerce_float=True,
+        index_col=None,
+        date_cols=None,
+        engine="pandas",
+    ):
+        """
+        Iterates over a table in pages ordered by a key, using keyset
+        pagination instead of OFFSET.
+
+        Each page is read with ``WHERE (key) > (last key seen) ORDER BY key
+        LIMIT page_size``, so with an index on the key every page costs the
+        same no matter how far into the table it is. Unlike
+        ``get_table(rows=..., offset=...)``, whose OFFSET makes the server
+        read and discard every earlier row, paging through a whole table
+        stays linear.
+
+        An interrupted extract can be resumed by passing the key of the last
+        row it received as start_after.
+
+        :param library: Postgres schema name.
+        :param table: Postgres table name.
+        :param key: string or list of strings
+            Column(s) to order and paginate by. The combination should be
+            unique, e.g. ['permno', 'date'] for crsp.dsf, otherwise rows
+            sharing the key at a page boundary are skipped. Rows where any
+            key column is NULL are not returned.
+        :param page_size: (optional) int, default: 500000
+            Number of rows in each page.
+        :param columns: (optional) list or tuple, default: None
+            Specifies the columns to be included in the output data frames.
+            The key columns are always included.
+        :param start_after: (optional) value or tuple of values, default: None
+            Only return rows whose key is greater than this one.
+        :param coerce_float: (optional) boolean, default: True
+            See :meth:`raw_sql`.
+        :param index_col: (optional) string or list of strings, default: None
+            Column(s) to set as index(MultiIndex)
+        :param date_cols: (optional) list or dict, default: None
+            See :meth:`raw_sql`.
+        :param engine: (optional) string, default: "pandas"
+            "pandas" or "copy". See :meth:`raw_sql`.
+
+        :rtype: Iterator[pandas.DataFrame]
+
+        Usage ::
+        >>> for page in db.iter_table('crsp', 'dsf', key=['permno', 'date']):
+        ...     last_key = tuple(page[['permno', 'date']].iloc[-1])
+        ...     process(page)
+        >>> # Resume after a failure
+        >>> pages = db.iter_table('crsp', 'dsf', key=['permno', 'date'],
+        ...                       start_after=last_key)
+        """
+        keys = [key] if isinstance(key, str) else list(key)
+        if columns is None:
+            cols = "*"
+        else:
+            cols = ",".join(list(columns) + [k for k in keys if k not in columns])
+        if start_after is not None and not isinstance(start_after, (tuple, list)):
+            start_after = (start_after,)
+        if start_after is not None and len(start_after) != len(keys):
+            raise ValueError("start_after must have one value per key column.")
+
+        keylist = ", ".join(keys)
+        not_null = " AND ".join(f"{k} IS NOT NULL" for k in keys)
+        placeholders = ", ".join(f"%(key_{i})s" for i in range(len(keys)))
+        if self.__check_schema_perms(library):
+            last = start_after
+            while True:
+                where = not_null
+                params = None
+                if last is not None:
+                    where += f" AND ({keylist}) > ({placeholders})"
+                    params = {f"key_{i}": _to_param(v) for i, v in enumerate(last)}
+                sqlstmt = (
+                    f"SELECT {cols} FROM {library}.{table} WHERE {where} "
+                    f"ORDER BY {keylist} LIMIT {page_size}"
+                )
+                page = self.raw_sql(
+                    sqlstmt,
+                    params=params,
+                    coerce_float=coerce_float,
+                    date_cols=date_cols,
+                    chunksize=None,
+                    engine=engine,
+                )
+                if page.empty:
+                    return
+                last = tuple(page[keys].iloc[-1])
+                if index_col is not None:
+                    page = page.set_index(index_col)
+                yield page
+                if len(page) < page_size:
+                    return
+
+    @instrumented
+    def export(
+        self,
+        sql_or_table,
+        path,
+        format=None,
+        params=None,
+        chunksize=500000,
+        row_group_size=None,
+        compression=None,
+        coerce_float=True,
+        date_cols=None,
+        dtype=None,
+        engine="pandas",
+    ):
+        """
+        Writes the result of a query, or a whole table, to a Parquet,
+        Feather (Arrow IPC) or CSV file without holding it in memory.
+
+        The result is read in chunks of chunksize rows, each of which is
+        appended to the file as soon as it arrives, so memory use is bounded
+        by the chunk rather than the result. The file is written under a
+        temporary name and moved into place once complete, so an interrupted
+        export never leaves a truncated file at path.
+
+        Every chunk is written with the column types of the first one.
+
+        Requires pyarrow.
+
+        :param sql_or_table: SQL code in string object, or a table given as
+            "library.table", which is exported in full.
+        :param path: string or path-like, the file to write.
+        :param format: (optional) string, default: None
+            "parquet", "feather" or "csv". Inferred from the suffix of path
+            (.parquet, .pq, .feather, .arrow, .csv, .csv.gz) when None.
+        :param params: parameters to SQL query, if parameterized.
+        :param chunksize: (optional) integer, default: 500000
+            Number of rows read and written at a time; must be positive.
+        :param row_group_size: (optional) integer, default: None
+            Maximum rows in each Parquet row group or Feather record batch.
+            Defaults to chunksize. Ignored for CSV.
+        :param compression: (optional) string, default: None
+            Codec for the file: "snappy" for Parquet and "lz4" for Feather
+            when None. CSV files are compressed when path ends in .gz, .bz2
+            or .zst, or with the codec given here.
+        :param coerce_float: (optional) boolean, default: True
+            See :meth:`raw_sql`.
+        :param date_cols: (optional) list or dict, default: None
+            See :meth:`raw_sql`. Ignored by the copy engine, which writes
+            date columns as dates.
+        :param dtype: (optional) Type name or dict of columns, default: None
+            See :meth:`raw_sql`. Ignored by the copy engine.
+        :param engine: (optional) string, default: "pandas"
+            "pandas" or "copy". See :meth:`raw_sql`. The copy engine writes
+            Arrow batches straight to the file without building DataFrames,
+            and keeps the server's integer, float and date types.
+
+        :rtype: int, the number of rows written
+
+        Usage ::
+        >>> db.export('crsp.dsf', 'dsf.parquet', engine='copy')
+        98123456
+        >>> db.export("select permno, date, ret from crsp.msf where date >= '2020-01-01'",
+        ...           'msf.csv.gz')
+        1654321
+        """
+        if engine not in ("pandas", "copy"):
+            raise ValueError(f"Unknown engine {engine!r}, use 'pandas' or 'copy'.")
+        if not isinstance(chunksize, (int, np.integer)) or chunksize < 1:
+            raise ValueError(
+                f"chunksize must be a positive integer, not {chunksize!r}."
             )
-            return self.raw_sql(
-                sqlstmt,
+        format = _export_format(path, format)
+        pa, pacsv = _import_pyarrow()
+        path = Path(path)
+
+        sql = sql_or_table
+        if re.fullmatch(r"\w+\.\w+", sql_or_table.strip()):
+            library, table = sql_or_table.strip().split(".")
+            self.__check_schema_perms(library)
+            sql = f"SELECT * FROM {library}.{table}"
+
+        if engine == "copy":
+            batches = self.__copy_batches(sql, params, coerce_float)
+            tables = _rebatch(batches, chunksize)
+        else:
+            chunks = self.raw_sql(
+                sql,
+                params=params,
                 coerce_float=coerce_float,
-                index_col=index_col,
                 date_cols=date_cols,
+                chunksize=chunksize,
+                return_iter=True,
+                dtype=dtype,
+            )
+            types = self.__result_types(sql, params)
+            tables = (_export_table(pa, df, types) for df in chunks)
+
+        if format == "csv" and compression is None:
+            compression = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}.get(
+                path.suffix.lower()
+            )
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        rows = 0
+        writer = None
+        try:
+            with contextlib.ExitStack() as stack:
+                for table in tables:
+                    if writer is None:
+                        schema = table.schema
+                        writer = stack.enter_context(
+                            self.__export_writer(
+                                pa, pacsv, format, tmp_path, schema, compression
+                            )
+                        )
+                    elif table.schema != schema:
+                        table = table.cast(schema)
+                    if format == "parquet":
+                        writer.write_table(table, row_group_size=row_group_size)
+                    elif format == "feather":
+                        writer.write_table(table, max_chunksize=row_group_size)
+                    else:
+                        writer.write_table(table)
+                    rows += table.num_rows
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return rows
+
+    @instrumented
+    def sync_table(
+        self,
+        library,
+        table,
+        dest,
+        key=None,
+        watermark_col=None,
+        columns=None,
+        full=False,
+        chunksize=500000,
+        engine="pandas",
+    ):
+        """
+        Keeps a local Parquet mirror of a table up to date by fetching only
+        the rows added since the last sync.
+
+        The mirror is a directory of Parquet part files and a manifest,
+        _manifest.json, recording the largest watermark_col value synced so
+        far. Each run reads only the rows whose watermark_col lies beyond it
+        and writes them to a new part, so nightly refreshes move only the
+        deltas. Rows must therefore be added with ever larger watermarks,
+        e.g. a date for daily data. Rows updated in place, or whose
+        watermark is NULL, are not picked up; pass full=True to rebuild
+        the mirror from scratch.
+
+        Each part is written under a temporary name and moved into place,
+        and the manifest is replaced only after its part is complete, so an
+        interrupted run leaves the mirror as it was. A full rebuild is
+        written to a directory beside dest, which then takes its place. The
+        whole mirror can be read with ``pd.read_parquet(dest)``, which skips
+        the manifest.
+
+        Requires pyarrow.
+
+        :param library: Postgres schema name.
+        :param table: Postgres table name.
+        :param dest: string or path-like, directory holding the mirror.
+        :param key: (optional) string or list, default: None
+            Column(s) identifying a row. Rows of each part are sorted by
+            them, and a single key column is the default watermark_col.
+        :param watermark_col: (optional) string, default: None
+            Column whose values only grow as rows are added, e.g. date.
+        :param columns: (optional) list, default: None
+            Columns to mirror; all of them when None.
+        :param full: (optional) boolean, default: False
+            Replace the mirror with a fresh copy of the whole table.
+        :param chunksize: (optional) integer, default: 500000
+            See :meth:`export`.
+        :param engine: (optional) string, default: "pandas"
+            See :meth:`export`.
+
+        :rtype: int, the number of rows added to the mirror
+
+        Usage ::
+        >>> db.sync_table('crsp', 'dsf', 'mirror/crsp/dsf',
+        ...               key=['permno', 'date'], watermark_col='date')
+        41234
+        """
+        if isinstance(key, str):
+            key = [key]
+        if watermark_col is None:
+            if key is None or len(key) != 1:
+                raise ValueError("watermark_col is required unless key is one column.")
+            watermark_col = key[0]
+        self.__check_schema_perms(library)
+        dest = Path(dest).resolve()
+        rebuild = dest.with_name(f".{dest.name}.rebuild")
+        replaced = dest.with_name(f".{dest.name}.replaced")
+        if replaced.exists() and not dest.exists():
+            # A full rebuild stopped between moving the mirror aside and
+            # moving its replacement in.
+            os.replace(replaced, dest)
+        shutil.rmtree(replaced, ignore_errors=True)
+        manifest_path = dest / "_manifest.json"
+        manifest = {
+            "library": library,
+            "table": table,
+            "key": key,
+            "watermark_col": watermark_col,
+            "columns": columns,
+            "watermark": None,
+            "parts": [],
+        }
+        if manifest_path.exists() and not full:
+            with open(manifest_path) as fd:
+                stored = json.load(fd)
+            for name in ("library", "table", "key", "watermark_col", "columns"):
+                if stored.get(name) != manifest[name]:
+                    raise ValueError(
+                        f"{dest} mirrors a different {name} "
+                        f"({stored.get(name)!r}); use full=True to rebuild it."
+                    )
+            manifest = stored
+
+        condition = f"{watermark_col} IS NOT NULL"
+        params = {}
+        if manifest["watermark"] is not None:
+            condition = f"{watermark_col} > %(watermark)s"
+            params["watermark"] = manifest["watermark"]
+        # Fix the upper bound first, so rows added during the run are left
+        # whole for the next one.
+        with self.__checkout() as conn:
+            upper = conn.exec_driver_sql(
+                f"SELECT max({watermark_col}) FROM {library}.{table} WHERE {condition}",
+                params,
+            ).scalar()
+        if upper is None:
+            return 0
+        params = {**params, "upper": upper}
+        sql = (
+            "SELECT {cols} FROM {schema}.{table} "
+            "WHERE {condition} AND {watermark_col} <= %(upper)s{order}"
+        ).format(
+            cols="*" if columns is None else ",".join(columns),
+            schema=library,
+            table=table,
+            condition=condition,
+            watermark_col=watermark_col,
+            order="" if key is None else " ORDER BY " + ",".join(key),
+        )
+        target = dest
+        if full:
+            shutil.rmtree(rebuild, ignore_errors=True)
+            target = rebuild
+        target.mkdir(parents=True, exist_ok=True)
+        part = "part-{:05d}.parquet".format(len(manifest["parts"]))
+        try:
+            rows = self.export(
+                sql, target / part, params=params, chunksize=chunksize, engine=engine
             )
+        except BaseException:
+            if full:
+                shutil.rmtree(rebuild, ignore_errors=True)
+            raise
+        manifest["watermark"] = _json_value(upper)
+        manifest["parts"].append(
+            {
+                "file": part,
+                "rows": rows,
+                "watermark": manifest["watermark"],
+                "synced_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+        )
+        tmp_path = target / ".manifest.json.tmp"
+        with open(tmp_path, "w") as fd:
+            json.dump(manifest, fd, indent=2)
+        os.replace(tmp_path, target / "_manifest.json")
+        if full:
+            if dest.exists():
+                os.replace(dest, replaced)
+            os.replace(rebuild, dest)
+            shutil.rmtree(replaced, ignore_errors=True)
+        return rows
+
+    @contextlib.contextmanager
+    def __export_writer(self, pa, pacsv, format, path, schema, compression):
+        """
+        Internal context manager opening the Arrow writer for an export.
+        """
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            with pq.ParquetWriter(
+                path, schema, compression=compression or "snappy"
+            ) as writer:
+                yield writer
+        elif format == "feather":
+            options = pa.ipc.IpcWriteOptions(compression=compression or "lz4")
+            with pa.ipc.new_file(path, schema, options=options) as writer:
+                yield writer
+        else:
+            sink = pa.output_stream(path, compression=compression)
+            with sink, pacsv.CSVWriter(sink, schema) as writer:
+                yield writer
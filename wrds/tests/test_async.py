@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import wrds
+from wrds.sql import NotSubscribedError
+
+
+@pytest.fixture
+def async_connection():
+    db = wrds.AsyncConnection(
+        wrds_hostname="wrds.test.private",
+        wrds_port=12345,
+        wrds_dbname="testdbname",
+        wrds_username="faketestusername",
+    )
+    db.engine = mock.MagicMock()
+    conn = db.engine.connect.return_value.__aenter__.return_value
+    conn.exec_driver_sql = mock.AsyncMock()
+    conn.run_sync = mock.AsyncMock(side_effect=lambda func: func(mock.sentinel.sync))
+    return db, conn
+
+
+def test_async_connect_uses_psycopg_pool():
+    """Test connect creates a psycopg async engine with the WRDS pool settings."""
+    db = wrds.AsyncConnection(wrds_hostname="wrds.test.private", wrds_port=12345)
+    with mock.patch("wrds.async_sql._create_async_engine") as create_engine:
+        conn = create_engine.return_value.connect.return_value.__aenter__
+        conn.return_value.exec_driver_sql = mock.AsyncMock()
+        asyncio.run(db.connect())
+    url = create_engine.call_args.args[0]
+    assert url.drivername == "postgresql+psycopg"
+    assert (url.host, url.port, url.database) == ("wrds.test.private", 12345, "wrds")
+    assert create_engine.call_args.kwargs == {
+        "isolation_level": "AUTOCOMMIT",
+        "connect_args": wrds.sql.WRDS_CONNECT_ARGS,
+        **wrds.sql.WRDS_POOL_ARGS,
+    }
+
+
+def test_async_raw_sql_builds_frames_off_the_event_loop(async_connection):
+    """Test raw_sql fetches on a pooled connection and builds in a worker thread."""
+    db, _ = async_connection
+    sync_conn = mock.Mock()
+    db.engine.connect.return_value.__aenter__.return_value.run_sync = mock.AsyncMock(
+        side_effect=lambda func: func(sync_conn)
+    )
+    result = sync_conn.exec_driver_sql.return_value
+    result.cursor.description = [("permno", 23), ("ticker", 1043)]
+    result.fetchall.return_value = [(10001, "AAPL"), (10002, None)]
+    threads = []
+    build_frame = wrds.async_sql._build_frame
+
+    def record_thread(*args):
+        threads.append(threading.current_thread())
+        return build_frame(*args)
+
+    with mock.patch("wrds.async_sql._build_frame", side_effect=record_thread):
+        df = asyncio.run(db.raw_sql("select * from crsp.dsf", params={"p": 1}))
+    sync_conn.exec_driver_sql.assert_called_once_with(
+        "select * from crsp.dsf", {"p": 1}
+    )
+    assert threads != [threading.main_thread()]
+    assert df.permno.tolist() == [10001, 10002]
+    assert str(df.permno.dtype) == "Int32"
+    assert df.ticker.isna().tolist() == [False, True]
+
+
+def test_async_close_before_connect():
+    """Test close does nothing when the connection was never made."""
+    db = wrds.AsyncConnection(wrds_hostname="wrds.test.private")
+    asyncio.run(db.close())
+    assert db.engine is None
+
+
+def test_async_get_row_count_raises(async_connection):
+    """Test get_row_count lets database errors through rather than returning 0."""
+    db, conn = async_connection
+    conn.exec_driver_sql.side_effect = RuntimeError("relation does not exist")
+    with pytest.raises(RuntimeError):
+        asyncio.run(db.get_row_count("crsp", "nosuchtable"))
+
+
+def test_async_get_table_loads_library_list_once(async_connection):
+    """Test concurrent get_table calls check permissions with one catalog query."""
+    db, conn = async_connection
+    conn.exec_driver_sql.return_value = mock.Mock()
+    conn.exec_driver_sql.return_value.fetchall.return_value = [("crsp",)]
+    db.raw_sql = mock.AsyncMock(return_value=pd.DataFrame())
+
+    async def main():
+        await asyncio.gather(
+            db.get_table("crsp", "dsf", columns=["permno", "date"], rows=10),
+            db.get_table("crsp", "msf"),
+        )
+
+    asyncio.run(main())
+    conn.exec_driver_sql.assert_awaited_once_with(wrds.sql.WRDS_LIBRARY_QUERY)
+    assert db.raw_sql.await_args_list[0].args == (
+        "SELECT permno,date FROM crsp.dsf  LIMIT 10 OFFSET 0",
+    )
+
+
+def test_async_get_table_not_subscribed(async_connection):
+    """Test get_table raises NotSubscribedError for a schema without access."""
+    db, _ = async_connection
+    db.schema_perm = ["crsp"]
+    with mock.patch("wrds.async_sql.sa.inspect") as inspect:
+        inspect.return_value.get_schema_names.return_value = ["crsp", "comp"]
+        with pytest.raises(NotSubscribedError):
+            asyncio.run(db.get_table("comp", "funda"))
@@ -0,0 +1,89 @@
+from unittest import mock
+
+import pytest
+import sqlalchemy as sa
+
+from wrds.sql import SchemaNotFoundError
+
+
+@pytest.fixture
+def catalog_connection(mock_connection):
+    mock_connection._schema_perm = ["comp", "crsp"]
+    mock_connection.raw_sql = mock.Mock()
+    return mock_connection
+
+
+def test_describe_tables_reads_catalog_once(catalog_connection):
+    """Test describe_tables describes the given tables in one query."""
+    catalog_connection.describe_tables("crsp", ("dsf", "msf"))
+    catalog_connection.raw_sql.assert_called_once()
+    sql = catalog_connection.raw_sql.call_args.args[0]
+    assert "c.relname = ANY(%(tables)s)" in sql
+    assert catalog_connection.raw_sql.call_args.kwargs["params"] == {
+        "library": "crsp",
+        "tables": ["dsf", "msf"],
+    }
+
+
+def test_describe_tables_whole_library(catalog_connection):
+    """Test describe_tables without tables describes the whole library."""
+    catalog_connection.describe_tables("crsp")
+    sql = catalog_connection.raw_sql.call_args.args[0]
+    assert "ANY(%(tables)s)" not in sql
+    assert catalog_connection.raw_sql.call_args.kwargs["params"] == {"library": "crsp"}
+
+
+def test_describe_tables_checks_permissions(catalog_connection):
+    """Test describe_tables refuses a library that does not exist."""
+    catalog_connection._insp = mock.Mock()
+    catalog_connection._insp.get_schema_names.return_value = ["comp", "crsp"]
+    with pytest.raises(SchemaNotFoundError):
+        catalog_connection.describe_tables("nosuchlib")
+    catalog_connection.raw_sql.assert_not_called()
+
+
+def test_list_all_tables_covers_accessible_libraries(catalog_connection):
+    """Test list_all_tables lists every accessible library in one query."""
+    catalog_connection.list_all_tables()
+    catalog_connection.raw_sql.assert_called_once()
+    assert catalog_connection.raw_sql.call_args.kwargs["params"] == {
+        "libraries": ["comp", "crsp"]
+    }
+
+
+def test_get_row_counts_combines_catalog_estimates(catalog_connection):
+    """Test partitions are summed, views resolved and unanalyzed tables explained."""
+    catalog_connection.engine = mock.Mock()
+    conn = catalog_connection.engine.connect.return_value
+    conn.exec_driver_sql.return_value.fetchall.return_value = [
+        # parent, child, via, relname, relkind, reltuples
+        (None, 1, None, "dsf", "p", -1.0),
+        (1, 2, "inherits", "dsf_1990", "r", 1000.0),
+        (1, 3, "inherits", "dsf_2000", "r", 2500.0),
+        (None, 4, None, "dsf_v", "v", -1.0),
+        (4, 1, "view", "dsf", "p", -1.0),
+        (4, 5, "view", "names", "r", 10.0),
+        (None, 6, None, "fresh", "r", -1.0),
+    ]
+    with mock.patch.object(
+        catalog_connection, "_Connection__explain_row_count", return_value=42
+    ) as explain:
+        counts = catalog_connection.get_row_counts("crsp")
+    explain.assert_called_once_with("crsp", "fresh")
+    assert counts.to_dict() == {"dsf": 3500, "dsf_v": 3500, "fresh": 42}
+    assert "%(tables)s" not in conn.exec_driver_sql.call_args.args[0]
+
+
+def test_get_row_counts_exact_falls_back_on_timeout(catalog_connection):
+    """Test an exact count that hits statement_timeout returns the estimate."""
+    catalog_connection.engine = mock.MagicMock()
+    catalog_connection._Connection__estimate_row_counts = mock.Mock(
+        return_value={"dsf": 3500}
+    )
+    conn = catalog_connection.engine.connect.return_value.execution_options
+    canceled = sa.exc.OperationalError("SELECT", {}, mock.Mock(pgcode="57014"))
+    conn.return_value.exec_driver_sql.side_effect = [None, canceled]
+    counts = catalog_connection.get_row_counts("crsp", ["dsf"], exact=True, timeout=5)
+    assert counts.to_dict() == {"dsf": 3500}
+    timeout_call = conn.return_value.exec_driver_sql.call_args_list[0]
+    assert timeout_call.args[1] == {"ms": "5000"}
@@ -0,0 +1,104 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import wrds
+from wrds.sql import compact_frame
+
+
+def dsf():
+    return pd.DataFrame(
+        {
+            "permno": pd.array([10001.0, 93436.0, None], dtype="Float64"),
+            "shrcd": pd.array([10, 11, 10], dtype="Int64"),
+            "prc": pd.array([1.5, 2.25, None], dtype="Float64"),
+            "bidlo": pd.array([1.5, 2.0, 3.0], dtype="Float64"),
+            "exchcd": pd.array(["N", "N", None], dtype="string"),
+            "ticker": pd.array(["AAPL", "MSFT", "IBM"], dtype="string"),
+            "date": pd.array(["1990-01-02", "9999-12-31", None], dtype="string"),
+        }
+    )
+
+
+def test_compact_frame_narrows_by_server_type():
+    """Test each column gets the narrowest dtype for its server type."""
+    df = dsf()
+    types = {
+        "permno": 701,
+        "shrcd": 21,
+        "prc": 701,
+        "bidlo": 700,
+        "exchcd": 1042,
+        "ticker": 1043,
+        "date": 1082,
+    }
+    compact = compact_frame(df, types)
+    assert compact.dtypes.to_dict() == {
+        "permno": "Int32",
+        "shrcd": "Int8",
+        "prc": "Float64",
+        "bidlo": "Float32",
+        "exchcd": "category",
+        "ticker": "string",
+        "date": np.dtype("datetime64[s]"),
+    }
+    assert compact.permno.tolist() == [10001, 93436, pd.NA]
+    assert compact.date.tolist() == [
+        pd.Timestamp("1990-01-02"),
+        pd.Timestamp("9999-12-31"),
+        pd.NaT,
+    ]
+    pd.testing.assert_frame_equal(df, dsf())
+
+
+def test_compact_frame_without_types_uses_dtypes():
+    """Test columns are compacted by their own dtypes when types is None."""
+    df = pd.DataFrame({"a": [1, 2, 3, 4], "b": [0.5, 1.0, 2.0, 3.0], "c": ["x"] * 4})
+    compact = compact_frame(df)
+    assert compact.dtypes.to_dict() == {
+        "a": np.dtype("int8"),
+        "b": np.dtype("float64"),
+        "c": "category",
+    }
+
+
+def test_compact_frame_only_touches_typed_columns():
+    """Test columns missing from types, or of other types, are left alone."""
+    df = dsf()
+    compact = compact_frame(df, {"shrcd": 16, "ticker": 1043})
+    pd.testing.assert_frame_equal(compact, df)
+
+
+def test_assemble_chunks_unifies_categories():
+    """Test chunks compacted to different categories concatenate as category."""
+    chunks = [
+        pd.DataFrame({"exchcd": pd.Categorical(["N", "N"])}),
+        pd.DataFrame({"exchcd": pd.Categorical(["Q", "A"])}),
+    ]
+    df = wrds.sql._assemble_chunks(chunks)
+    assert isinstance(df.exchcd.dtype, pd.CategoricalDtype)
+    assert df.exchcd.tolist() == ["N", "N", "Q", "A"]
+
+
+def test_rawsql_compact_uses_result_types(mock_connection):
+    """Test raw_sql(compact=True) compacts each chunk by the result's types."""
+    mock_connection.engine = mock.Mock()
+    chunks = [dsf(), dsf()]
+    types = {"permno": 701, "exchcd": 1042, "ticker": 1043}
+    result_types = mock.patch.object(
+        mock_connection, "_Connection__result_types", return_value=types
+    )
+    read_frames = mock.patch("wrds.sql._read_frames", return_value=iter(chunks))
+    with result_types as mock_result_types, read_frames:
+        df = mock_connection.raw_sql(
+            "select * from crsp.dsf",
+            params={"p": 1},
+            dtype={"exchcd": "string"},
+            compact=True,
+        )
+    mock_result_types.assert_called_once_with("select * from crsp.dsf", {"p": 1})
+    assert df.permno.dtype == "Int32"
+    assert df.exchcd.dtype == "string"
+    assert df.ticker.dtype == "string"
+    assert len(df) == 6
@@ -1,6 +1,10 @@
 import urllib.parse
 from unittest import mock
 
+import psycopg2
+import pytest
+import sqlalchemy as sa
+
 
 def test_connect_calls_sqlalchemy_engine_connect(mock_connection):
     """Test connect calls sqlalchemy engine connect."""
@@ -25,6 +29,19 @@ def test_connect_calls_get_user_credentials_on_exception(mock_connection):
             mock_connection._Connection__get_user_credentials.assert_called_once()
 
 
+def test_connect_returns_checked_connection_to_pool(mock_connection):
+    """Test connect holds no pooled connection until connection is used."""
+    engine = mock.Mock()
+    with mock.patch("wrds.sql.sa.create_engine", return_value=engine):
+        mock_connection.connect()
+    engine.connect.return_value.close.assert_called_once()
+    assert mock_connection._connection is None
+    assert mock_connection.connection is engine.connect.return_value
+    assert engine.connect.call_count == 2
+    mock_connection.close()
+    assert mock_connection._connection is None
+
+
 def test_connect_calls_sqlalchemy_create_engine_on_exception(mock_connection):
     """Test connect calls sqlalchemy create_engine when engine.connect raises exception."""
     import wrds
@@ -53,3 +70,34 @@ def test_connect_calls_sqlalchemy_create_engine_on_exception(mock_connection):
             assert last_call_args[0][0] == connstring
             assert last_call_args[1]["isolation_level"] == "AUTOCOMMIT"
             assert last_call_args[1]["connect_args"]["sslmode"] == "require"
+
+
+def disconnect_error(message="server closed the connection unexpectedly"):
+    return sa.exc.OperationalError("SELECT 1", {}, psycopg2.OperationalError(message))
+
+
+def test_connect_retries_unreachable_server_with_backoff(mock_connection):
+    """Test a refused connection is retried after growing delays."""
+    engine = mock.Mock()
+    engine.connect.side_effect = [disconnect_error(), disconnect_error(), mock.Mock()]
+    create_engine = mock.patch("wrds.sql.sa.create_engine", return_value=engine)
+    with create_engine, mock.patch("wrds.sql.time.sleep") as sleep:
+        mock_connection.connect()
+    assert engine.connect.call_count == 3
+    first, second = (call.args[0] for call in sleep.call_args_list)
+    assert 0.5 <= first <= 1 and 1 <= second <= 2
+    mock_connection._Connection__get_user_credentials.assert_not_called()
+
+
+def test_connect_does_not_retry_authentication_failure(mock_connection):
+    """Test a rejected password falls through to asking for credentials."""
+    engine = mock.Mock()
+    engine.connect.side_effect = disconnect_error(
+        'password authentication failed for user "faketestusername"'
+    )
+    create_engine = mock.patch("wrds.sql.sa.create_engine", return_value=engine)
+    refused = pytest.raises(sa.exc.OperationalError)
+    with create_engine, mock.patch("wrds.sql.time.sleep") as sleep, refused:
+        mock_connection.connect()
+    sleep.assert_not_called()
+    mock_connection._Connection__get_user_credentials.assert_called_once()
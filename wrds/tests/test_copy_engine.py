@@ -0,0 +1,188 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+class FakeCopyCursor:
+    """DBAPI cursor stand-in that answers COPY with a fixed CSV payload."""
+
+    description = (
+        SimpleNamespace(name="permno", type_code=701),
+        SimpleNamespace(name="ticker", type_code=1043),
+        SimpleNamespace(name="vol", type_code=23),
+    )
+    payload = b'permno,ticker,vol\n10001,AAPL,5\n10002,"",\n10003,,7\n'
+
+    def __init__(self):
+        self.executed = []
+
+    def mogrify(self, sql, params):
+        return (sql % params).encode()
+
+    def execute(self, sql):
+        self.executed.append(sql)
+
+    def copy_expert(self, sql, fd):
+        self.executed.append(sql)
+        fd.write(self.payload)
+
+
+@pytest.fixture
+def copy_connection(mock_connection):
+    cursor = FakeCopyCursor()
+    mock_connection.engine = mock.Mock()
+    pooled_conn = mock_connection.engine.connect.return_value
+    pooled_conn.connection.cursor.return_value = cursor
+    return mock_connection, cursor
+
+
+def test_rawsql_copy_engine_issues_copy_to_stdout(copy_connection):
+    """Test the copy engine wraps the query in COPY ... TO STDOUT."""
+    conn, cursor = copy_connection
+    conn.raw_sql("SELECT * FROM crsp.dsf;", engine="copy")
+    assert cursor.executed[-1] == (
+        "COPY (SELECT * FROM crsp.dsf\n) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    )
+
+
+def test_rawsql_copy_engine_allows_trailing_line_comment(copy_connection):
+    """Test a query ending in a -- comment does not comment out the paren."""
+    conn, cursor = copy_connection
+    conn.raw_sql("SELECT * FROM crsp.dsf -- daily file", engine="copy")
+    for sql in cursor.executed:
+        assert "-- daily file\n)" in sql
+
+
+def test_rawsql_copy_engine_matches_pandas_engine_dtypes(copy_connection):
+    """Test the copy engine returns the pandas engine's planned dtypes."""
+    conn, _ = copy_connection
+    df = conn.raw_sql("SELECT * FROM crsp.dsf", engine="copy")
+    assert df.dtypes.to_dict() == {
+        "permno": pd.Float64Dtype(),
+        "ticker": pd.StringDtype("pyarrow"),
+        "vol": pd.Int32Dtype(),
+    }
+    # Quoted empty strings stay strings, unquoted empty fields are NULL.
+    assert df["ticker"].tolist() == ["AAPL", "", pd.NA]
+    assert df["vol"].tolist() == [5, pd.NA, 7]
+
+
+def test_rawsql_copy_engine_return_iter_rechunks(copy_connection):
+    """Test the copy engine yields chunks of chunksize rows."""
+    conn, _ = copy_connection
+    chunks = conn.raw_sql(
+        "SELECT * FROM crsp.dsf", engine="copy", chunksize=2, return_iter=True
+    )
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    conn.engine.connect.return_value.close.assert_called_once()
+    conn.engine.connect.return_value.invalidate.assert_not_called()
+
+
+def test_rawsql_copy_engine_inlines_params(copy_connection):
+    """Test the copy engine binds parameters before building the COPY statement."""
+    conn, cursor = copy_connection
+    conn.raw_sql(
+        "SELECT * FROM crsp.dsf WHERE permno = %(permno)s",
+        params={"permno": 10001},
+        engine="copy",
+    )
+    assert "WHERE permno = 10001" in cursor.executed[-1]
+
+
+def test_rawsql_rejects_unknown_engine(mock_connection):
+    """Test raw_sql raises ValueError for an unknown engine."""
+    with pytest.raises(ValueError):
+        mock_connection.raw_sql("SELECT 1", engine="odbc")
+
+
+def test_raw_sql_arrow_copy_engine_returns_table(copy_connection):
+    """Test raw_sql_arrow returns the COPY result as an Arrow table."""
+    import pyarrow as pa
+
+    db, cursor = copy_connection
+    table = db.raw_sql_arrow(
+        "SELECT * FROM crsp.dsf WHERE vol > %(v)s", params={"v": 1}, engine="copy"
+    )
+    assert isinstance(table, pa.Table)
+    assert table.schema.types == [pa.float64(), pa.string(), pa.int32()]
+    assert table.column("vol").to_pylist() == [5, None, 7]
+    assert "vol > 1" in cursor.executed[-1]
+
+
+def test_raw_sql_arrow_return_reader(copy_connection):
+    """Test raw_sql_arrow can stream the result as a RecordBatchReader."""
+    import pyarrow as pa
+
+    db, _ = copy_connection
+    reader = db.raw_sql_arrow("SELECT 1", engine="copy", return_reader=True)
+    assert isinstance(reader, pa.RecordBatchReader)
+    assert reader.read_all().num_rows == 3
+
+
+def test_raw_sql_arrow_adbc_engine(copy_connection):
+    """Test raw_sql_arrow(engine="adbc") reads through the ADBC driver."""
+    import pyarrow as pa
+
+    db, _ = copy_connection
+    batch = pa.RecordBatch.from_pydict({"permno": [10001.0]})
+    with mock.patch.object(
+        db, "_Connection__adbc_batches", return_value=iter([batch.slice(0, 0), batch])
+    ) as adbc_batches:
+        table = db.raw_sql_arrow("SELECT 1", engine="adbc")
+    adbc_batches.assert_called_once_with("SELECT 1", None, True)
+    assert table.column("permno").to_pylist() == [10001.0]
+
+
+def test_raw_sql_arrow_adbc_requires_driver(copy_connection):
+    """Test the adbc engine explains how to install the missing driver."""
+    db, _ = copy_connection
+    missing = mock.patch("wrds.sql._import_adbc", return_value=None)
+    with missing, pytest.raises(ImportError, match="wrds\\[adbc\\]"):
+        db.raw_sql_arrow("SELECT 1", engine="adbc")
+
+
+def test_adbc_converter_unwraps_extension_types():
+    """Test ADBC numeric columns become float64 and other extensions strings."""
+    import pyarrow as pa
+
+    from wrds.sql import _adbc_converter
+
+    class Opaque(pa.ExtensionType):
+        def __init__(self, name):
+            super().__init__(pa.string(), f"test.{name}")
+
+        def __arrow_ext_serialize__(self):
+            return self.extension_name.encode()
+
+        @classmethod
+        def __arrow_ext_deserialize__(cls, storage_type, serialized):
+            return cls(serialized.decode().split(".", 1)[1])
+
+    typname = "ADBC:postgresql:typname"
+    schema = pa.schema(
+        [
+            pa.field("ret", Opaque("numeric"), metadata={typname: "numeric"}),
+            pa.field("doc", Opaque("json"), metadata={typname: "json"}),
+            pa.field("vol", pa.int32()),
+        ]
+    )
+    batch = pa.RecordBatch.from_arrays(
+        [
+            pa.ExtensionArray.from_storage(Opaque("numeric"), pa.array(["1.5", None])),
+            pa.ExtensionArray.from_storage(Opaque("json"), pa.array(["{}", "[]"])),
+            pa.array([1, 2], pa.int32()),
+        ],
+        schema=schema,
+    )
+    target, convert = _adbc_converter(pa, schema)
+    assert target.types == [pa.float64(), pa.string(), pa.int32()]
+    assert convert(batch).to_pylist() == [
+        {"ret": 1.5, "doc": "{}", "vol": 1},
+        {"ret": None, "doc": "[]", "vol": 2},
+    ]
+    target, _ = _adbc_converter(pa, schema, coerce_float=False)
+    assert target.field("ret").type == pa.string()
@@ -0,0 +1,253 @@
+import datetime
+import json
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+feather = pytest.importorskip("pyarrow.feather")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def chunks():
+    return iter(
+        [
+            pd.DataFrame(
+                {
+                    "permno": pd.array([10001, 10002], dtype="Int64"),
+                    "ticker": ["A", None],
+                }
+            ),
+            pd.DataFrame({"permno": pd.array([10003], dtype="Int64"), "ticker": ["C"]}),
+        ]
+    )
+
+
+@pytest.fixture
+def export_connection(mock_connection):
+    mock_connection.raw_sql = mock.Mock(side_effect=lambda *args, **kwargs: chunks())
+    mock_connection._schema_perm = ["crsp"]
+    mock_connection._Connection__result_types = mock.Mock(return_value={})
+    return mock_connection
+
+
+@pytest.mark.parametrize(
+    "name, read",
+    [
+        ("out.parquet", lambda path: pq.read_table(path)),
+        ("out.feather", lambda path: feather.read_table(path)),
+        ("out.csv.gz", lambda path: pa.Table.from_pandas(pd.read_csv(path))),
+    ],
+)
+def test_export_writes_every_chunk(export_connection, tmp_path, name, read):
+    """Test export appends each chunk to a file of the format of its suffix."""
+    rows = export_connection.export("SELECT * FROM crsp.dsf", tmp_path / name)
+    assert rows == 3
+    table = read(tmp_path / name)
+    assert table.column("permno").to_pylist() == [10001, 10002, 10003]
+    assert list(tmp_path.iterdir()) == [tmp_path / name]
+
+
+def test_export_reads_table_in_chunks(export_connection, tmp_path):
+    """Test export of "library.table" streams the whole table."""
+    export_connection.export("crsp.dsf", tmp_path / "dsf.parquet", chunksize=2)
+    args, kwargs = export_connection.raw_sql.call_args
+    assert args == ("SELECT * FROM crsp.dsf",)
+    assert kwargs["chunksize"] == 2
+    assert kwargs["return_iter"] is True
+
+
+def test_export_parquet_row_groups(export_connection, tmp_path):
+    """Test each chunk is split into row groups of row_group_size rows."""
+    path = tmp_path / "dsf.parquet"
+    export_connection.export("crsp.dsf", path, row_group_size=1)
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+
+def test_export_casts_chunks_to_first_schema(export_connection, tmp_path):
+    """Test later chunks are written with the column types of the first."""
+    export_connection.raw_sql.side_effect = lambda *args, **kwargs: iter(
+        [
+            pd.DataFrame({"prc": pd.array([1.5], dtype="Float64")}),
+            pd.DataFrame({"prc": pd.array([2], dtype="Int64")}),
+        ]
+    )
+    path = tmp_path / "prc.parquet"
+    export_connection.export("crsp.dsf", path)
+    table = pq.read_table(path)
+    assert table.schema.field("prc").type == pa.float64()
+    assert table.column("prc").to_pylist() == [1.5, 2.0]
+
+
+def test_export_failure_leaves_no_file(export_connection, tmp_path):
+    """Test an export that fails midway does not leave a partial file."""
+
+    def failing(*args, **kwargs):
+        yield pd.DataFrame({"permno": [1]})
+        raise RuntimeError("connection lost")
+
+    export_connection.raw_sql.side_effect = failing
+    with pytest.raises(RuntimeError):
+        export_connection.export("crsp.dsf", tmp_path / "dsf.parquet")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_requires_known_format(export_connection, tmp_path):
+    """Test export refuses a path whose format it cannot infer."""
+    with pytest.raises(ValueError, match="format"):
+        export_connection.export("crsp.dsf", tmp_path / "dsf.xlsx")
+
+
+@pytest.mark.parametrize("chunksize", [None, 0, 2.5])
+def test_export_requires_positive_chunksize(export_connection, tmp_path, chunksize):
+    """Test export refuses a chunksize that would not stream the result."""
+    with pytest.raises(ValueError, match="chunksize"):
+        export_connection.export(
+            "crsp.dsf", tmp_path / "dsf.parquet", chunksize=chunksize
+        )
+    export_connection.raw_sql.assert_not_called()
+
+
+@pytest.fixture
+def sync_connection(export_connection):
+    export_connection.engine = mock.Mock()
+    pooled_conn = export_connection.engine.connect.return_value
+    pooled_conn.exec_driver_sql.return_value.scalar.return_value = datetime.date(
+        2024, 12, 31
+    )
+    return export_connection, pooled_conn
+
+
+def test_sync_table_writes_part_and_manifest(sync_connection, tmp_path):
+    """Test the first sync copies rows up to the current maximum watermark."""
+    db, pooled_conn = sync_connection
+    rows = db.sync_table(
+        "crsp", "dsf", tmp_path, key=["permno", "date"], watermark_col="date"
+    )
+    assert rows == 3
+    assert pooled_conn.exec_driver_sql.call_args.args == (
+        "SELECT max(date) FROM crsp.dsf WHERE date IS NOT NULL",
+        {},
+    )
+    args, kwargs = db.raw_sql.call_args
+    sql = (
+        "SELECT * FROM crsp.dsf WHERE date IS NOT NULL AND date <= %(upper)s "
+        "ORDER BY permno,date"
+    )
+    assert args == (sql,)
+    assert kwargs["params"] == {"upper": datetime.date(2024, 12, 31)}
+    manifest = json.loads((tmp_path / "_manifest.json").read_text())
+    assert manifest["watermark"] == "2024-12-31"
+    assert [part["file"] for part in manifest["parts"]] == ["part-00000.parquet"]
+    assert len(pd.read_parquet(tmp_path)) == 3
+
+
+def test_sync_table_fetches_only_rows_past_watermark(sync_connection, tmp_path):
+    """Test later syncs read rows beyond the manifest's watermark only."""
+    db, pooled_conn = sync_connection
+    db.sync_table("crsp", "dsf", tmp_path, key="date")
+    pooled_conn.exec_driver_sql.return_value.scalar.return_value = datetime.date(
+        2025, 1, 2
+    )
+    db.sync_table("crsp", "dsf", tmp_path, key="date")
+    args, kwargs = db.raw_sql.call_args
+    assert "WHERE date > %(watermark)s AND date <= %(upper)s" in args[0]
+    assert kwargs["params"]["watermark"] == "2024-12-31"
+    pooled_conn.exec_driver_sql.return_value.scalar.return_value = None
+    assert db.sync_table("crsp", "dsf", tmp_path, key="date") == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "_manifest.json",
+        "part-00000.parquet",
+        "part-00001.parquet",
+    ]
+
+
+def test_sync_table_rejects_other_mirror(sync_connection, tmp_path):
+    """Test a mirror of other columns is not appended to, and a watermark is required."""
+    db, _ = sync_connection
+    db.sync_table("crsp", "dsf", tmp_path, key="date")
+    with pytest.raises(ValueError, match="full=True"):
+        db.sync_table("crsp", "dsf", tmp_path, key="date", columns=["permno"])
+    with pytest.raises(ValueError, match="watermark_col"):
+        db.sync_table("crsp", "dsf", tmp_path, key=["permno", "date"])
+
+
+def test_sync_table_full_rebuild_interrupted_leaves_mirror(sync_connection, tmp_path):
+    """Test a full rebuild that fails midway leaves the old mirror whole."""
+    db, pooled_conn = sync_connection
+    dest = tmp_path / "dsf"
+    db.sync_table("crsp", "dsf", dest, key="date")
+    pooled_conn.exec_driver_sql.return_value.scalar.return_value = datetime.date(
+        2025, 1, 2
+    )
+    db.sync_table("crsp", "dsf", dest, key="date")
+    before = {p.name: p.read_bytes() for p in dest.iterdir()}
+
+    def failing(*args, **kwargs):
+        yield pd.DataFrame({"permno": [9], "date": ["2025-01-02"], "prc": [9.0]})
+        raise RuntimeError("connection lost")
+
+    db.raw_sql.side_effect = failing
+    with pytest.raises(RuntimeError):
+        db.sync_table("crsp", "dsf", dest, key="date", full=True)
+    assert {p.name: p.read_bytes() for p in dest.iterdir()} == before
+    assert [p.name for p in tmp_path.iterdir()] == ["dsf"]
+    assert len(pd.read_parquet(dest)) == 6
+
+
+def test_sync_table_full_rebuild_replaces_mirror(sync_connection, tmp_path):
+    """Test a full rebuild swaps in a mirror holding only the new part."""
+    db, _ = sync_connection
+    dest = tmp_path / "dsf"
+    db.sync_table("crsp", "dsf", dest, key="date")
+    db.sync_table("crsp", "dsf", dest, key="date")
+    # A rebuild that stopped after moving the old mirror aside.
+    dest.rename(tmp_path / ".dsf.replaced")
+    assert db.sync_table("crsp", "dsf", dest, key="date", full=True) == 3
+    manifest = json.loads((dest / "_manifest.json").read_text())
+    assert [part["file"] for part in manifest["parts"]] == ["part-00000.parquet"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dsf"]
+    assert len(pd.read_parquet(dest)) == 3
+
+
+def test_export_writes_json_and_dates_as_copy_does(export_connection, tmp_path):
+    """Test json values are written as JSON text and dates as date32."""
+    export_connection._Connection__result_types.return_value = {
+        "data": 3802,
+        "date": 1082,
+    }
+    export_connection.raw_sql.side_effect = lambda *args, **kwargs: iter(
+        [
+            pd.DataFrame(
+                {
+                    "data": [{"a": 1}, None],
+                    "tags": [["x", "y"], None],
+                    "date": pd.Series(
+                        ["2020-01-02", None], dtype="datetime64[s]"
+                    ).values,
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "data": [2],
+                    "tags": [["z"]],
+                    "date": pd.Series(["2020-01-03"], dtype="datetime64[s]").values,
+                }
+            ),
+        ]
+    )
+    export_connection.export("crsp.dsf", tmp_path / "out.csv")
+    df = pd.read_csv(tmp_path / "out.csv", keep_default_na=False)
+    assert df["data"].map(lambda value: value and json.loads(value)).tolist() == [
+        {"a": 1},
+        "",
+        2,
+    ]
+    assert df["tags"].tolist()[::2] == ['["x", "y"]', '["z"]']
+    assert df["date"].tolist() == ["2020-01-02", "", "2020-01-03"]
+    path = tmp_path / "out.parquet"
+    export_connection.export("crsp.dsf", path)
+    schema = pq.read_schema(path)
+    assert schema.field("date").type == pa.date32()
+    assert schema.field("data").type == pa.string()
@@ -0,0 +1,205 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def table_connection(mock_connection):
+    mock_connection.schema_perm = ["crsp"]
+    mock_connection.engine = mock.Mock()
+    return mock_connection
+
+
+def test_get_table_builds_select(table_connection):
+    """Test get_table passes a SELECT with LIMIT and OFFSET to raw_sql."""
+    with mock.patch.object(table_connection, "raw_sql") as mock_raw_sql:
+        table_connection.get_table("crsp", "dsf", rows=10, columns=["permno", "date"])
+    assert mock_raw_sql.call_args[0][0] == (
+        "SELECT permno,date FROM crsp.dsf  LIMIT 10 OFFSET 0"
+    )
+
+
+def test_get_table_compiles_filters(table_connection):
+    """Test get_table pushes where, filters and order_by into the query."""
+    with mock.patch.object(table_connection, "raw_sql") as mock_raw_sql:
+        table_connection.get_table(
+            "crsp",
+            "dsf",
+            where="vol > %(vol)s",
+            params={"vol": 100},
+            filters=[
+                ("date", ">=", "2020-01-01"),
+                ("permno", "in", pd.Series([10107, 14593])),
+                ("Ticker", "is not", None),
+            ],
+            order_by=["permno", ("date", "desc")],
+        )
+    assert mock_raw_sql.call_args[0][0] == (
+        "SELECT * FROM crsp.dsf WHERE (vol > %(vol)s) AND date >= %(wrds_filter_0)s "
+        "AND permno IN (%(wrds_filter_1_1)s, %(wrds_filter_1_2)s) "
+        'AND "Ticker" IS NOT NULL ORDER BY permno ASC, date DESC  OFFSET 0'
+    )
+    assert mock_raw_sql.call_args[1]["params"] == {
+        "vol": 100,
+        "wrds_filter_0": "2020-01-01",
+        "wrds_filter_1_1": 10107,
+        "wrds_filter_1_2": 14593,
+    }
+
+
+def test_get_table_rejects_unknown_filter_operator(table_connection):
+    """Test get_table raises ValueError for an unsupported filter operator."""
+    with pytest.raises(ValueError, match="~"):
+        table_connection.get_table("crsp", "dsf", filters=[("cusip", "~", "^0")])
+
+
+def test_get_table_parallel_rejects_order_by(table_connection):
+    """Test get_table raises ValueError when parallel is combined with order_by."""
+    with pytest.raises(ValueError):
+        table_connection.get_table(
+            "crsp", "dsf", parallel=4, partition_by="permno", order_by="date"
+        )
+
+
+def test_get_table_parallel_requires_partition_by(table_connection):
+    """Test get_table raises ValueError when parallel is set without partition_by."""
+    with pytest.raises(ValueError):
+        table_connection.get_table("crsp", "dsf", parallel=4)
+
+
+def test_get_table_parallel_rejects_rows(table_connection):
+    """Test get_table raises ValueError when parallel is combined with rows."""
+    with pytest.raises(ValueError):
+        table_connection.get_table(
+            "crsp", "dsf", rows=10, parallel=4, partition_by="permno"
+        )
+
+
+@pytest.mark.parametrize("return_iter", [False, True])
+def test_get_table_parallel_reads_histogram_ranges_in_order(
+    table_connection, return_iter
+):
+    """Test get_table splits on histogram bounds and reassembles ranges in order."""
+    histogram = [10000.0, 20000.0, 30000.0, 40000.0, 50000.0]
+    table_connection.engine.connect.return_value.exec_driver_sql.side_effect = [
+        mock.Mock(fetchone=mock.Mock(return_value=("double precision", "{...}"))),
+        [(bound,) for bound in histogram],
+    ]
+
+    def fake_raw_sql(sql, params, chunksize, return_iter=False, **kwargs):
+        df = pd.DataFrame({"range": [sql.rsplit(" ", 1)[-1]] * 3})
+        if not return_iter:
+            return df
+        return (df[i : i + chunksize] for i in range(0, len(df), chunksize))
+
+    with mock.patch.object(table_connection, "raw_sql", side_effect=fake_raw_sql) as m:
+        df = table_connection.get_table(
+            "crsp",
+            "dsf",
+            parallel=2,
+            partition_by="permno",
+            chunksize=2,
+            return_iter=return_iter,
+        )
+        if return_iter:
+            chunks = list(df)
+            assert [len(chunk) for chunk in chunks] == [2, 1] * 3
+            df = pd.concat(chunks)
+    # The ranges are read in worker threads, in no particular order.
+    calls = {call[0][0]: call[1] for call in m.call_args_list}
+    assert sorted(calls) == [
+        (
+            'SELECT * FROM crsp.dsf WHERE "permno" IS NOT NULL '
+            'AND "permno" < %(wrds_range_upper)s'
+        ),
+        (
+            'SELECT * FROM crsp.dsf WHERE "permno" IS NOT NULL '
+            'AND "permno" >= %(wrds_range_lower)s'
+        ),
+        'SELECT * FROM crsp.dsf WHERE "permno" IS NULL',
+    ]
+    first = calls[
+        'SELECT * FROM crsp.dsf WHERE "permno" IS NOT NULL '
+        'AND "permno" < %(wrds_range_upper)s'
+    ]
+    assert first["params"] == {"wrds_range_upper": 30000.0}
+    assert first["chunksize"] == 2
+    assert df["range"].tolist() == [
+        *["%(wrds_range_upper)s"] * 3,
+        *["%(wrds_range_lower)s"] * 3,
+        *["NULL"] * 3,
+    ]
+
+
+def test_get_table_parallel_splits_min_max_without_stats(table_connection):
+    """Test get_table splits the min/max range evenly when there is no histogram."""
+    table_connection.engine.connect.return_value.exec_driver_sql.side_effect = [
+        mock.Mock(fetchone=mock.Mock(return_value=("integer", None))),
+        mock.Mock(fetchone=mock.Mock(return_value=(0, 100))),
+    ]
+    with mock.patch.object(
+        table_connection, "raw_sql", return_value=pd.DataFrame()
+    ) as m:
+        table_connection.get_table("crsp", "dsf", parallel=4, partition_by="permno")
+    uppers = {call[1]["params"].get("wrds_range_upper") for call in m.call_args_list}
+    assert uppers == {25, 50, 75, None}
+
+
+def test_get_table_parallel_keeps_where_params_named_like_bounds(table_connection):
+    """Test a where condition's %(lower)s is not replaced by a range bound."""
+    table_connection.engine.connect.return_value.exec_driver_sql.side_effect = [
+        mock.Mock(fetchone=mock.Mock(return_value=("integer", None))),
+        mock.Mock(fetchone=mock.Mock(return_value=(0, 100))),
+    ]
+    with mock.patch.object(
+        table_connection, "raw_sql", return_value=pd.DataFrame()
+    ) as m:
+        table_connection.get_table(
+            "crsp",
+            "dsf",
+            parallel=2,
+            partition_by="permno",
+            where="ret > %(lower)s",
+            params={"lower": 0.1},
+        )
+    for call in m.call_args_list:
+        assert call[1]["params"]["lower"] == 0.1
+    assert m.call_args_list[1][1]["params"]["wrds_range_lower"] == 50
+
+
+def test_iter_table_pages_with_keyset(table_connection):
+    """Test iter_table continues each page after the last key of the previous one."""
+    pages = [
+        pd.DataFrame({"permno": [1, 2], "date": ["d1", "d2"]}),
+        pd.DataFrame({"permno": [3], "date": ["d3"]}),
+    ]
+    with mock.patch.object(table_connection, "raw_sql", side_effect=pages) as m:
+        result = list(
+            table_connection.iter_table(
+                "crsp", "dsf", key=["permno", "date"], page_size=2
+            )
+        )
+    assert [len(page) for page in result] == [2, 1]
+    first, second = (call[0][0] for call in m.call_args_list)
+    assert first == (
+        "SELECT * FROM crsp.dsf WHERE permno IS NOT NULL AND date IS NOT NULL "
+        "ORDER BY permno, date LIMIT 2"
+    )
+    assert "AND (permno, date) > (%(key_0)s, %(key_1)s)" in second
+    assert m.call_args_list[1][1]["params"] == {"key_0": 2, "key_1": "d2"}
+    assert type(m.call_args_list[1][1]["params"]["key_0"]) is int
+
+
+def test_iter_table_resumes_from_start_after(table_connection):
+    """Test iter_table starts after the given key and adds key columns."""
+    with mock.patch.object(
+        table_connection, "raw_sql", return_value=pd.DataFrame({"permno": []})
+    ) as m:
+        list(
+            table_connection.iter_table(
+                "crsp", "dsf", key="permno", columns=["ret"], start_after=10001
+            )
+        )
+    assert m.call_args[0][0].startswith("SELECT ret,permno FROM crsp.dsf")
+    assert m.call_args[1]["params"] == {"key_0": 10001}
@@ -1,5 +1,8 @@
+import logging
 from unittest import mock
 
+import psycopg2
+
 import wrds
 
 
@@ -18,6 +21,8 @@ def test_init_calls_sqlalchemy_create_engine_defaults():
             connstring,
             isolation_level="AUTOCOMMIT",
             connect_args={"sslmode": "require", "application_name": wrds.sql.appname},
+            poolclass=mock_sa.pool.QueuePool,
+            **wrds.sql.WRDS_POOL_ARGS,
         )
 
 
@@ -38,6 +43,8 @@ def test_init_calls_sqlalchemy_create_engine_custom():
             connstring,
             isolation_level="AUTOCOMMIT",
             connect_args={"sslmode": "require", "application_name": wrds.sql.appname},
+            poolclass=mock_sa.pool.QueuePool,
+            **wrds.sql.WRDS_POOL_ARGS,
         )
 
 
@@ -56,12 +63,47 @@ def test_init_autoconnect_false_no_connect():
         mock_connect.assert_not_called()
 
 
-def test_init_default_load_library_list():
-    """Test init loads library list by default."""
+def test_init_defers_load_library_list():
+    """Test init does not load the library list until it is needed."""
     with mock.patch("wrds.sql.Connection.connect"):
         with mock.patch("wrds.sql.Connection.load_library_list") as mock_lll:
             wrds.Connection()
-            mock_lll.assert_called_once()
+            mock_lll.assert_not_called()
+
+
+def test_list_libraries_loads_library_list_once():
+    """Test the library list is loaded on first use and then reused."""
+    with mock.patch("wrds.sql.Connection.connect"):
+        db = wrds.Connection()
+
+    def fake_load():
+        db.schema_perm = ["crsp"]
+
+    with mock.patch.object(db, "load_library_list", side_effect=fake_load) as lll:
+        assert db.list_libraries() == ["crsp"]
+        assert db.list_libraries() == ["crsp"]
+        lll.assert_called_once()
+
+
+def test_init_prefetch_libraries_loads_in_background():
+    """Test prefetch_libraries starts loading the library list at init."""
+    connect = mock.patch("wrds.sql.Connection.connect")
+    with connect, mock.patch("wrds.sql.threading.Thread") as mock_thread:
+        wrds.Connection(prefetch_libraries=True)
+        mock_thread.return_value.start.assert_called_once()
+
+
+def test_init_prefetch_libraries_logs_database_errors(caplog):
+    """Test a failed prefetch is logged and leaves the list to load on use."""
+    connect = mock.patch("wrds.sql.Connection.connect")
+    with connect, mock.patch("wrds.sql.threading.Thread") as mock_thread:
+        db = wrds.Connection(prefetch_libraries=True)
+    error = psycopg2.OperationalError("permission denied")
+    load = mock.patch.object(db, "load_library_list", side_effect=error)
+    with load, caplog.at_level(logging.DEBUG, logger="wrds"):
+        mock_thread.call_args.kwargs["target"]()
+    assert "library list failed" in caplog.text
+    assert db._schema_perm is None
 
 
 def test_init_autoconnect_false_no_load_library_list():
@@ -70,3 +112,13 @@ def test_init_autoconnect_false_no_load_library_list():
         with mock.patch("wrds.sql.Connection.load_library_list") as mock_lll:
             wrds.Connection(autoconnect=False)
             mock_lll.assert_not_called()
+
+
+def test_init_pool_args_override_defaults():
+    """Test init merges wrds_pool_args into the default pool settings."""
+    with mock.patch("wrds.sql.sa") as mock_sa:
+        wrds.Connection(wrds_pool_args={"pool_size": 20, "pool_recycle": 60})
+        kwargs = mock_sa.create_engine.call_args[1]
+        assert kwargs["pool_size"] == 20
+        assert kwargs["pool_recycle"] == 60
+        assert kwargs["max_overflow"] == wrds.sql.WRDS_POOL_ARGS["max_overflow"]
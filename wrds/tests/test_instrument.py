@@ -0,0 +1,158 @@
+import logging
+import sys
+import threading
+import tracemalloc
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+import wrds
+
+
+def fake_result(*chunks):
+    result = mock.Mock()
+    result.cursor.description = [("permno", 23)]
+    result.fetchmany.side_effect = [*chunks, []]
+    return result
+
+
+@pytest.fixture
+def log(mock_connection):
+    mock_connection.schema_perm = ["crsp"]
+    mock_connection.engine = mock.Mock()
+    mock_connection._instrumentation = wrds.Instrumentation(wrds.QueryLog())
+    return mock_connection.query_log
+
+
+def test_instrument_true_keeps_query_log():
+    """Test instrument=True records calls in the connection's query_log."""
+    db = wrds.Connection(autoconnect=False, instrument=True)
+    assert isinstance(db.query_log, wrds.QueryLog)
+    assert wrds.Connection(autoconnect=False).query_log is None
+
+
+def test_raw_sql_records_timings(mock_connection, log):
+    """Test raw_sql records its query, rows, chunks and phase timings."""
+    pooled_conn = mock_connection.engine.connect.return_value
+    pooled_conn.exec_driver_sql.return_value = fake_result([(1,), (2,)], [(3,)])
+    df = mock_connection.raw_sql("SELECT permno FROM crsp.dsf", chunksize=2)
+    assert len(df) == 3
+    (record,) = log.records()
+    assert record["method"] == "raw_sql"
+    assert record["sql"] == "SELECT permno FROM crsp.dsf"
+    assert (record["rows"], record["chunks"], record["cached"]) == (3, 2, False)
+    assert record["bytes"] == df.memory_usage(index=True).sum()
+    assert record["first_row_time"] <= record["total_time"]
+    for name in ("server_time", "fetch_time", "build_time"):
+        assert 0 < record[name] <= record["total_time"]
+    assert record["error"] is None
+
+
+def test_get_table_records_one_call(mock_connection, log):
+    """Test the raw_sql behind get_table adds to the get_table record."""
+    pooled_conn = mock_connection.engine.connect.return_value
+    pooled_conn.exec_driver_sql.return_value = fake_result([(1,), (2,)])
+    mock_connection.get_table("crsp", "dsf", columns=["permno"])
+    (record,) = log.records()
+    assert record["method"] == "get_table"
+    assert record["sql"].startswith("SELECT permno FROM crsp.dsf")
+    assert (record["rows"], record["chunks"]) == (2, 1)
+
+
+def test_iterator_recorded_when_exhausted(mock_connection, log):
+    """Test a return_iter call is recorded once its chunks are consumed."""
+    pooled_conn = mock_connection.engine.connect.return_value
+    pooled_conn.exec_driver_sql.return_value = fake_result([(1,)], [(2,)])
+    chunks = mock_connection.raw_sql(
+        "SELECT 1", chunksize=1, return_iter=True, stream=False
+    )
+    assert len(log) == 0
+    assert sum(len(chunk) for chunk in chunks) == 2
+    (record,) = log.records()
+    assert (record["rows"], record["chunks"]) == (2, 2)
+
+
+def test_failed_call_records_error(mock_connection, log):
+    """Test a call that raises is recorded with its error."""
+    read_frames = mock.patch("wrds.sql._read_frames", side_effect=RuntimeError("boom"))
+    with read_frames, pytest.raises(RuntimeError):
+        mock_connection.raw_sql("SELECT 1", chunksize=None)
+    (record,) = log.records()
+    assert record["error"] == "RuntimeError('boom')"
+
+
+def test_failing_sink_does_not_fail_call(mock_connection, caplog):
+    """Test an exception in a sink is logged instead of raised."""
+    sink = mock.Mock(side_effect=ValueError("sink"))
+    mock_connection.engine = mock.Mock()
+    mock_connection._instrumentation = wrds.Instrumentation(sink)
+    with mock.patch("wrds.sql._read_frames", return_value=iter([pd.DataFrame()])):
+        mock_connection.raw_sql("SELECT 1")
+    sink.assert_called_once()
+    assert "sink" in caplog.text
+
+
+def test_logger_sink_logs_record(mock_connection, caplog):
+    """Test a Logger sink logs a summary carrying the record."""
+    mock_connection.engine = mock.Mock()
+    mock_connection._instrumentation = wrds.Instrumentation(
+        logging.getLogger("wrds.queries")
+    )
+    frame = pd.DataFrame({"permno": [1, 2]})
+    read_frames = mock.patch("wrds.sql._read_frames", return_value=iter([frame]))
+    with caplog.at_level(logging.INFO, logger="wrds.queries"), read_frames:
+        mock_connection.raw_sql("SELECT 1")
+    (log_record,) = caplog.records
+    assert log_record.getMessage().startswith("raw_sql: 2 rows")
+    assert log_record.wrds_query["rows"] == 2
+
+
+def test_stats_count_series_results():
+    """Test a Series result, such as get_row_counts', counts rows and bytes."""
+    counts = pd.Series([5, 7], index=["dsf", "msf"], name="rows")
+    stats = wrds.instrument.QueryStats("get_row_counts")
+    stats.add_result(counts)
+    assert stats.rows == 2
+    assert stats.bytes == counts.memory_usage(index=True)
+
+
+def test_stats_updates_from_threads_are_not_lost():
+    """Test parallel workers adding to one record do not lose updates."""
+    stats = wrds.instrument.QueryStats("get_table")
+
+    def work():
+        for _ in range(2000):
+            with wrds.instrument.timed(stats, "fetch_time"):
+                pass
+            stats.add("chunks", 1)
+            stats.add_result([1])
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert stats.chunks == stats.rows == 16000
+    assert stats.fetch_time > 0
+
+
+def test_trace_memory_stops_tracing_it_started(mock_connection, log):
+    """Test tracemalloc is stopped after a traced call unless it was already on."""
+    mock_connection._instrumentation.trace_memory = True
+    pooled_conn = mock_connection.engine.connect.return_value
+    pooled_conn.exec_driver_sql.side_effect = lambda *args: fake_result([(1,)])
+    mock_connection.raw_sql("SELECT permno FROM crsp.dsf")
+    assert not tracemalloc.is_tracing()
+    tracemalloc.start()
+    try:
+        mock_connection.raw_sql("SELECT permno FROM crsp.dsf")
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert all(record["peak_memory"] > 0 for record in log.records())
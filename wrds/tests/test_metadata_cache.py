@@ -0,0 +1,93 @@
+import sqlite3
+from unittest import mock
+
+import sqlalchemy as sa
+
+import wrds
+from wrds.cache import MetadataCache
+
+SCOPE = ("wrds.test.private", "faketestusername", "testdbname")
+
+
+def test_metadata_cache_round_trip(tmp_path):
+    """Test MetadataCache returns what was stored for the same scope only."""
+    cache = MetadataCache(tmp_path / "meta.sqlite3")
+    cache.set(SCOPE, "tables", "crsp", ["dsf", "msf"])
+    assert cache.get(SCOPE, "tables", "crsp") == ["dsf", "msf"]
+    assert cache.get(("other", "user", "db"), "tables", "crsp") is None
+
+
+def test_metadata_cache_expires_entries(tmp_path):
+    """Test MetadataCache ignores entries older than the ttl."""
+    cache = MetadataCache(tmp_path / "meta.sqlite3", ttl=60)
+    with mock.patch("wrds.cache.time.time", return_value=1000.0):
+        cache.set(SCOPE, "libraries", "", ["crsp"])
+    with mock.patch("wrds.cache.time.time", return_value=1061.0):
+        assert cache.get(SCOPE, "libraries") is None
+
+
+def test_metadata_cache_invalidate_by_scope(tmp_path):
+    """Test MetadataCache.invalidate only clears the given scope."""
+    cache = MetadataCache(tmp_path / "meta.sqlite3")
+    other = ("other", "user", "db")
+    cache.set(SCOPE, "libraries", "", ["crsp"])
+    cache.set(other, "libraries", "", ["comp"])
+    cache.invalidate(SCOPE)
+    assert cache.get(SCOPE, "libraries") is None
+    assert cache.get(other, "libraries") == ["comp"]
+
+
+def test_metadata_cache_discards_other_versions(tmp_path):
+    """Test MetadataCache drops a cache file written by another format version."""
+    path = tmp_path / "meta.sqlite3"
+    MetadataCache(path).set(SCOPE, "libraries", "", ["crsp"])
+    with sqlite3.connect(path) as db:
+        db.execute("PRAGMA user_version = 0")
+    assert MetadataCache(path).get(SCOPE, "libraries") is None
+
+
+def test_load_library_list_uses_metadata_cache(mock_connection, tmp_path):
+    """Test load_library_list skips the catalog query when the list is cached."""
+    mock_connection._metadata_cache = MetadataCache(tmp_path / "meta.sqlite3")
+    mock_connection.engine = mock.Mock()
+    with mock.patch("wrds.sql.sa"):
+        conn = mock_connection.engine.connect.return_value
+        conn.exec_driver_sql.return_value.fetchall.return_value = [("crsp",)]
+        mock_connection.load_library_list()
+        mock_connection.load_library_list()
+    conn.exec_driver_sql.assert_called_once()
+    assert mock_connection.schema_perm == ["crsp"]
+
+
+def test_init_metadata_cache_true_uses_default_cache(tmp_path, monkeypatch):
+    """Test metadata_cache=True creates a cache in the default cache directory."""
+    monkeypatch.setenv("WRDS_CACHE_DIR", str(tmp_path))
+    db = wrds.Connection(autoconnect=False, metadata_cache=True)
+    assert db._metadata_cache.path == tmp_path / "metadata.sqlite3"
+
+
+def test_describe_table_uses_metadata_cache(mock_connection, tmp_path):
+    """Test a cached describe_table reads neither columns nor row count again."""
+    mock_connection._metadata_cache = MetadataCache(tmp_path / "meta.sqlite3")
+    mock_connection._insp = mock.Mock()
+    mock_connection._insp.get_columns.return_value = [
+        {"name": "permno", "nullable": False, "type": sa.Integer(), "comment": None}
+    ]
+    with mock.patch.object(mock_connection, "get_row_count", return_value=42) as count:
+        first = mock_connection.describe_table("crsp", "dsf")
+        second = mock_connection.describe_table("crsp", "dsf")
+    count.assert_called_once()
+    mock_connection._insp.get_columns.assert_called_once()
+    assert first.equals(second)
+    assert first["type"].tolist() == ["INTEGER"]
+
+
+def test_describe_table_types_are_names_without_cache(mock_connection):
+    """Test describe_table returns type names whether or not it caches."""
+    mock_connection._insp = mock.Mock()
+    mock_connection._insp.get_columns.return_value = [
+        {"name": "permno", "nullable": False, "type": sa.Integer(), "comment": None}
+    ]
+    with mock.patch.object(mock_connection, "get_row_count", return_value=42):
+        df = mock_connection.describe_table("crsp", "dsf")
+    assert df["type"].tolist() == ["INTEGER"]
@@ -1,31 +1,42 @@
+import datetime
+import decimal
 from unittest import mock
 
+import numpy as np
+import pandas as pd
+import psycopg2
+import pytest
+import sqlalchemy as sa
+
+import wrds
+
 
 def test_rawsql_takes_unparameterized_sql(mock_connection):
     """Test raw_sql handles unparameterized SQL queries."""
     with mock.patch("wrds.sql.sa"):
-        with mock.patch("wrds.sql.pd") as mock_pd:
+        with mock.patch("wrds.sql._read_frames") as mock_read_frames:
             mock_connection.connection = mock.Mock()
             mock_connection.engine = mock.Mock()
             sql = "SELECT * FROM information_schema.tables LIMIT 1"
             mock_connection.raw_sql(sql)
-            mock_pd.read_sql_query.assert_called_once_with(
+            mock_read_frames.assert_called_once_with(
+                mock_connection.engine.connect.return_value,
                 sql,
-                mock_connection.connection,
+                chunksize=500000,
                 coerce_float=True,
-                parse_dates=None,
+                date_cols=None,
                 index_col=None,
-                chunksize=500000,
                 params=None,
                 dtype=None,
                 dtype_backend="numpy_nullable",
+                prefetch=0,
             )
 
 
 def test_rawsql_takes_parameterized_sql(mock_connection):
     """Test raw_sql handles parameterized SQL queries."""
     with mock.patch("wrds.sql.sa"):
-        with mock.patch("wrds.sql.pd") as mock_pd:
+        with mock.patch("wrds.sql._read_frames") as mock_read_frames:
             mock_connection.connection = mock.Mock()
             mock_connection.engine = mock.Mock()
             sql = (
@@ -34,14 +45,439 @@ def test_rawsql_takes_parameterized_sql(mock_connection):
             )
             tablename = "pg_stat_activity"
             mock_connection.raw_sql(sql, params=tablename)
-            mock_pd.read_sql_query.assert_called_once_with(
+            mock_read_frames.assert_called_once_with(
+                mock_connection.engine.connect.return_value,
                 sql,
-                mock_connection.connection,
+                chunksize=500000,
                 coerce_float=True,
-                parse_dates=None,
+                date_cols=None,
                 index_col=None,
-                chunksize=500000,
                 params=tablename,
                 dtype=None,
                 dtype_backend="numpy_nullable",
+                prefetch=0,
             )
+
+
+def test_rawsql_assembles_chunks_in_order(mock_connection):
+    """Test raw_sql concatenates every chunk in order when not returning an iterator."""
+    chunks = [pd.DataFrame({"permno": [i, i + 1]}) for i in range(0, 10, 2)]
+    with mock.patch("wrds.sql._read_frames", return_value=iter(chunks)):
+        mock_connection.engine = mock.Mock()
+        df = mock_connection.raw_sql("SELECT permno FROM crsp.dsf", chunksize=2)
+    assert df["permno"].tolist() == list(range(10))
+
+
+def test_rawsql_no_chunks_returns_empty_frame(mock_connection):
+    """Test raw_sql returns an empty DataFrame when the query yields no chunks."""
+    with mock.patch("wrds.sql._read_frames", return_value=iter([])):
+        mock_connection.engine = mock.Mock()
+        df = mock_connection.raw_sql("SELECT permno FROM crsp.dsf WHERE false")
+    assert isinstance(df, pd.DataFrame)
+    assert df.empty
+
+
+def test_assemble_chunks_concatenates_once():
+    """Test _assemble_chunks calls pd.concat a single time for many chunks."""
+    chunks = [pd.DataFrame({"a": [i]}) for i in range(50)]
+    with mock.patch("wrds.sql.pd.concat", wraps=pd.concat) as mock_concat:
+        df = wrds.sql._assemble_chunks(iter(chunks))
+    mock_concat.assert_called_once()
+    assert df["a"].tolist() == list(range(50))
+
+
+def test_rawsql_return_iter_streams_by_default(mock_connection):
+    """Test raw_sql reads through a server-side cursor when return_iter is True."""
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_connection.engine = mock.Mock()
+        pooled_conn = mock_connection.engine.connect.return_value
+        mock_read_frames.return_value = iter([])
+        list(mock_connection.raw_sql("SELECT 1", chunksize=1000, return_iter=True))
+        pooled_conn.execution_options.assert_called_once_with(
+            isolation_level="READ COMMITTED",
+            stream_results=True,
+            max_row_buffer=1000,
+        )
+        assert (
+            mock_read_frames.call_args[0][0]
+            is pooled_conn.execution_options.return_value
+        )
+        pooled_conn.close.assert_called_once()
+
+
+def test_rawsql_stream_false_does_not_stream(mock_connection):
+    """Test raw_sql uses a plain pooled connection when stream is False."""
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_connection.engine = mock.Mock()
+        pooled_conn = mock_connection.engine.connect.return_value
+        list(mock_connection.raw_sql("SELECT 1", return_iter=True, stream=False))
+        pooled_conn.execution_options.assert_not_called()
+        assert mock_read_frames.call_args[0][0] is pooled_conn
+        pooled_conn.close.assert_called_once()
+
+
+def test_rawsql_returns_connection_to_pool_on_error(mock_connection):
+    """Test raw_sql closes its pooled connection when the query fails."""
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_connection.engine = mock.Mock()
+        mock_read_frames.side_effect = RuntimeError("query failed")
+        with pytest.raises(RuntimeError):
+            mock_connection.raw_sql("SELECT 1", chunksize=None)
+        mock_connection.engine.connect.return_value.close.assert_called_once()
+
+
+def test_upload_temp_copies_values_into_temporary_table(mock_connection):
+    """Test upload_temp creates, fills, analyzes and finally drops the table."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.invalidated = False
+    ids = pd.Series([10107, 14593], name="permno")
+    with mock_connection.upload_temp(ids, "ids") as name:
+        assert name == "ids"
+    statements = [call.args[0] for call in conn.exec_driver_sql.call_args_list]
+    assert statements == [
+        'DROP TABLE IF EXISTS pg_temp."ids"',
+        'CREATE TEMPORARY TABLE "ids" ("permno" bigint)',
+        'ANALYZE "ids"',
+        'DROP TABLE IF EXISTS pg_temp."ids"',
+    ]
+    copy_sql, csv = conn.connection.cursor.return_value.copy_expert.call_args.args
+    assert copy_sql == 'COPY "ids" ("permno") FROM STDIN WITH (FORMAT csv)'
+    assert csv.getvalue() == '"10107"\n"14593"\n'
+
+
+def test_upload_temp_keeps_nulls_apart_from_strings(mock_connection):
+    """Test NULLs are unquoted empty fields, and "" and "\\N" stay strings."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.invalidated = False
+    data = pd.DataFrame({"code": ["\\N", "", None], "n": [1.5, None, 3.0]})
+    with mock_connection.upload_temp(data, "codes"):
+        pass
+    _, csv = conn.connection.cursor.return_value.copy_expert.call_args.args
+    assert csv.getvalue() == '"\\N","1.5"\n"",\n,"3.0"\n'
+    with mock_connection.upload_temp([None, 2], "ids"):
+        pass
+    _, csv = conn.connection.cursor.return_value.copy_expert.call_args.args
+    assert csv.getvalue() == '\n"2.0"\n'
+
+
+def test_rawsql_join_values_runs_on_the_uploading_connection(mock_connection):
+    """Test raw_sql with join_values queries the connection holding the table."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.invalidated = False
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.return_value = iter([pd.DataFrame({"permno": [1]})])
+        mock_connection.raw_sql(
+            "SELECT * FROM crsp.dsf JOIN ids USING (permno)",
+            join_values={"ids": [1, 2, 3]},
+        )
+    mock_connection.engine.connect.assert_called_once()
+    assert mock_read_frames.call_args.args[0] is conn
+    assert 'CREATE TEMPORARY TABLE "ids" ("value" bigint)' in [
+        call.args[0] for call in conn.exec_driver_sql.call_args_list
+    ]
+
+
+def test_rawsql_join_values_iterator_unpins_between_chunks(mock_connection):
+    """Test queries run between chunks do not use the uploading connection."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.invalidated = False
+    pinned = []
+
+    def read_frames(connection, *args, **kwargs):
+        pinned.append(mock_connection._pinned.conn)
+        yield pd.DataFrame({"permno": [1]})
+        pinned.append(mock_connection._pinned.conn)
+        yield pd.DataFrame({"permno": [2]})
+
+    with mock.patch("wrds.sql._read_frames", side_effect=read_frames):
+        chunks = mock_connection.raw_sql(
+            "SELECT * FROM crsp.dsf JOIN ids USING (permno)",
+            join_values={"ids": [1, 2]},
+            chunksize=1,
+            return_iter=True,
+        )
+        next(chunks)
+        assert getattr(mock_connection._pinned, "conn", None) is None
+        next(chunks)
+        chunks.close()
+    assert pinned == [conn, conn]
+    assert getattr(mock_connection._pinned, "conn", None) is None
+
+
+def fake_result(description, *chunks):
+    result = mock.Mock()
+    result.cursor.description = description
+    result.fetchmany.side_effect = [*chunks, []]
+    return result
+
+
+def test_read_frames_plans_dtypes_from_description():
+    """Test every chunk gets the dtypes of the columns' PostgreSQL types."""
+    conn = mock.Mock()
+    conn.exec_driver_sql.return_value = fake_result(
+        [("permno", 23), ("date", 1082), ("ticker", 1043), ("prc", 1700)],
+        [(10001, datetime.date(2020, 1, 2), "AAPL", decimal.Decimal("1.5"))],
+        [(None, None, None, None)],
+    )
+    chunks = list(wrds.sql._read_frames(conn, "SELECT 1", {"p": 1}, chunksize=1))
+    conn.exec_driver_sql.assert_called_once_with("SELECT 1", {"p": 1})
+    assert len(chunks) == 2
+    for chunk in chunks:
+        assert chunk.dtypes.to_dict() == {
+            "permno": pd.Int32Dtype(),
+            "date": np.dtype("datetime64[s]"),
+            "ticker": wrds.sql._string_dtype(),
+            "prc": pd.Float64Dtype(),
+        }
+    assert chunks[0].iloc[0].tolist() == [
+        10001,
+        pd.Timestamp("2020-01-02"),
+        "AAPL",
+        1.5,
+    ]
+
+
+def test_read_frames_empty_result_keeps_columns():
+    """Test an empty result yields one empty frame with the planned dtypes."""
+    conn = mock.Mock()
+    conn.exec_driver_sql.return_value = fake_result([("vol", 20)])
+    chunks = list(wrds.sql._read_frames(conn, "SELECT 1", chunksize=10))
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert chunks[0].dtypes.to_dict() == {"vol": pd.Int64Dtype()}
+
+
+def explained(rows, width, scans=()):
+    plan = {
+        "Node Type": "Limit",
+        "Plan Rows": rows,
+        "Plan Width": width,
+        "Startup Cost": 0.0,
+        "Total Cost": 1000.5,
+        "Plans": [
+            {
+                "Node Type": "Seq Scan",
+                "Schema": schema,
+                "Relation Name": name,
+                "Plan Rows": rows,
+            }
+            for schema, name in scans
+        ],
+    }
+    return mock.Mock(fetchone=mock.Mock(return_value=([{"Plan": plan}],)))
+
+
+def test_explain_summarizes_plan(mock_connection):
+    """Test explain reports estimates and seq scans of large relations only."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.exec_driver_sql.side_effect = [
+        explained(5000, 40, [("crsp", "dsf"), ("crsp", "msenames")]),
+        [("crsp", "dsf", 105259392, 14285045760), ("crsp", "msenames", 105000, 10)],
+    ]
+    summary = mock_connection.explain("select * from crsp.dsf;", params={"p": 1})
+    assert conn.exec_driver_sql.call_args_list[0].args == (
+        "EXPLAIN (VERBOSE, FORMAT JSON) select * from crsp.dsf",
+        {"p": 1},
+    )
+    assert conn.exec_driver_sql.call_args_list[1].args[1] == {
+        "schemas": ["crsp", "crsp"],
+        "names": ["dsf", "msenames"],
+    }
+    assert summary["rows"] == 5000
+    assert summary["estimated_bytes"] == 200000
+    assert summary["total_cost"] == 1000.5
+    assert summary["seq_scans"] == [
+        {"relation": "crsp.dsf", "rows": 105259392, "bytes": 14285045760}
+    ]
+    assert summary["execution_time"] is None
+
+
+def test_rawsql_max_estimated_bytes_refuses_large_query(mock_connection):
+    """Test raw_sql raises before reading when the estimate is too large."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.exec_driver_sql.return_value = explained(10**9, 100)
+    too_large = pytest.raises(wrds.sql.QueryTooLargeError, match="93.1 GB")
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames, too_large:
+        mock_connection.raw_sql("SELECT 1", max_estimated_bytes=10**9)
+    mock_read_frames.assert_not_called()
+
+
+def test_rawsql_max_estimated_bytes_can_warn(mock_connection):
+    """Test estimate_action='warn' warns and runs the query anyway."""
+    mock_connection.engine = mock.Mock()
+    conn = mock_connection.engine.connect.return_value
+    conn.exec_driver_sql.return_value = explained(10**9, 100)
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.return_value = iter([pd.DataFrame({"a": [1]})])
+        with pytest.warns(UserWarning, match="max_estimated_bytes"):
+            df = mock_connection.raw_sql(
+                "SELECT 1", max_estimated_bytes=10**9, estimate_action="warn"
+            )
+    assert len(df) == 1
+
+
+def test_prefetch_keeps_order_and_raises_errors():
+    """Test _prefetch yields items in order and re-raises producer errors."""
+    assert list(wrds.sql._prefetch(iter(range(100)), 2)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise RuntimeError("fetch failed")
+
+    items = wrds.sql._prefetch(failing(), 2)
+    assert next(items) == 1
+    with pytest.raises(RuntimeError, match="fetch failed"):
+        next(items)
+
+
+def test_prefetch_close_stops_producer():
+    """Test closing _prefetch early stops its thread before returning."""
+    produced = []
+
+    def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    items = wrds.sql._prefetch(endless(), 1)
+    assert next(items) == 0
+    items.close()
+    count = len(produced)
+    assert count <= 4
+    assert len(produced) == count
+
+
+def test_read_frames_prefetch_matches_plain_read():
+    """Test prefetching rows in the background yields the same chunks."""
+    rows = [[(i,)] for i in range(5)]
+    chunks = {}
+    for prefetch in (0, 2):
+        conn = mock.Mock()
+        conn.exec_driver_sql.return_value = fake_result([("permno", 23)], *rows)
+        chunks[prefetch] = list(
+            wrds.sql._read_frames(conn, "SELECT 1", chunksize=1, prefetch=prefetch)
+        )
+    assert len(chunks[2]) == 5
+    for plain, prefetched in zip(chunks[0], chunks[2]):
+        pd.testing.assert_frame_equal(plain, prefetched)
+
+
+def lost_connection():
+    return sa.exc.OperationalError(
+        "SELECT", {}, psycopg2.OperationalError("server closed the connection")
+    )
+
+
+def read_then_fail(*chunks):
+    yield from chunks
+    raise lost_connection()
+
+
+def test_rawsql_reads_again_after_losing_connection(mock_connection):
+    """Test a read that loses its connection is read again from the start."""
+    mock_connection.engine = mock.Mock()
+    chunks = [pd.DataFrame({"permno": [1, 2]}), pd.DataFrame({"permno": [3]})]
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.side_effect = [read_then_fail(chunks[0]), iter(chunks)]
+        with mock.patch("wrds.sql.time.sleep") as sleep:
+            df = mock_connection.raw_sql("SELECT permno FROM crsp.dsf", chunksize=2)
+    assert df["permno"].tolist() == [1, 2, 3]
+    sleep.assert_called_once()
+
+
+def test_rawsql_iterator_resumes_after_last_key(mock_connection):
+    """Test an iterator with resume_key continues after the last row read."""
+    mock_connection.engine = mock.Mock()
+    first = pd.DataFrame({"permno": [1, 2], "ret": [0.1, 0.2]}).set_index("permno")
+    rest = pd.DataFrame({"permno": [3], "ret": [0.3]}).set_index("permno")
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.side_effect = [read_then_fail(first), iter([rest])]
+        with mock.patch("wrds.sql.time.sleep"):
+            chunks = mock_connection.raw_sql(
+                "SELECT permno, ret FROM crsp.dsf WHERE ret > %(r)s;",
+                params={"r": 0},
+                index_col="permno",
+                chunksize=2,
+                return_iter=True,
+                resume_key="permno",
+            )
+            assert [len(chunk) for chunk in chunks] == [2, 1]
+    (_, sql), kwargs = mock_read_frames.call_args
+    assert sql == (
+        "SELECT * FROM (SELECT permno, ret FROM crsp.dsf WHERE ret > %(r)s\n) "
+        "AS wrds_resume WHERE (permno > %(wrds_resume_0)s OR permno IS NULL) "
+        "ORDER BY permno"
+    )
+    assert kwargs["params"] == {"r": 0, "wrds_resume_0": 2}
+
+
+def test_rawsql_iterator_resumes_after_null_key(mock_connection):
+    """Test rows after a NULL resume key, which sort last, are read again."""
+    mock_connection.engine = mock.Mock()
+    first = pd.DataFrame({"permno": [2.0, None], "date": ["2020-01-02"] * 2})
+    rest = pd.DataFrame({"permno": [None], "date": ["2020-01-03"]})
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.side_effect = [read_then_fail(first), iter([rest])]
+        with mock.patch("wrds.sql.time.sleep"):
+            chunks = mock_connection.raw_sql(
+                "SELECT permno, date FROM crsp.dsf",
+                params=[],
+                chunksize=2,
+                return_iter=True,
+                resume_key=["permno", "date"],
+            )
+            assert [len(chunk) for chunk in chunks] == [2, 1]
+    (_, sql), kwargs = mock_read_frames.call_args
+    assert sql == (
+        "SELECT * FROM (SELECT permno, date FROM crsp.dsf\n) AS wrds_resume "
+        "WHERE permno IS NULL AND (date > %s OR date IS NULL) ORDER BY permno, date"
+    )
+    assert kwargs["params"] == ["2020-01-02"]
+
+
+def test_rawsql_iterator_without_resume_key_raises(mock_connection):
+    """Test an iterator that lost its connection after a chunk raises."""
+    mock_connection.engine = mock.Mock()
+    chunk = pd.DataFrame({"permno": [1]})
+    with mock.patch("wrds.sql._read_frames", return_value=read_then_fail(chunk)):
+        chunks = mock_connection.raw_sql(
+            "SELECT permno FROM crsp.dsf", chunksize=1, return_iter=True
+        )
+        next(chunks)
+        with pytest.raises(sa.exc.OperationalError):
+            next(chunks)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "INSERT INTO t SELECT 1 RETURNING 1",
+        "WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d",
+        "with i as (\n  insert into t values (1) returning *\n) select * from i",
+        "SELECT * INTO new_t FROM t",
+        "SELECT * FROM t FOR UPDATE",
+    ],
+)
+def test_rawsql_does_not_retry_writes(mock_connection, sql):
+    """Test a query that may write, e.g. in a data-modifying CTE, is not run again."""
+    mock_connection.engine = mock.Mock()
+    read_frames = mock.patch("wrds.sql._read_frames", return_value=read_then_fail())
+    with read_frames as read, pytest.raises(sa.exc.OperationalError):
+        mock_connection.raw_sql(sql)
+    read.assert_called_once()
+
+
+def test_is_read_query():
+    """Test plain queries, including WITH queries over reads, count as reads."""
+    assert wrds.sql._is_read_query("  select update_date from t")
+    assert wrds.sql._is_read_query("WITH a AS (SELECT 1) SELECT * FROM a")
+    assert wrds.sql._is_read_query("TABLE crsp.msi")
+    assert not wrds.sql._is_read_query("CALL refresh()")
@@ -0,0 +1,110 @@
+import os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wrds.cache import ResultCache
+
+pytest.importorskip("pyarrow")
+
+SCOPE = ("wrds.test.private", "faketestusername", "testdbname")
+
+
+def frame():
+    return pd.DataFrame(
+        {
+            "permno": pd.array([10001, 10002], dtype="Int64"),
+            "ticker": pd.array(["AAPL", None], dtype="string"),
+        }
+    )
+
+
+def test_result_cache_key_normalizes_sql():
+    """Test the key ignores whitespace and a trailing semicolon only."""
+    key = ResultCache.key(SCOPE, "select *\n  from crsp.msi", None, {})
+    assert key == ResultCache.key(SCOPE, "select * from crsp.msi;", None, {})
+    assert key != ResultCache.key(SCOPE, "select * from crsp.msf", None, {})
+    assert key != ResultCache.key(("other", "user", "db"), "select * from crsp.msi")
+    assert key != ResultCache.key(SCOPE, "select * from crsp.msi", {"a": 1}, {})
+
+
+def test_result_cache_key_tells_parameter_types_apart():
+    """Test the key follows how parameters are bound, not their repr()."""
+    sql = "select * from crsp.dsf where permno in %(p)s"
+    key = ResultCache.key(SCOPE, sql, {"p": (10001, 10002)})
+    assert key == ResultCache.key(SCOPE, sql, {"p": (np.int64(10001), 10002)})
+    assert key != ResultCache.key(SCOPE, sql, {"p": [10001, 10002]})
+    assert key != ResultCache.key(SCOPE, sql, {"p": ("10001", "10002")})
+    with pytest.raises(TypeError, match="ndarray"):
+        ResultCache.key(SCOPE, sql, {"p": np.arange(2000)})
+
+
+def test_result_cache_round_trip_keeps_dtypes_and_index(tmp_path):
+    """Test a cached frame comes back with its dtypes and index."""
+    cache = ResultCache(tmp_path)
+    df = frame().set_index("permno")
+    df["exchcd"] = pd.array(["N", None], dtype="string[pyarrow]")
+    df["date"] = pd.Series(["2020-01-02", "9999-12-31"], dtype="datetime64[s]").values
+    cache.set("k", df, "select * from crsp.dsf")
+    pd.testing.assert_frame_equal(cache.get("k"), df)
+
+
+def test_result_cache_expires_entries(tmp_path):
+    """Test entries older than the ttl are ignored and removed."""
+    cache = ResultCache(tmp_path, ttl=60)
+    with mock.patch("wrds.cache.time.time", return_value=1000.0):
+        cache.set("k", frame())
+    with mock.patch("wrds.cache.time.time", return_value=1061.0):
+        assert cache.get("k") is None
+    assert not (tmp_path / "k.parquet").exists()
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    """Test the cache drops the least recently used entries past max_bytes."""
+    cache = ResultCache(tmp_path)
+    cache.set("a", frame())
+    cache.max_bytes = 2.5 * os.path.getsize(tmp_path / "a.parquet")
+    cache.set("b", frame())
+    cache.get("a")
+    cache.set("c", frame())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_result_cache_invalidate_by_table(tmp_path):
+    """Test invalidate clears only results that read the given table."""
+    cache = ResultCache(tmp_path)
+    cache.set("dsf", frame(), "select * from crsp.dsf d join crsp.msenames n on x")
+    cache.set("funda", frame(), "SELECT * FROM comp.funda")
+    cache.invalidate("crsp", "msenames")
+    assert cache.get("dsf") is None
+    assert cache.get("funda") is not None
+    cache.invalidate("COMP")
+    assert cache.get("funda") is None
+
+
+def test_rawsql_serves_repeated_query_from_result_cache(mock_connection, tmp_path):
+    """Test raw_sql only queries the database once for a repeated query."""
+    mock_connection._result_cache = ResultCache(tmp_path)
+    mock_connection.engine = mock.Mock()
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.return_value = iter([frame()])
+        first = mock_connection.raw_sql("select * from crsp.dsf")
+        second = mock_connection.raw_sql("select *  from crsp.dsf;")
+        mock_connection.raw_sql("select * from crsp.dsf", cache=False)
+    assert mock_read_frames.call_count == 2
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_rawsql_reads_uncached_params_it_cannot_key(mock_connection, tmp_path):
+    """Test raw_sql warns and skips the cache for parameters it cannot key."""
+    mock_connection._result_cache = ResultCache(tmp_path)
+    mock_connection.engine = mock.Mock()
+    with mock.patch("wrds.sql._read_frames") as mock_read_frames:
+        mock_read_frames.side_effect = lambda *args, **kwargs: iter([frame()])
+        with pytest.warns(UserWarning, match="without the result cache"):
+            mock_connection.raw_sql("select %(p)s", params={"p": object()})
+    assert list(tmp_path.glob("*.parquet")) == []
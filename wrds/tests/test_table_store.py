@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from wrds.cache import TableStore
+
+pytest.importorskip("pyarrow")
+
+SQL = "SELECT permno,ticker FROM crsp.dsf  OFFSET 0"
+
+
+def frame():
+    return pd.DataFrame(
+        {
+            "permno": pd.array([10001, 10002], dtype="Int64"),
+            "ticker": pd.array(["AAPL", None], dtype="string"),
+        }
+    )
+
+
+def test_table_store_restores_dtypes_and_index_from_arrow(tmp_path):
+    """Test a stored frame comes back with the dtypes Arrow does not keep."""
+    store = TableStore(tmp_path)
+    df = frame().set_index("permno")
+    df["exchcd"] = pd.array(["N", None], dtype="string[pyarrow]")
+    df["date"] = pd.Series(["2020-01-02", "9999-12-31"], dtype="datetime64[s]").values
+    df["hexcd"] = pd.Categorical(["1", "2"])
+    store.set("k", df, "crsp", "dsf", SQL)
+    pd.testing.assert_frame_equal(store.get("k"), df)
+
+
+def test_table_store_pyarrow_backend_maps_file(tmp_path):
+    """Test dtype_backend="pyarrow" returns columns backed by the mapped file."""
+    store = TableStore(tmp_path)
+    store.set("k", frame(), "crsp", "dsf", SQL)
+    table = store.open("k")
+    assert table.num_rows == 2
+    df = store.get("k", dtype_backend="pyarrow")
+    assert isinstance(df["permno"].dtype, pd.ArrowDtype)
+    assert df["permno"].tolist() == [10001, 10002]
+    assert df["ticker"].isna().tolist() == [False, True]
+
+
+def test_get_table_keeps_tables_in_store_only(mock_connection, tmp_path):
+    """Test get_table reads a stored table once, bypassing the result cache."""
+    mock_connection._table_store = TableStore(tmp_path)
+    mock_connection.schema_perm = ["crsp"]
+    with mock.patch.object(mock_connection, "raw_sql", return_value=frame()) as raw:
+        first = mock_connection.get_table("crsp", "dsf", columns=["permno", "ticker"])
+        second = mock_connection.get_table("crsp", "dsf", columns=["permno", "ticker"])
+    raw.assert_called_once()
+    assert raw.call_args.kwargs["cache"] is False
+    pd.testing.assert_frame_equal(first, second)
+    assert mock_connection.table_store.entries()["table"].tolist() == ["dsf"]
+    mock_connection.invalidate_table_store("crsp", "dsf")
+    assert mock_connection.table_store.entries().empty